@@ -0,0 +1,10 @@
+"""
+HTTP API module initialization.
+Exports the application factory for headless serving.
+"""
+
+from .server import create_app
+
+__all__ = [
+    'create_app'
+]
@@ -0,0 +1,394 @@
+"""
+Module serving the RAG graph and document ingestion over HTTP.
+Async FastAPI application with JSON and server-sent-event endpoints.
+
+Usage:
+    python -m backend.api.server --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
+from uuid import uuid4
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel, field_validator
+
+from backend.document_processor.filters import parse_filters
+from backend.graph.content_store import CONTENT_STORE_KEY, ContentStore, StateDocuments
+from backend.graph.graph import get_app, get_conversation_app
+from backend.graph.state import new_turn
+from backend.warmup import WARMUP_ON_START, open_async_connections, run_warmup
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Threads running the synchronous graph nodes of concurrent requests
+GRAPH_THREADS = int(os.getenv("API_GRAPH_THREADS", "64"))
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+class HistoryMessage(BaseModel):
+    """Message of a previous conversation turn."""
+    role: str
+    content: str
+    timestamp: Optional[str] = None
+    documents_used: Optional[List[str]] = None
+
+class ChatRequest(BaseModel):
+    """
+    Question sent to the graph.
+
+    With a `thread_id` the conversation is kept server side and
+    `chat_history` is ignored. `filters` restricts retrieval by chunk
+    metadata, e.g. {"source": ["a.pdf", "b.pdf"], "page": {"lte": 10}}.
+    `profile` trades answer verification for latency, see
+    `graph.build_workflow`.
+    """
+    question: str
+    chat_history: List[HistoryMessage] = []
+    model: Optional[str] = None
+    thread_id: Optional[str] = None
+    filters: Optional[Dict[str, Any]] = None
+    profile: Optional[Literal["fast", "balanced", "thorough"]] = None
+
+    @field_validator("filters")
+    @classmethod
+    def check_filters(cls, filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Reject malformed filters before they reach the graph."""
+        try:
+            parse_filters(filters)
+        except TypeError as e:
+            # e.g. a range bound that is not a number
+            raise ValueError(f"Invalid filters: {e}") from e
+        return filters
+
+class ChatResponse(BaseModel):
+    """Answer produced by the graph."""
+    request_id: str
+    generation: str
+    sources: List[str]
+    web_search: bool
+
+class GraphRequest:
+    """
+    Builds graph inputs and results for API requests.
+    """
+
+    @staticmethod
+    def build_input(chat: ChatRequest) -> Dict[str, Any]:
+        """
+        Build the graph input from a chat request.
+
+        Args:
+            chat: Incoming chat request
+
+        Returns:
+            Input state for the graph
+        """
+        if chat.thread_id:
+            return new_turn(chat.question, chat.filters)
+        return {
+            "question": chat.question,
+            "chat_history": [message.model_dump() for message in chat.chat_history],
+            "filters": chat.filters,
+        }
+
+    @staticmethod
+    def build_config(request_id: str, chat: ChatRequest) -> RunnableConfig:
+        """
+        Build the runnable config of one request.
+
+        Each request gets its own content store, so the graph state only
+        carries references to the retrieved documents.
+
+        Args:
+            request_id: Identifier of the HTTP request
+            chat: Incoming chat request
+
+        Returns:
+            Config passed to the graph
+        """
+        configurable: Dict[str, Any] = {CONTENT_STORE_KEY: ContentStore()}
+        if chat.model:
+            configurable["model"] = chat.model
+        if chat.thread_id:
+            configurable["thread_id"] = chat.thread_id
+        return {"metadata": {"request_id": request_id}, "configurable": configurable}
+
+    @staticmethod
+    def get_graph(chat: ChatRequest) -> Any:
+        """
+        Get the graph serving a request.
+
+        Args:
+            chat: Incoming chat request
+
+        Returns:
+            Graph of the requested profile, with a checkpointer for threaded
+            conversations, stateless otherwise
+        """
+        return get_conversation_app(chat.profile) if chat.thread_id else get_app(chat.profile)
+
+    @staticmethod
+    def build_response(
+        request_id: str,
+        state: Dict[str, Any],
+        config: Optional[RunnableConfig] = None
+    ) -> ChatResponse:
+        """
+        Build the API response from the final graph state.
+
+        Args:
+            request_id: Identifier of the HTTP request
+            state: Final graph state
+            config: Config the graph ran with, resolving document references
+
+        Returns:
+            Chat response
+        """
+        return ChatResponse(
+            request_id=request_id,
+            generation=state.get("generation", ""),
+            sources=[
+                doc.metadata.get("source", "unknown")
+                for doc in StateDocuments.read(state, config)
+            ],
+            web_search=bool(state.get("web_search", False)),
+        )
+
+def _format_event(event: str, data: Dict[str, Any]) -> str:
+    """
+    Format one server-sent event.
+
+    Args:
+        event: Event name
+        data: JSON payload
+
+    Returns:
+        Encoded event
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _stream_chat(chat: ChatRequest, request_id: str) -> AsyncIterator[str]:
+    """
+    Run the graph and stream its progress as server-sent events.
+
+    Emits `node` when a node finishes, `token` for every answer token,
+    `answer` with the final answer (authoritative when the answer was
+    regenerated), `error` on failure and `done` last.
+
+    Args:
+        chat: Incoming chat request
+        request_id: Identifier of the HTTP request
+
+    Yields:
+        Encoded events
+    """
+    from backend.graph.chains.generation import GENERATION_TAG
+
+    yield _format_event("start", {"request_id": request_id})
+    state: Dict[str, Any] = {}
+    config = GraphRequest.build_config(request_id, chat)
+    try:
+        async for mode, chunk in GraphRequest.get_graph(chat).astream(
+            GraphRequest.build_input(chat),
+            config=config,
+            stream_mode=["updates", "messages", "values"],
+        ):
+            if mode == "messages":
+                message, metadata = chunk
+                if GENERATION_TAG in metadata.get("tags", []) and message.content:
+                    yield _format_event("token", {"text": message.content})
+            elif mode == "updates":
+                for node in chunk:
+                    yield _format_event("node", {"node": node})
+            else:
+                state = chunk
+        response = GraphRequest.build_response(request_id, state, config)
+        yield _format_event("answer", response.model_dump())
+    except Exception as e:
+        yield _format_event("error", {"request_id": request_id, "detail": str(e)})
+    yield _format_event("done", {"request_id": request_id})
+
+def _ingest_files(uploads: Dict[str, Any], tenant: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Ingest uploaded files into the document store.
+
+    Files are parsed from memory; only uploads above the spill
+    threshold are copied to a temporary file.
+
+    Args:
+        uploads: File objects keyed by file name
+        tenant: Tenant stored in the metadata of every chunk, for filtering
+
+    Returns:
+        Chunk counts of the ingestion, with the embeddings saved by
+        collapsing near-duplicate chunks
+    """
+    from backend.document_processor import InMemoryFile, get_document_loader
+    from backend.document_processor.service import document_service
+
+    files = [InMemoryFile(name, file) for name, file in uploads.items()]
+    try:
+        ingester = document_service.get_ingester()
+        ingester.process_documents(get_document_loader(files), {"tenant": tenant} if tenant else None)
+    finally:
+        for file in files:
+            file.close()
+    return ingester.last_report
+
+def _clear_documents() -> None:
+    """Remove every document from the document store."""
+    from backend.document_processor.service import document_service
+
+    document_service.get_vector_store().cleanup()
+    # Working sets would keep serving the removed chunks
+    document_service.get_retriever().working_sets.clear()
+
+async def _warm_up(api: FastAPI) -> None:
+    """Warm up the worker in a thread and publish the report for `/ready`."""
+    report = await run_in_threadpool(run_warmup)
+    try:
+        await open_async_connections()
+    except Exception as e:
+        print(f"---WARMUP ASYNC CONNECTIONS FAILED: {e}---")
+    api.state.warmup = report
+
+def create_app(warmup: bool = WARMUP_ON_START) -> FastAPI:
+    """
+    Create the API application.
+
+    Args:
+        warmup: Warm up every worker at startup, `/ready` failing until done
+
+    Returns:
+        Configured FastAPI application
+    """
+
+    @asynccontextmanager
+    async def lifespan(api: FastAPI):
+        executor = ThreadPoolExecutor(max_workers=GRAPH_THREADS, thread_name_prefix="graph")
+        asyncio.get_running_loop().set_default_executor(executor)
+        # The vector store is not safe for concurrent writes
+        api.state.documents_lock = asyncio.Lock()
+        api.state.warmup = None
+        get_app()
+        # Requests are served while warming up, readiness probes wait for it
+        task = asyncio.create_task(_warm_up(api)) if warmup else None
+        yield
+        if task is not None:
+            task.cancel()
+        executor.shutdown(wait=False)
+
+    api = FastAPI(title="Advanced RAG API", lifespan=lifespan)
+
+    @api.middleware("http")
+    async def request_id_middleware(request: Request, call_next):
+        request_id = request.headers.get(REQUEST_ID_HEADER) or uuid4().hex
+        request.state.request_id = request_id
+        response = await call_next(request)
+        response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+
+    @api.get("/health")
+    async def health() -> Dict[str, str]:
+        return {"status": "ok"}
+
+    @api.get("/ready")
+    async def ready(request: Request) -> JSONResponse:
+        if not warmup:
+            return JSONResponse({"status": "ready"})
+        report = request.app.state.warmup
+        if report is None:
+            return JSONResponse({"status": "warming_up"}, status_code=503)
+        return JSONResponse(
+            {"status": "ready" if report["ready"] else "failed", "warmup": report},
+            status_code=200 if report["ready"] else 503,
+        )
+
+    @api.post("/v1/chat", response_model=ChatResponse)
+    async def chat(chat_request: ChatRequest, request: Request) -> ChatResponse:
+        request_id = request.state.request_id
+        print(f"---API CHAT {request_id}---")
+        config = GraphRequest.build_config(request_id, chat_request)
+        try:
+            state = await GraphRequest.get_graph(chat_request).ainvoke(
+                GraphRequest.build_input(chat_request),
+                config=config,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error getting response: {e}")
+        return GraphRequest.build_response(request_id, state, config)
+
+    @api.post("/v1/chat/stream")
+    async def chat_stream(chat_request: ChatRequest, request: Request) -> StreamingResponse:
+        request_id = request.state.request_id
+        print(f"---API CHAT STREAM {request_id}---")
+        return StreamingResponse(
+            _stream_chat(chat_request, request_id),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @api.post("/v1/documents")
+    async def ingest_documents(
+        request: Request,
+        files: List[UploadFile] = File(...),
+        tenant: Optional[str] = Form(None)
+    ) -> Dict[str, Any]:
+        request_id = request.state.request_id
+        names = [os.path.basename(upload.filename or "") for upload in files]
+        unsupported = [name for name in names if not name.lower().endswith(SUPPORTED_EXTENSIONS)]
+        if unsupported:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type(s): {', '.join(unsupported)}. "
+                       f"Supported types are: {', '.join(SUPPORTED_EXTENSIONS)}",
+            )
+        # The file name is the chunks' source, so it must identify one upload
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Duplicate file name(s): {', '.join(duplicates)}. Upload files with distinct names",
+            )
+
+        print(f"---API INGEST {len(files)} FILE(S) {request_id}---")
+        uploads = {name: upload.file for name, upload in zip(names, files)}
+        try:
+            async with request.app.state.documents_lock:
+                report = await run_in_threadpool(_ingest_files, uploads, tenant)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error processing documents: {e}")
+        return {"request_id": request_id, "ingested": len(uploads), "files": list(uploads), **report}
+
+    @api.delete("/v1/documents")
+    async def clear_documents(request: Request) -> Dict[str, Any]:
+        async with request.app.state.documents_lock:
+            await run_in_threadpool(_clear_documents)
+        return {"request_id": request.state.request_id, "cleared": True}
+
+    return api
+
+app = create_app()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the RAG graph over HTTP")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "127.0.0.1"), help="Interface to bind")
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8000")), help="Port to bind")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run("backend.api.server:app", host=args.host, port=args.port, workers=args.workers)
+
+if __name__ == "__main__":
+    main()
@@ -10,12 +10,18 @@ from .ingestion import (
     DirectoryDocumentLoader,
     DocxLoader,
     RecursiveTextSplitter,
+    TikTokenTextSplitter,
     ChromaVectorStore,
     DocumentIngester,
     get_document_loader,
     CombinedLoader
 )
+from .quantized import QuantizedVectorStore
+from .mapped import MappedVectorStore
+from .sharded import ShardedVectorStore
 from .retriever import RetrieverService
+from .dedup import NearDuplicateFilter
+from .sources import InMemoryFile
 from .interfaces import DocumentLoader, TextSplitter, VectorStore
 
 __all__ = [
@@ -24,9 +30,15 @@ __all__ = [
     'FileLoader',
     'DirectoryDocumentLoader',
     'RecursiveTextSplitter',
+    'TikTokenTextSplitter',
     'ChromaVectorStore',
+    'QuantizedVectorStore',
+    'MappedVectorStore',
+    'ShardedVectorStore',
     'DocumentIngester',
     'RetrieverService',
+    'NearDuplicateFilter',
+    'InMemoryFile',
     'DocumentLoader',
     'TextSplitter',
     'VectorStore',
@@ -0,0 +1,214 @@
+"""
+Module for collapsing near-duplicate chunks before they are embedded.
+Uses MinHash signatures and locality-sensitive hashing over word shingles.
+"""
+
+import hashlib
+import os
+import re
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+# Estimated Jaccard similarity above which chunks are collapsed, 0 disables
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+
+# Mersenne prime of the MinHash permutations
+_PRIME = np.uint64((1 << 61) - 1)
+_WORD = re.compile(r"\w+")
+
+class NearDuplicateFilter:
+    """
+    Collapses near-duplicate chunks into one stored chunk.
+
+    Every chunk gets a MinHash signature over its word shingles. The
+    signature is split into bands, and chunks sharing a band are
+    compared by the fraction of equal signature values, which estimates
+    the Jaccard similarity of their shingles. A chunk close enough to
+    an earlier one is not embedded again: it is dropped, or, when it
+    comes from another source, kept as a copy sharing the earlier
+    chunk's embedding so filters and routing by source still see it.
+    Retrieval keeps one chunk of each group, see `collapse_copies`.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEDUP_THRESHOLD,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 3,
+        seed: int = 1
+    ):
+        """
+        Initialize the filter.
+
+        Args:
+            threshold: Estimated Jaccard similarity for collapsing two chunks
+            num_perm: Length of the MinHash signatures
+            bands: LSH bands, `num_perm` must be a multiple of it
+            shingle_size: Words per shingle
+            seed: Seed of the permutations, fixed so signatures are stable
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        # Permutations (a * x + b) mod p over 32-bit shingle hashes,
+        # small enough for the products to fit in uint64
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+
+    def shingles(self, text: str) -> List[str]:
+        """
+        Split text into overlapping word shingles.
+
+        Args:
+            text: Chunk text
+
+        Returns:
+            Lowercased shingles, the whole text for short chunks
+        """
+        words = _WORD.findall(text.lower())
+        if len(words) <= self.shingle_size:
+            return [" ".join(words)]
+        return [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text: Chunk text
+
+        Returns:
+            Array of `num_perm` unsigned integers
+        """
+        hashes = np.array(
+            [
+                int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+                for shingle in set(self.shingles(text))
+            ],
+            dtype=np.uint64
+        )
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+    def deduplicate(self, documents: List[Document]) -> Tuple[List[Document], Dict[str, Any]]:
+        """
+        Drop chunks that nearly duplicate an earlier chunk.
+
+        The first chunk of every group is kept, and `duplicates` counts
+        the chunks it replaces. When the group spans several sources,
+        the first chunk of every other source is kept too, with the id
+        of the group's first chunk in `duplicate_of`, so it can be stored
+        with that chunk's embedding. Chunks of such groups list every
+        source in their `sources` metadata.
+
+        Args:
+            documents: Chunks about to be embedded
+
+        Returns:
+            Kept chunks, in the order of their groups, and a report with
+            the number of chunks, of stored chunks and of embeddings saved
+        """
+        signatures: List[np.ndarray] = []
+        groups: List[List[Document]] = []
+        buckets: Dict[Tuple[int, bytes], List[int]] = {}
+
+        for document in documents:
+            signature = self.signature(document.page_content)
+            keys = [
+                (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)
+            ]
+            match = self._find_match(signature, keys, signatures, buckets)
+            if match is not None:
+                groups[match].append(document)
+                continue
+
+            index = len(groups)
+            signatures.append(signature)
+            groups.append([document])
+            for key in keys:
+                buckets.setdefault(key, []).append(index)
+
+        stored = [document for group in groups for document in self._merge(group)]
+        report = {
+            "chunks": len(documents),
+            "stored": len(stored),
+            "embeddings_saved": len(documents) - len(groups),
+        }
+        return stored, report
+
+    def _find_match(
+        self,
+        signature: np.ndarray,
+        keys: List[Tuple[int, bytes]],
+        signatures: List[np.ndarray],
+        buckets: Dict[Tuple[int, bytes], List[int]]
+    ) -> Optional[int]:
+        """Find the most similar kept chunk above the threshold."""
+        candidates = {index for key in keys for index in buckets.get(key, [])}
+        best, best_similarity = None, 0.0
+        for index in sorted(candidates):
+            similarity = float(np.mean(signatures[index] == signature))
+            if similarity >= self.threshold and similarity > best_similarity:
+                best, best_similarity = index, similarity
+        return best
+
+    @staticmethod
+    def _merge(group: List[Document]) -> List[Document]:
+        """Keep the first chunk of a group and of each other source in it."""
+        document = group[0]
+        if len(group) == 1:
+            return [document]
+
+        by_source: Dict[str, Document] = {}
+        for doc in group:
+            by_source.setdefault(str(doc.metadata.get("source", "unknown")), doc)
+        metadata = dict(document.metadata, duplicates=len(group) - 1)
+        if len(by_source) == 1:
+            return [Document(id=document.id, page_content=document.page_content, metadata=metadata)]
+
+        # Vector stores only keep scalar metadata
+        sources = "; ".join(by_source)
+        # The copies look the embedding up by this id
+        first_id = document.id or uuid.uuid4().hex
+        kept = [Document(id=first_id, page_content=document.page_content, metadata=dict(metadata, sources=sources))]
+        for doc in list(by_source.values())[1:]:
+            kept.append(Document(
+                id=doc.id,
+                page_content=doc.page_content,
+                metadata=dict(doc.metadata, sources=sources, duplicate_of=first_id)
+            ))
+        return kept
+
+def collapse_copies(documents: List[Document]) -> List[Document]:
+    """
+    Keep one chunk of every near-duplicate group among retrieved chunks.
+
+    Copies kept per source share the embedding of their group's first
+    chunk, so an unfiltered search finds them side by side. Only the
+    first chunk found of a group is kept, so it is graded once.
+
+    Args:
+        documents: Retrieved chunks, best first
+
+    Returns:
+        Chunks without the later ones of each group, in their order
+    """
+    seen = set()
+    kept = []
+    for document in documents:
+        group = document.metadata.get("duplicate_of") or document.id
+        if group is not None and group in seen:
+            continue
+        seen.add(group)
+        kept.append(document)
+    return kept
@@ -0,0 +1,83 @@
+"""
+Module for caching query embeddings in front of the embedding client.
+Repeated questions are embedded once per process.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Query embeddings kept per embedding client, about 6 KB each at 1536 dims
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings with an LRU cache of recent query embeddings.
+
+    Only `embed_query` is cached: questions repeat across turns and
+    users, while chunks are embedded once at ingestion. Cached vectors
+    are kept as float32 arrays.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_size: int = QUERY_CACHE_SIZE):
+        """
+        Initialize the cache.
+
+        Args:
+            embeddings: Embedding client to call on a miss
+            max_size: Number of query embeddings kept, 0 disables the cache
+        """
+        self.embeddings = embeddings
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def wrap(cls, embeddings: Embeddings, max_size: Optional[int] = None) -> "CachedEmbeddings":
+        """
+        Put a cache in front of an embedding client once.
+
+        Args:
+            embeddings: Embedding client, returned as is if already cached
+            max_size: Number of query embeddings kept, QUERY_EMBEDDING_CACHE_SIZE by default
+
+        Returns:
+            Cached embeddings
+        """
+        if isinstance(embeddings, cls):
+            return embeddings
+        return cls(embeddings, QUERY_CACHE_SIZE if max_size is None else max_size)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                self.hits += 1
+                return cached.tolist()
+            self.misses += 1
+
+        embedding = self.embeddings.embed_query(text)
+        if self.max_size > 0:
+            with self._lock:
+                self._cache[text] = np.asarray(embedding, dtype=np.float32)
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+        return embedding
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def clear(self) -> None:
+        """Forget every cached query embedding."""
+        with self._lock:
+            self._cache.clear()
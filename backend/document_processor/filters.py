@@ -0,0 +1,215 @@
+"""
+Module for metadata filters applied inside the vector search.
+Parses filter specs and keeps a secondary index from metadata values to rows.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Range operators and the comparison they stand for
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+OPERATORS = ("eq", "in") + RANGE_OPERATORS
+
+# Parsed filter of one field: allowed values, or None, and range bounds
+Condition = Tuple[Optional[List[Any]], Dict[str, float]]
+
+def _key(value: Any) -> Tuple[bool, Any]:
+    """Comparison key of a value, so True does not equal 1 as in Python."""
+    return isinstance(value, bool), value
+
+def _allowed(value: Any, values: List[Any]) -> bool:
+    return any(_key(value) == _key(allowed) for allowed in values)
+
+def parse_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Condition]:
+    """
+    Parse a metadata filter spec.
+
+    Every field must match, and a field matches:
+        "report.pdf"                  a value
+        ["a.pdf", "b.pdf"]            any of several values
+        {"gte": 3, "lte": 9}          a numeric range, with gt/gte/lt/lte
+        {"in": [...], "lt": 5}        operators combined
+
+    Typical fields are `source`, `page`, `ingested_at` (epoch seconds)
+    and `tenant`.
+
+    Args:
+        filters: Filter spec, field to condition
+
+    Returns:
+        Field to (allowed values or None, range bounds)
+
+    Raises:
+        ValueError: If a condition uses an unknown operator or an empty list
+    """
+    parsed: Dict[str, Condition] = {}
+    for field, condition in (filters or {}).items():
+        if not isinstance(condition, dict):
+            condition = {"in": list(condition)} if isinstance(condition, (list, tuple, set)) else {"eq": condition}
+        unknown = set(condition) - set(OPERATORS)
+        if unknown:
+            raise ValueError(f"Unknown filter operator(s) {sorted(unknown)} for {field!r}, use {OPERATORS}")
+        values = None
+        if "eq" in condition:
+            values = [condition["eq"]]
+        if "in" in condition:
+            values = [value for value in condition["in"] if values is None or _allowed(value, values)]
+            if not condition["in"]:
+                raise ValueError(f"Empty value list for {field!r}")
+        bounds = {op: float(condition[op]) for op in RANGE_OPERATORS if op in condition}
+        parsed[field] = (values, bounds)
+    return parsed
+
+def _in_range(value: Any, bounds: Dict[str, float]) -> bool:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return (
+        ("gt" not in bounds or value > bounds["gt"])
+        and ("gte" not in bounds or value >= bounds["gte"])
+        and ("lt" not in bounds or value < bounds["lt"])
+        and ("lte" not in bounds or value <= bounds["lte"])
+    )
+
+def matches(metadata: Dict[str, Any], filters: Optional[Dict[str, Any]]) -> bool:
+    """
+    Check metadata against a filter spec.
+
+    Args:
+        metadata: Metadata of a chunk
+        filters: Filter spec, see `parse_filters`
+
+    Returns:
+        True if every field matches
+    """
+    for field, (values, bounds) in parse_filters(filters).items():
+        value = metadata.get(field)
+        if values is not None and not _allowed(value, values):
+            return False
+        if bounds and not _in_range(value, bounds):
+            return False
+    return True
+
+def matches_nothing(filters: Optional[Dict[str, Any]]) -> bool:
+    """
+    Check whether a filter spec allows no value for some field.
+
+    Args:
+        filters: Filter spec, see `parse_filters`
+
+    Returns:
+        True if a field's `eq` is not in its `in` list
+    """
+    return any(values == [] for values, _ in parse_filters(filters).values())
+
+def to_chroma_where(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Translate a filter spec into a Chroma `where` clause.
+
+    Args:
+        filters: Filter spec, see `parse_filters`
+
+    Returns:
+        Where clause, None without filters
+
+    Raises:
+        ValueError: If the spec matches nothing, since Chroma rejects an
+            empty `$in`; check `matches_nothing` first
+    """
+    clauses = []
+    for field, (values, bounds) in parse_filters(filters).items():
+        if values == []:
+            raise ValueError(f"Filter on {field!r} matches nothing")
+        if values is not None:
+            clauses.append({field: {"$in": values}})
+        for op, bound in bounds.items():
+            clauses.append({field: {f"${op}": bound}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+class MetadataIndex:
+    """
+    Secondary index from metadata values to rows.
+
+    Every scalar metadata field gets postings (value to rows, ascending)
+    for value conditions and, when numeric, a sorted column for range
+    conditions. A filtered search then scores only the selected rows
+    instead of filtering the results of a full scan. Rows are appended
+    in storage order, and sorted columns are rebuilt lazily after
+    appends.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        self.count = 0
+        self._postings: Dict[str, Dict[Any, List[int]]] = {}
+        self._numbers: Dict[str, List[Tuple[float, int]]] = {}
+        self._sorted: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, metadatas: List[Dict[str, Any]]) -> None:
+        """
+        Index the metadata of new rows.
+
+        Args:
+            metadatas: Metadata of the rows following the indexed ones
+        """
+        with self._lock:
+            for row, metadata in enumerate(metadatas, start=self.count):
+                for field, value in metadata.items():
+                    if isinstance(value, (str, int, float, bool)):
+                        self._postings.setdefault(field, {}).setdefault(_key(value), []).append(row)
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        self._numbers.setdefault(field, []).append((float(value), row))
+                        self._sorted.pop(field, None)
+            self.count += len(metadatas)
+
+    def _range_rows(self, field: str, bounds: Dict[str, float]) -> np.ndarray:
+        """Rows of a field within bounds, by binary search on the sorted column."""
+        with self._lock:
+            if field not in self._sorted:
+                pairs = np.asarray(self._numbers.get(field, []), dtype=np.float64).reshape(-1, 2)
+                order = np.argsort(pairs[:, 0], kind="stable")
+                self._sorted[field] = (pairs[order, 0], pairs[order, 1].astype(np.int64))
+            values, rows = self._sorted[field]
+        start, end = 0, len(values)
+        if "gte" in bounds:
+            start = max(start, int(np.searchsorted(values, bounds["gte"], side="left")))
+        if "gt" in bounds:
+            start = max(start, int(np.searchsorted(values, bounds["gt"], side="right")))
+        if "lte" in bounds:
+            end = min(end, int(np.searchsorted(values, bounds["lte"], side="right")))
+        if "lt" in bounds:
+            end = min(end, int(np.searchsorted(values, bounds["lt"], side="left")))
+        return np.sort(rows[start:end]) if start < end else np.empty(0, dtype=np.int64)
+
+    def select(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Find the rows matching a filter spec.
+
+        Args:
+            filters: Filter spec, see `parse_filters`
+
+        Returns:
+            Matching rows in ascending order, None without filters
+        """
+        parsed = parse_filters(filters)
+        if not parsed:
+            return None
+        selected: Optional[np.ndarray] = None
+        for field, (values, bounds) in parsed.items():
+            if values is not None:
+                # Copy the postings, add() appends to them
+                with self._lock:
+                    postings = self._postings.get(field, {})
+                    arrays = [np.asarray(postings.get(_key(value), []), dtype=np.int64) for value in values]
+                rows = np.unique(np.concatenate(arrays or [np.empty(0, dtype=np.int64)]))
+                selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+            if bounds:
+                rows = self._range_rows(field, bounds)
+                selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+            if not len(selected):
+                break
+        return selected
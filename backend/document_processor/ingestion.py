@@ -4,25 +4,33 @@ Handles loading, splitting and storing documents from various sources.
 """
 
 from dotenv import load_dotenv
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain_community.document_loaders import (
-    WebBaseLoader,
-    PyPDFLoader,
-    TextLoader,
-    DirectoryLoader
-)
-from langchain_openai import OpenAIEmbeddings
-from typing import List, Any, Union
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.embeddings import Embeddings
+from typing import BinaryIO, Dict, Iterator, List, Any, Optional, Tuple, Union
 import os
+import time
+import uuid
+import zipfile
+from xml.etree import ElementTree
+import numpy as np
 from langchain_core.documents import Document
+from .dedup import NearDuplicateFilter
+from .embeddings import CachedEmbeddings
+from .filters import matches_nothing, to_chroma_where
 from .interfaces import DocumentLoader, TextSplitter, VectorStore
-import docx
-import psutil
+from .pdf import PDF_CACHE_DIR, PDF_WORKERS, PDFPageCache, iter_pdf_pages
+from .sources import FileSource, source_exists, source_name
 import shutil
 
 load_dotenv()
 
+# Tags of the WordprocessingML elements read from word/document.xml
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_BODY, _DOCX_PARAGRAPH, _DOCX_TEXT = f"{_W}body", f"{_W}p", f"{_W}t"
+_DOCX_TABLE, _DOCX_ROW, _DOCX_CELL = f"{_W}tbl", f"{_W}tr", f"{_W}tc"
+_DOCX_TAB, _DOCX_TAB_STOPS = f"{_W}tab", f"{_W}tabs"
+_DOCX_BREAKS = (f"{_W}br", f"{_W}cr")
+
 class WebLoader(DocumentLoader):
     """Loads documents from web URLs."""
     
@@ -37,49 +45,88 @@ class WebLoader(DocumentLoader):
 
     def load(self) -> List[Document]:
         """Load documents from URLs."""
+        from langchain_community.document_loaders import WebBaseLoader
+
         docs = [WebBaseLoader(url).load() for url in self.urls]
         return [item for sublist in docs for item in sublist]
 
 class PDFLoader(DocumentLoader):
-    """Loads documents from PDF files."""
+    """
+    Loads documents from PDF files, one document per page.
+
+    Pages are parsed in worker processes and their text is cached on
+    disk by file hash, so re-ingesting an unchanged PDF only hashes it.
+    """
     
-    def __init__(self, pdf_files: List[str]):
+    def __init__(
+        self,
+        pdf_files: List[FileSource],
+        max_workers: int = PDF_WORKERS,
+        cache_directory: Optional[str] = PDF_CACHE_DIR
+    ):
         """
         Initialize PDF loader.
         
         Args:
-            pdf_files: List of PDF file paths
+            pdf_files: List of PDF file paths or uploaded files
+            max_workers: Worker processes parsing pages, 1 to parse inline
+            cache_directory: Directory caching page text, None to always parse
         """
         self.pdf_files = pdf_files
+        self.max_workers = max_workers
+        self.cache = PDFPageCache(cache_directory) if cache_directory else None
+
+    def lazy_load(self) -> Iterator[Document]:
+        """
+        Stream page documents as pages are extracted.
+
+        Yields:
+            Page documents, in completion order within each file
+        """
+        for pdf in self.pdf_files:
+            if source_exists(pdf):
+                for page, text, layout in iter_pdf_pages(pdf, self.cache, self.max_workers):
+                    yield Document(
+                        page_content=text,
+                        metadata={
+                            "source": source_name(pdf),
+                            "total_pages": layout["total_pages"],
+                            "page": page,
+                            "page_label": layout["page_labels"][page]
+                        }
+                    )
 
     def load(self) -> List[Document]:
         """Load documents from PDF files."""
-        docs = []
-        for pdf in self.pdf_files:
-            if os.path.exists(pdf):
-                loader = PyPDFLoader(pdf)
-                docs.extend(loader.load())
-        return docs
+        order = {source_name(pdf): index for index, pdf in enumerate(self.pdf_files)}
+        return sorted(self.lazy_load(), key=lambda doc: (order[doc.metadata["source"]], doc.metadata["page"]))
 
 class FileLoader(DocumentLoader):
     """Loads documents from text files."""
     
-    def __init__(self, text_files: List[str]):
+    def __init__(self, text_files: List[FileSource]):
         """
         Initialize text file loader.
         
         Args:
-            text_files: List of text file paths
+            text_files: List of text file paths or uploaded files
         """
         self.text_files = text_files
 
     def load(self) -> List[Document]:
         """Load documents from text files."""
+        from langchain_community.document_loaders import TextLoader
+
         docs = []
         for text_file in self.text_files:
-            if os.path.exists(text_file):
-                loader = TextLoader(text_file)
-                docs.extend(loader.load())
+            if isinstance(text_file, str):
+                if os.path.exists(text_file):
+                    docs.extend(TextLoader(text_file).load())
+            else:
+                docs.append(Document(
+                    page_content=text_file.read_bytes().decode("utf-8"),
+                    metadata={"source": text_file.name}
+                ))
         return docs
 
 class DirectoryDocumentLoader(DocumentLoader):
@@ -98,6 +145,8 @@ class DirectoryDocumentLoader(DocumentLoader):
 
     def load(self) -> List[Document]:
         """Load all documents from directory."""
+        from langchain_community.document_loaders import DirectoryLoader
+
         loader = DirectoryLoader(
             self.directory_path,
             glob=self.glob_pattern,
@@ -106,27 +155,104 @@ class DirectoryDocumentLoader(DocumentLoader):
         return loader.load()
 
 class DocxLoader(DocumentLoader):
-    """Loads documents from DOCX files."""
+    """
+    Loads documents from DOCX files.
+
+    `word/document.xml` is streamed from the archive with an incremental
+    parser instead of building a python-docx object model. Elements are
+    released once their text is taken, so memory stays bounded by the
+    largest paragraph or table row.
+    """
     
-    def __init__(self, docx_files: List[str]):
+    def __init__(self, docx_files: List[FileSource]):
         """
         Initialize DOCX loader.
         
         Args:
-            docx_files: List of DOCX file paths
+            docx_files: List of DOCX file paths or uploaded files
         """
         self.docx_files = docx_files
 
+    @staticmethod
+    def iter_blocks(file_path: Union[str, BinaryIO]) -> Iterator[str]:
+        """
+        Stream the text of a DOCX file in document order.
+
+        Args:
+            file_path: Path of the DOCX file, or a seekable binary stream
+
+        Yields:
+            Text of each paragraph, and of each table row with its
+            cells separated by ' | '
+        """
+        paragraphs: List[List[str]] = []  # Text of the open paragraphs
+        cells: List[List[str]] = []  # Paragraphs of the open table cells
+        rows: List[List[str]] = []  # Cells of the open table rows
+        tables: List[Any] = []
+        body = None
+        depth = tab_stops = 0
+
+        with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as stream:
+            for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+                tag = element.tag
+                if event == "start":
+                    depth += 1
+                    if tag == _DOCX_PARAGRAPH:
+                        paragraphs.append([])
+                    elif tag == _DOCX_CELL:
+                        cells.append([])
+                    elif tag == _DOCX_ROW:
+                        rows.append([])
+                    elif tag == _DOCX_TABLE:
+                        tables.append(element)
+                    elif tag == _DOCX_TAB_STOPS:
+                        tab_stops += 1
+                    elif tag == _DOCX_BODY:
+                        body = element
+                    continue
+
+                depth -= 1
+                block = None
+                if tag == _DOCX_TEXT and paragraphs:
+                    paragraphs[-1].append(element.text or "")
+                elif tag == _DOCX_TAB and paragraphs and not tab_stops:
+                    paragraphs[-1].append("\t")
+                elif tag in _DOCX_BREAKS and paragraphs:
+                    paragraphs[-1].append("\n")
+                elif tag == _DOCX_TAB_STOPS:
+                    tab_stops -= 1
+                elif tag == _DOCX_PARAGRAPH:
+                    block = "".join(paragraphs.pop())
+                elif tag == _DOCX_CELL:
+                    rows[-1].append(" ".join(text for text in cells.pop() if text))
+                elif tag == _DOCX_ROW:
+                    block = " | ".join(rows.pop())
+                    # Release the rows read so far, a table can be the whole document
+                    tables[-1].clear()
+                elif tag == _DOCX_TABLE:
+                    tables.pop()
+
+                if block is not None:
+                    # Nested content belongs to the enclosing table cell
+                    if cells:
+                        cells[-1].append(block)
+                    else:
+                        yield block
+                element.clear()
+                if depth == 2 and body is not None:
+                    # A top-level block ended, release it
+                    body.clear()
+
     def load(self) -> List[Document]:
         """Load documents from DOCX files."""
         docs = []
         for file_path in self.docx_files:
-            if os.path.exists(file_path):
-                doc = docx.Document(file_path)
-                text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+            if source_exists(file_path):
+                with (open(file_path, "rb") if isinstance(file_path, str) else file_path.open()) as f:
+                    text = "\n".join(self.iter_blocks(f))
                 docs.append(Document(
                     page_content=text,
-                    metadata={"source": file_path}
+                    metadata={"source": source_name(file_path)}
                 ))
         return docs
 
@@ -152,11 +278,163 @@ class RecursiveTextSplitter(TextSplitter):
         """Split documents into chunks."""
         return self.splitter.split_documents(documents)
 
+class TikTokenTextSplitter(TextSplitter):
+    """
+    Splits documents into chunks measured in model tokens.
+
+    Each document is encoded once. Chunk boundaries are then chosen on
+    token offsets, preferring the last separator in the second half of
+    the window, and chunk text is sliced from the original text.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 250,
+        chunk_overlap: int = 25,
+        encoding_name: str = "cl100k_base",
+        separators: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
+        encoding: Optional[Any] = None
+    ):
+        """
+        Initialize text splitter.
+
+        Args:
+            chunk_size: Maximum tokens per chunk
+            chunk_overlap: Tokens shared by consecutive chunks
+            encoding_name: Name of the tiktoken encoding
+            separators: Preferred cut points, most preferred first
+            max_workers: Threads encoding documents in parallel, CPU count by default
+            encoding: Encoding to use instead of loading `encoding_name`
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.encoding_name = encoding_name
+        self.separators = [
+            separator.encode("utf-8")
+            for separator in (separators or ["\n\n", "\n", ". ", "? ", "! ", "; ", ", ", " "])
+        ]
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._encoding = encoding
+        self._token_lengths: Optional[np.ndarray] = None
+
+    def _get_encoding(self) -> Any:
+        """Load the encoding and the byte length of every token on first use."""
+        if self._encoding is None:
+            import tiktoken
+
+            self._encoding = tiktoken.get_encoding(self.encoding_name)
+        if self._token_lengths is None:
+            lengths = np.zeros(self._encoding.n_vocab, dtype=np.int64)
+            for token in range(self._encoding.n_vocab):
+                try:
+                    lengths[token] = len(self._encoding.decode_single_token_bytes(token))
+                except KeyError:
+                    # Unused ids between the regular and the special tokens
+                    pass
+            self._token_lengths = lengths
+        return self._encoding
+
+    @staticmethod
+    def _char_boundary(data: bytes, position: int) -> int:
+        """Move a byte position back to the start of its UTF-8 character."""
+        while 0 < position < len(data) and data[position] & 0xC0 == 0x80:
+            position -= 1
+        return position
+
+    def _find_cut(self, data: bytes, offsets: np.ndarray, start: int, end: int) -> int:
+        """
+        Choose the token at which a chunk ends.
+
+        Args:
+            data: UTF-8 bytes of the document
+            offsets: Byte offset of every token boundary
+            start: First token of the chunk
+            end: Token limit of the chunk
+
+        Returns:
+            Token index ending the chunk, after `start`
+        """
+        if end == len(offsets) - 1:
+            return end
+        low = int(offsets[start + (end - start) // 2])
+        high = int(offsets[end])
+        for separator in self.separators:
+            position = data.rfind(separator, low, high)
+            if position != -1:
+                # Last token boundary at or before the end of the separator
+                cut = int(np.searchsorted(offsets, position + len(separator), side="right")) - 1
+                if cut > start:
+                    return cut
+        return end
+
+    def split_text(self, text: str, tokens: Optional[List[int]] = None) -> List[str]:
+        """
+        Split one text into chunks.
+
+        Args:
+            text: Text to split
+            tokens: Tokens of the text, encoded here if not given
+
+        Returns:
+            Non-empty chunks in document order
+        """
+        encoding = self._get_encoding()
+        if tokens is None:
+            tokens = encoding.encode_ordinary(text)
+        data = text.encode("utf-8")
+        offsets = np.zeros(len(tokens) + 1, dtype=np.int64)
+        np.cumsum(self._token_lengths[np.asarray(tokens, dtype=np.int64)], out=offsets[1:])
+
+        chunks = []
+        start = 0
+        while start < len(tokens):
+            cut = self._find_cut(data, offsets, start, min(start + self.chunk_size, len(tokens)))
+            begin = self._char_boundary(data, int(offsets[start]))
+            finish = self._char_boundary(data, int(offsets[cut]))
+            chunk = data[begin:finish].decode("utf-8").strip()
+            if chunk:
+                chunks.append(chunk)
+            if cut == len(tokens):
+                break
+            start = max(cut - self.chunk_overlap, start + 1)
+        return chunks
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        """
+        Split documents into chunks.
+
+        Documents are encoded in parallel by tiktoken, which releases the
+        GIL while encoding.
+        """
+        encoding = self._get_encoding()
+        texts = [document.page_content for document in documents]
+        batch = encoding.encode_ordinary_batch(texts, num_threads=self.max_workers)
+        return [
+            Document(page_content=chunk, metadata=dict(document.metadata))
+            for document, tokens in zip(documents, batch)
+            for chunk in self.split_text(document.page_content, tokens)
+        ]
+
 class ChromaVectorStore(VectorStore):
-    def __init__(self, collection_name: str = "rag-chroma", persist_directory: str = "./.chroma"):
+    # Cosine distance, so relevance scores are cosine similarities
+    COLLECTION_METADATA = {"hnsw:space": "cosine"}
+
+    def __init__(
+        self,
+        collection_name: str = "rag-chroma",
+        persist_directory: str = "./.chroma",
+        embedding_function: Optional[Embeddings] = None
+    ):
+        if embedding_function is None:
+            from langchain_openai import OpenAIEmbeddings
+            embedding_function = OpenAIEmbeddings()
+
         self.collection_name = collection_name
         self.persist_directory = persist_directory
-        self.embedding_function = OpenAIEmbeddings()
+        self.embedding_function = CachedEmbeddings.wrap(embedding_function)
         self.vectorstore = None
         self._client = None
 
@@ -173,6 +451,8 @@ class ChromaVectorStore(VectorStore):
         return self._client
 
     def store_documents(self, documents: List[Document]) -> Any:
+        from langchain_chroma import Chroma
+
         client = self._get_client()
 
         # Create and return the vectorstore
@@ -181,21 +461,155 @@ class ChromaVectorStore(VectorStore):
             collection_name=self.collection_name,
             embedding=self.embedding_function,
             persist_directory=self.persist_directory,
-            client=client
+            client=client,
+            collection_metadata=self.COLLECTION_METADATA
         )
         return self.vectorstore
 
-    def get_retriever(self) -> Any:
+    def _get_vectorstore(self) -> Any:
+        """Open the existing collection if nothing was stored yet"""
         if not self.vectorstore:
+            from langchain_chroma import Chroma
+
             client = self._get_client()
 
             self.vectorstore = Chroma(
                 collection_name=self.collection_name,
                 persist_directory=self.persist_directory,
                 embedding_function=self.embedding_function,
-                client=client
+                client=client,
+                collection_metadata=self.COLLECTION_METADATA
             )
-        return self.vectorstore.as_retriever()
+        return self.vectorstore
+
+    def store_embeddings(self, documents: List[Document], embeddings: Any) -> Any:
+        """
+        Add documents whose embeddings are already known, without calling
+        the embedding function.
+
+        Args:
+            documents: Chunks to store, existing ids are overwritten
+            embeddings: One embedding per chunk
+
+        Returns:
+            The LangChain vector store
+        """
+        vectorstore = self._get_vectorstore()
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        batch_size = self._get_client().get_max_batch_size()
+        for start in range(0, len(documents), batch_size):
+            batch = documents[start:start + batch_size]
+            vectorstore._collection.upsert(
+                ids=[doc.id or uuid.uuid4().hex for doc in batch],
+                embeddings=embeddings[start:start + batch_size],
+                documents=[doc.page_content for doc in batch],
+                # Chroma rejects empty metadata dicts
+                metadatas=[doc.metadata or None for doc in batch]
+            )
+        return vectorstore
+
+    def iter_records(self, batch_size: int = 1024) -> Iterator[Tuple[List[Document], np.ndarray]]:
+        """
+        Read every stored chunk with its embedding.
+
+        Args:
+            batch_size: Chunks per batch
+
+        Yields:
+            Chunks and an array of their embeddings
+        """
+        collection = self._get_vectorstore()._collection
+        for offset in range(0, collection.count(), batch_size):
+            result = collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=["documents", "metadatas", "embeddings"]
+            )
+            documents = [
+                Document(id=chunk_id, page_content=content, metadata=metadata or {})
+                for chunk_id, content, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+            ]
+            yield documents, np.asarray(result["embeddings"], dtype=np.float32)
+
+    def get_retriever(self) -> Any:
+        return self._get_vectorstore().as_retriever()
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a question with the store's embedding function.
+
+        Args:
+            query: Question to embed
+
+        Returns:
+            Query embedding
+        """
+        return self.embedding_function.embed_query(query)
+
+    def search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """
+        Find the chunks closest to an embedding.
+
+        Args:
+            embedding: Query embedding
+            k: Number of chunks to return
+            filters: Metadata filter spec, see `filters.parse_filters`;
+                Chroma applies it with its metadata index before the search
+
+        Returns:
+            Closest chunks, with their ids and `metadata['score']` set
+        """
+        if matches_nothing(filters):
+            return []
+        vectorstore = self._get_vectorstore()
+        # Chroma returns distances here, convert them to relevance scores
+        relevance = vectorstore._select_relevance_score_fn()
+        results = vectorstore.similarity_search_by_vector_with_relevance_scores(
+            embedding,
+            k=k,
+            filter=to_chroma_where(filters)
+        )
+        documents = []
+        for document, distance in results:
+            document.metadata["score"] = relevance(distance)
+            documents.append(document)
+        return documents
+
+    def get_documents(self, ids: List[str]) -> List[Document]:
+        """
+        Fetch stored chunks by id.
+
+        Args:
+            ids: Ids of the chunks
+
+        Returns:
+            Chunks that exist, in the order of `ids`
+        """
+        result = self._get_vectorstore().get(ids=ids, include=["documents", "metadatas"])
+        by_id = {
+            chunk_id: Document(id=chunk_id, page_content=content, metadata=metadata or {})
+            for chunk_id, content, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+        }
+        return [by_id[chunk_id] for chunk_id in ids if chunk_id in by_id]
+
+    def get_embeddings(self, ids: List[str]) -> np.ndarray:
+        """
+        Fetch the stored embeddings of chunks.
+
+        Args:
+            ids: Ids of the chunks
+
+        Returns:
+            Array of shape (len(ids), dim) in the order of `ids`
+        """
+        result = self._get_vectorstore().get(ids=ids, include=["embeddings"])
+        by_id = dict(zip(result["ids"], result["embeddings"]))
+        return np.asarray([by_id[chunk_id] for chunk_id in ids], dtype=np.float32)
 
     def cleanup(self):
         """Clean up vector store directory"""
@@ -211,6 +625,8 @@ class ChromaVectorStore(VectorStore):
 
             # Finally remove the directory
             if os.path.exists(self.persist_directory):
+                import psutil
+
                 # Get current process
                 current_process = psutil.Process()
                 
@@ -234,7 +650,8 @@ class DocumentIngester:
     def __init__(
         self,
         text_splitter: TextSplitter,
-        vector_store: VectorStore
+        vector_store: VectorStore,
+        deduplicator: Optional[NearDuplicateFilter] = None
     ):
         """
         Initialize document ingester.
@@ -242,23 +659,52 @@ class DocumentIngester:
         Args:
             text_splitter: Splitter for chunking documents
             vector_store: Store for document vectors
+            deduplicator: Filter collapsing near-duplicate chunks, None to store all chunks
         """
         self.text_splitter = text_splitter
         self.vector_store = vector_store
+        self.deduplicator = deduplicator
+        # Chunk counts of the last ingestion
+        self.last_report: Dict[str, Any] = {}
 
-    def process_documents(self, document_loader: DocumentLoader) -> Any:
+    def process_documents(
+        self,
+        document_loader: DocumentLoader,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Any:
         """
         Process and store documents.
+
+        Every chunk is stamped with `ingested_at` (epoch seconds), so
+        retrieval can be filtered by ingestion date.
         
         Args:
             document_loader: Loader for documents
+            metadata: Extra metadata of every chunk, e.g. {"tenant": "acme"}
             
         Returns:
             Stored documents in vector store
         """
         documents = document_loader.load()
+        stamp = {"ingested_at": int(time.time()), **(metadata or {})}
+        for document in documents:
+            document.metadata.update(stamp)
         split_docs = self.text_splitter.split_documents(documents)
-        return self.vector_store.store_documents(split_docs)
+        if self.deduplicator:
+            split_docs, self.last_report = self.deduplicator.deduplicate(split_docs)
+            print(f"---COLLAPSED NEAR-DUPLICATE CHUNKS: {self.last_report['embeddings_saved']} "
+                  f"OF {self.last_report['chunks']} EMBEDDINGS SAVED---")
+        else:
+            self.last_report = {"chunks": len(split_docs), "stored": len(split_docs), "embeddings_saved": 0}
+
+        copies = [doc for doc in split_docs if "duplicate_of" in doc.metadata]
+        stored = self.vector_store.store_documents([doc for doc in split_docs if "duplicate_of" not in doc.metadata])
+        if copies:
+            # Copies from other sources reuse the embedding of the chunk they duplicate
+            first_ids = list(dict.fromkeys(doc.metadata["duplicate_of"] for doc in copies))
+            rows = dict(zip(first_ids, self.vector_store.get_embeddings(first_ids)))
+            self.vector_store.store_embeddings(copies, [rows[doc.metadata["duplicate_of"]] for doc in copies])
+        return stored
 
 class CombinedLoader(DocumentLoader):
     """Combines multiple document loaders into one."""
@@ -279,12 +725,12 @@ class CombinedLoader(DocumentLoader):
             documents.extend(loader.load())
         return documents
 
-def get_document_loader(file_paths: List[str]) -> DocumentLoader:
+def get_document_loader(file_paths: List[FileSource]) -> DocumentLoader:
     """
     Get appropriate loader(s) for file types.
     
     Args:
-        file_paths: List of file paths
+        file_paths: List of file paths or uploaded files
         
     Returns:
         Document loader that can handle all provided files
@@ -293,9 +739,9 @@ def get_document_loader(file_paths: List[str]) -> DocumentLoader:
         raise ValueError("No files provided")
 
     # Group files by extension
-    pdf_files = [f for f in file_paths if f.lower().endswith('.pdf')]
-    docx_files = [f for f in file_paths if f.lower().endswith('.docx')]
-    txt_files = [f for f in file_paths if f.lower().endswith('.txt')]
+    pdf_files = [f for f in file_paths if source_name(f).lower().endswith('.pdf')]
+    docx_files = [f for f in file_paths if source_name(f).lower().endswith('.docx')]
+    txt_files = [f for f in file_paths if source_name(f).lower().endswith('.txt')]
     
     # Create loaders for each file type
     loaders = []
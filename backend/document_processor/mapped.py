@@ -0,0 +1,502 @@
+"""
+Module for a memory-mapped vector index shared by worker processes.
+Each ingestion writes an immutable generation that readers map read-only.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from .embeddings import CachedEmbeddings
+from .filters import MetadataIndex
+from .interfaces import VectorStore
+from .quantized import RESCORE_FACTORS, normalize, quantize, search_codes
+from .retriever import VectorSearchRetriever
+
+CURRENT_FILE = "CURRENT"
+
+def _id_hashes(ids: List[str]) -> np.ndarray:
+    """Hash chunk ids to 64-bit keys of the id index."""
+    return np.asarray([
+        int.from_bytes(hashlib.blake2b(chunk_id.encode("utf-8"), digest_size=8).digest(), "little")
+        for chunk_id in ids
+    ], dtype=np.uint64)
+
+class IndexGeneration:
+    """
+    Read-only view of one index generation.
+
+    Every array is a read-only memory map, so all processes mapping the
+    same generation share one copy in the page cache and nothing is
+    parsed until a chunk is returned.
+
+    Files of a generation:
+        meta.json: dimension, row count and code type
+        vectors.f32: normalized float32 vectors
+        codes.bin, scales.f32: int8 or binary codes for candidate search
+        records.bin: JSON records (id, text, metadata) back to back
+        offsets.u64: byte offset of every record, plus the end offset
+        id_hashes.u64, id_rows.u64: id hashes sorted with their rows
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a generation.
+
+        Args:
+            path: Directory of the generation
+        """
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.dim: int = meta["dim"]
+        self.count: int = meta["count"]
+        self.quantization: Optional[str] = meta["quantization"]
+
+        self.vectors = self._map("vectors.f32", np.float32, (self.count, self.dim))
+        self.offsets = self._map("offsets.u64", np.uint64, (self.count + 1,))
+        self.id_hashes = self._map("id_hashes.u64", np.uint64, (self.count,))
+        self.id_rows = self._map("id_rows.u64", np.uint64, (self.count,))
+        self.codes = self.scales = None
+        if self.quantization == "int8":
+            self.codes = self._map("codes.bin", np.int8, (self.count, self.dim))
+            self.scales = self._map("scales.f32", np.float32, (self.count,))
+        elif self.quantization == "binary":
+            self.codes = self._map("codes.bin", np.uint8, (self.count, (self.dim + 7) // 8))
+        self.records = b""
+        if self.count:
+            with open(os.path.join(path, "records.bin"), "rb") as f:
+                self.records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._metadata_index: Optional[MetadataIndex] = None
+        self._index_lock = threading.Lock()
+
+    def _map(self, name: str, dtype: Any, shape: Tuple[int, ...]) -> np.ndarray:
+        if not shape[0]:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode="r", shape=shape)
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """
+        Decode the record of a row.
+
+        Args:
+            row: Row of the chunk
+
+        Returns:
+            Dict with id, page_content and metadata
+        """
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self.records[start:end])
+
+    def metadata_index(self) -> MetadataIndex:
+        """
+        Get the metadata index of the generation.
+
+        Built on the first filtered search, which decodes every record
+        once; generations are immutable, so it never needs updating.
+
+        Returns:
+            Metadata index over the rows
+        """
+        with self._index_lock:
+            if self._metadata_index is None:
+                index = MetadataIndex()
+                index.add([self.record(row)["metadata"] for row in range(self.count)])
+                self._metadata_index = index
+            return self._metadata_index
+
+    def rows(self, ids: List[str]) -> List[int]:
+        """
+        Find the rows of chunk ids.
+
+        Args:
+            ids: Ids of the chunks
+
+        Returns:
+            Row of each id
+
+        Raises:
+            KeyError: If an id is not in the generation
+        """
+        hashes = _id_hashes(ids)
+        positions = np.searchsorted(self.id_hashes, hashes)
+        rows = []
+        for chunk_id, key, position in zip(ids, hashes, positions):
+            # Hashes may collide, so check the ids of every matching row
+            while position < self.count and self.id_hashes[position] == key:
+                row = int(self.id_rows[position])
+                if self.record(row)["id"] == chunk_id:
+                    rows.append(row)
+                    break
+                position += 1
+            else:
+                raise KeyError(chunk_id)
+        return rows
+
+class MappedVectorStore(VectorStore):
+    """
+    Vector store reading a memory-mapped index shared across processes.
+
+    Ingestion writes a complete new generation next to the current one
+    and then replaces the `CURRENT` pointer file atomically. Readers check
+    the pointer at most every `refresh_interval` seconds and switch to the
+    new generation; searches already running keep the generation they
+    started with. One process should ingest at a time.
+
+    Every ingestion copies the whole previous generation, so its cost
+    grows with the corpus: ingest files in large batches rather than
+    one by one.
+    """
+
+    def __init__(
+        self,
+        index_directory: str = "./.index",
+        embedding_function: Optional[Embeddings] = None,
+        quantization: Optional[str] = "int8",
+        rescore_factor: Optional[int] = None,
+        refresh_interval: float = 1.0,
+        keep_generations: int = 2
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            index_directory: Directory holding the generations
+            embedding_function: Embeddings for documents and queries
+            quantization: Codes for candidate search, None for exact search
+            rescore_factor: Candidates rescored per requested result
+            refresh_interval: Seconds between checks for a new generation
+            keep_generations: Generations kept on disk after ingestion
+        """
+        if embedding_function is None:
+            from langchain_openai import OpenAIEmbeddings
+            embedding_function = OpenAIEmbeddings()
+
+        self.index_directory = index_directory
+        self.embedding_function = CachedEmbeddings.wrap(embedding_function)
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor or RESCORE_FACTORS.get(quantization, 1)
+        self.refresh_interval = refresh_interval
+        self.keep_generations = keep_generations
+        self._generation: Optional[IndexGeneration] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def _current_name(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.index_directory, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def refresh(self) -> Optional[IndexGeneration]:
+        """
+        Switch to the current generation if it changed.
+
+        Returns:
+            Current generation, None if nothing was ingested yet
+        """
+        with self._lock:
+            self._checked = time.monotonic()
+            name = self._current_name()
+            if name and (self._generation is None or self._generation.name != name):
+                self._generation = IndexGeneration(os.path.join(self.index_directory, name))
+            return self._generation
+
+    def get_generation(self) -> Optional[IndexGeneration]:
+        """
+        Get the generation to serve from, checking for a newer one periodically.
+
+        Returns:
+            Current generation, None if nothing was ingested yet
+        """
+        if self._generation is None or time.monotonic() - self._checked >= self.refresh_interval:
+            return self.refresh()
+        return self._generation
+
+    def _write_generation(
+        self,
+        previous: Optional[IndexGeneration],
+        vectors: np.ndarray,
+        records: List[Dict[str, Any]]
+    ) -> str:
+        """
+        Write a generation holding the previous rows plus new ones.
+
+        Args:
+            previous: Generation to extend, None for the first one
+            vectors: Normalized vectors of the new rows
+            records: Records of the new rows
+
+        Returns:
+            Name of the new generation
+        """
+        number = 1 + max(
+            [
+                int(name.split("-")[1]) for name in os.listdir(self.index_directory)
+                if name.startswith("gen-") and not name.endswith(".tmp")
+            ],
+            default=0
+        )
+        name = f"gen-{number:06d}"
+        tmp = os.path.join(self.index_directory, f"{name}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        def write(file_name: str, new: Any, extend: bool = True) -> None:
+            # Stream the rows of the previous generation, then append the new ones
+            with open(os.path.join(tmp, file_name), "wb") as f:
+                if extend and previous:
+                    with open(os.path.join(previous.path, file_name), "rb") as old:
+                        shutil.copyfileobj(old, f, 1 << 20)
+                f.write(new.tobytes() if isinstance(new, np.ndarray) else new)
+                f.flush()
+                os.fsync(f.fileno())
+
+        count = previous.count if previous else 0
+        encoded = [json.dumps(record).encode("utf-8") for record in records]
+        lengths = np.asarray([len(record) for record in encoded], dtype=np.uint64)
+        base = previous.offsets[-1] if previous else np.uint64(0)
+        offsets = base + np.cumsum(lengths, dtype=np.uint64)
+        if not previous:
+            offsets = np.concatenate([np.zeros(1, dtype=np.uint64), offsets])
+
+        write("vectors.f32", vectors.astype(np.float32))
+        write("records.bin", b"".join(encoded))
+        write("offsets.u64", offsets)
+        if self.quantization:
+            codes, scales = quantize(vectors, self.quantization)
+            write("codes.bin", codes)
+            if scales is not None:
+                write("scales.f32", scales)
+
+        hashes = np.concatenate([
+            np.asarray(previous.id_hashes) if previous else np.empty(0, dtype=np.uint64),
+            _id_hashes([record["id"] for record in records])
+        ])
+        rows = np.concatenate([
+            np.asarray(previous.id_rows) if previous else np.empty(0, dtype=np.uint64),
+            np.arange(count, count + len(records), dtype=np.uint64)
+        ])
+        order = np.argsort(hashes, kind="stable")
+        write("id_hashes.u64", hashes[order], extend=False)
+        write("id_rows.u64", rows[order], extend=False)
+        write("meta.json", json.dumps({
+            "dim": vectors.shape[1],
+            "count": count + len(records),
+            "quantization": self.quantization
+        }).encode("utf-8"), extend=False)
+
+        os.replace(tmp, os.path.join(self.index_directory, name))
+        pointer = os.path.join(self.index_directory, f"{CURRENT_FILE}.tmp")
+        with open(pointer, "w") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer, os.path.join(self.index_directory, CURRENT_FILE))
+        return name
+
+    def _remove_old_generations(self) -> None:
+        """Delete generations beyond `keep_generations`; open maps stay valid on POSIX."""
+        names = sorted(
+            name for name in os.listdir(self.index_directory)
+            if name.startswith("gen-") and not name.endswith(".tmp")
+        )
+        for name in names[:-self.keep_generations]:
+            shutil.rmtree(os.path.join(self.index_directory, name), ignore_errors=True)
+
+    def store_documents(self, documents: List[Document]) -> Any:
+        """
+        Embed documents and publish a new generation containing them.
+
+        Args:
+            documents: Chunks to store
+
+        Returns:
+            The store itself
+        """
+        if not documents:
+            return self
+        return self.store_embeddings(
+            documents,
+            self.embedding_function.embed_documents([doc.page_content for doc in documents])
+        )
+
+    def store_embeddings(self, documents: List[Document], embeddings: Any) -> Any:
+        """
+        Publish a new generation with documents whose embeddings are already known.
+
+        The new generation is written in full, previous rows included.
+
+        Args:
+            documents: Chunks to store
+            embeddings: One embedding per chunk
+
+        Returns:
+            The store itself
+        """
+        if not documents:
+            return self
+        vectors = normalize(np.asarray(embeddings, dtype=np.float32))
+        records = [
+            {"id": doc.id or uuid.uuid4().hex, "page_content": doc.page_content, "metadata": doc.metadata}
+            for doc in documents
+        ]
+        os.makedirs(self.index_directory, exist_ok=True)
+        previous = self.refresh()
+        if previous and previous.dim != vectors.shape[1]:
+            raise ValueError(f"Expected {previous.dim}-dim embeddings, got {vectors.shape[1]}")
+        if previous and previous.quantization != self.quantization:
+            raise ValueError(f"Index at {self.index_directory} uses {previous.quantization} codes")
+
+        self._write_generation(previous, vectors, records)
+        self.refresh()
+        self._remove_old_generations()
+        return self
+
+    def get_retriever(self) -> Any:
+        return VectorSearchRetriever(vector_store=self)
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a question with the store's embedding function.
+
+        Args:
+            query: Question to embed
+
+        Returns:
+            Query embedding
+        """
+        return self.embedding_function.embed_query(query)
+
+    def search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """
+        Find the chunks closest to an embedding.
+
+        Args:
+            embedding: Query embedding
+            k: Number of chunks to return
+            filters: Metadata filter spec, see `filters.parse_filters`
+
+        Returns:
+            Closest chunks, with their ids and `metadata['score']` set
+        """
+        generation = self.get_generation()
+        if generation is None or not generation.count:
+            return []
+        subset = generation.metadata_index().select(filters) if filters else None
+        query = normalize(np.asarray(embedding, dtype=np.float32))
+        if generation.codes is not None:
+            rows, scores = search_codes(
+                query,
+                generation.codes,
+                generation.scales,
+                generation.vectors,
+                generation.quantization,
+                k,
+                self.rescore_factor,
+                subset
+            )
+        else:
+            exact = (generation.vectors if subset is None else generation.vectors[subset]) @ query
+            order = np.argsort(-exact)[:k]
+            rows = order if subset is None else subset[order]
+            scores = exact[order]
+
+        documents = []
+        for row, score in zip(rows, scores):
+            record = generation.record(int(row))
+            documents.append(Document(
+                id=record["id"],
+                page_content=record["page_content"],
+                metadata={**record["metadata"], "score": float(score)}
+            ))
+        return documents
+
+    def get_documents(self, ids: List[str]) -> List[Document]:
+        """
+        Fetch stored chunks by id.
+
+        Args:
+            ids: Ids of the chunks
+
+        Returns:
+            Chunks that exist, in the order of `ids`
+        """
+        generation = self.get_generation()
+        if generation is None:
+            return []
+        documents = []
+        for chunk_id in ids:
+            try:
+                row = generation.rows([chunk_id])[0]
+            except KeyError:
+                continue
+            record = generation.record(row)
+            documents.append(Document(id=record["id"], page_content=record["page_content"], metadata=record["metadata"]))
+        return documents
+
+    def get_embeddings(self, ids: List[str]) -> np.ndarray:
+        """
+        Fetch the stored embeddings of chunks.
+
+        Args:
+            ids: Ids of the chunks
+
+        Returns:
+            Array of shape (len(ids), dim) in the order of `ids`
+
+        Raises:
+            KeyError: If an id is not stored
+        """
+        generation = self.get_generation()
+        if generation is None:
+            # Nothing ingested yet, so no id is stored
+            if ids:
+                raise KeyError(ids[0])
+            return np.empty((0, 0), dtype=np.float32)
+        return np.asarray(generation.vectors[generation.rows(ids)])
+
+    def iter_records(self, batch_size: int = 1024) -> Iterator[Tuple[List[Document], np.ndarray]]:
+        """
+        Read every stored chunk with its embedding, in storage order.
+
+        Args:
+            batch_size: Chunks per batch
+
+        Yields:
+            Chunks and an array of their normalized embeddings
+        """
+        generation = self.get_generation()
+        if generation is None:
+            return
+        for start in range(0, generation.count, batch_size):
+            rows = range(start, min(start + batch_size, generation.count))
+            documents = []
+            for row in rows:
+                record = generation.record(row)
+                documents.append(Document(id=record["id"], page_content=record["page_content"], metadata=record["metadata"]))
+            yield documents, np.asarray(generation.vectors[rows.start:rows.stop])
+
+    def cleanup(self):
+        """Clean up vector store directory"""
+        with self._lock:
+            self._generation = None
+        shutil.rmtree(self.index_directory, ignore_errors=True)
+        print(f"Successfully cleaned up vector store at {self.index_directory}")
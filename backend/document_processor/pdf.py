@@ -0,0 +1,223 @@
+"""
+Module for extracting PDF text page by page.
+Parses pages in worker processes and caches their text on disk by file hash.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+from .sources import FileSource
+
+# Directory holding extracted page text, keyed by file hash and page number
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "./.pdf_cache")
+# Worker processes parsing pages; 1 parses in the calling process
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Fewest pages parsed per worker task. Every task opens the file and
+# walks the whole page tree, so tasks are kept few and large.
+MIN_PAGES_PER_TASK = 16
+
+_pool: Optional[Executor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool(max_workers: int) -> Executor:
+    """
+    Get the process pool shared by all PDF loaders.
+
+    Workers are spawned rather than forked, since ingestion may run in
+    a threaded server, and are kept for the life of the process.
+
+    Args:
+        max_workers: Worker processes of the pool when it is created
+
+    Returns:
+        Process pool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def file_hash(file: Union[str, BinaryIO]) -> str:
+    """
+    Hash the content of a file.
+
+    Args:
+        file: Path or binary stream to hash
+
+    Returns:
+        Hex digest identifying the content
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with (open(file, "rb") if isinstance(file, str) else file) as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_layout(path: Union[str, BinaryIO]) -> Dict[str, Any]:
+    """
+    Read the page count and page labels of a PDF without extracting text.
+
+    Args:
+        path: PDF file or binary stream
+
+    Returns:
+        Dict with `total_pages` and `page_labels`
+    """
+    import pypdf
+
+    reader = pypdf.PdfReader(path)
+    return {"total_pages": len(reader.pages), "page_labels": list(reader.page_labels)}
+
+def extract_pages(path: Union[str, BinaryIO], pages: List[int]) -> List[Tuple[int, str]]:
+    """
+    Extract the text of some pages of a PDF.
+
+    Runs in worker processes, so it only depends on pypdf.
+
+    Args:
+        path: PDF file, or binary stream when parsed in the calling process
+        pages: Page numbers, starting at 0
+
+    Returns:
+        Pairs of page number and text, text extracted like PyPDFLoader does
+    """
+    import pypdf
+
+    reader = pypdf.PdfReader(path)
+    return [(page, reader.pages[page].extract_text(extraction_mode="plain").strip()) for page in pages]
+
+class PDFPageCache:
+    """
+    Extracted page text on disk.
+
+    Every PDF gets a directory named after its content hash, holding
+    `layout.json` and one text file per page. Files are written to a
+    temporary name and renamed, so concurrent ingestion of the same
+    file never reads a partial page.
+    """
+
+    def __init__(self, cache_directory: str = PDF_CACHE_DIR):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_directory: Directory holding the cached pages
+        """
+        self.cache_directory = cache_directory
+
+    def _path(self, key: str, name: str) -> str:
+        return os.path.join(self.cache_directory, key, name)
+
+    def _write(self, path: str, text: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def get_layout(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the cached layout of a PDF, None if not cached."""
+        try:
+            with open(self._path(key, "layout.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put_layout(self, key: str, layout: Dict[str, Any]) -> None:
+        """Cache the layout of a PDF."""
+        self._write(self._path(key, "layout.json"), json.dumps(layout))
+
+    def get_page(self, key: str, page: int) -> Optional[str]:
+        """Get the cached text of a page, None if not cached."""
+        try:
+            with open(self._path(key, f"{page}.txt"), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_page(self, key: str, page: int, text: str) -> None:
+        """Cache the text of a page."""
+        self._write(self._path(key, f"{page}.txt"), text)
+
+def split_tasks(pages: List[int], max_workers: int, min_pages: int = MIN_PAGES_PER_TASK) -> List[List[int]]:
+    """
+    Split pages into contiguous worker tasks.
+
+    Args:
+        pages: Page numbers to parse
+        max_workers: Worker processes
+        min_pages: Fewest pages per task
+
+    Returns:
+        Up to two tasks per worker, a single task for small files
+        or a single worker
+    """
+    if max_workers <= 1:
+        return [pages]
+    count = max(1, min(max_workers * 2, len(pages) // min_pages))
+    size = -(-len(pages) // count)
+    return [pages[i:i + size] for i in range(0, len(pages), size)]
+
+def iter_pdf_pages(
+    source: FileSource,
+    cache: Optional[PDFPageCache] = None,
+    max_workers: int = PDF_WORKERS
+) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+    """
+    Stream the page text of a PDF as pages become available.
+
+    Cached pages come first. The others are parsed in worker processes
+    when the file is large enough for more than one task, and yielded
+    in the order the tasks finish. Uploads held in memory are always
+    parsed in the calling process.
+
+    Args:
+        source: PDF file or upload
+        cache: Page cache, None to always parse
+        max_workers: Worker processes, 1 to parse in the calling process
+
+    Yields:
+        Tuples of page number, text and layout of the file
+    """
+    # Uploads spilled to disk are parsed from their temporary file
+    path = source if isinstance(source, str) else source.path
+
+    def open_file() -> Union[str, BinaryIO]:
+        return path or source.open()
+
+    key = file_hash(open_file()) if cache is not None else None
+    layout = cache.get_layout(key) if cache is not None else None
+    if layout is None:
+        layout = read_layout(open_file())
+        if cache is not None:
+            cache.put_layout(key, layout)
+
+    missing = []
+    for page in range(layout["total_pages"]):
+        text = cache.get_page(key, page) if cache is not None else None
+        if text is None:
+            missing.append(page)
+        else:
+            yield page, text, layout
+
+    tasks = split_tasks(missing, max_workers if path else 1) if missing else []
+    if len(tasks) > 1:
+        pool = _get_pool(max_workers)
+        results = (future.result() for future in as_completed(
+            [pool.submit(extract_pages, path, pages) for pages in tasks]
+        ))
+    else:
+        results = (extract_pages(open_file(), pages) for pages in tasks)
+
+    for pages in results:
+        for page, text in pages:
+            if cache is not None:
+                cache.put_page(key, page, text)
+            yield page, text, layout
@@ -0,0 +1,518 @@
+"""
+Module for a quantized vector store.
+Searches compact int8 or binary codes in memory and rescores on disk vectors.
+"""
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from .embeddings import CachedEmbeddings
+from .filters import MetadataIndex
+from .interfaces import VectorStore
+from .retriever import VectorSearchRetriever
+
+QUANTIZATIONS = ("int8", "binary")
+# Candidates rescored per requested result
+RESCORE_FACTORS = {"int8": 4, "binary": 16}
+# Rows scored at once, bounds the temporary float copy of the codes
+BLOCK_SIZE = 256
+# Set bits of every byte value, np.bitwise_count needs NumPy 2
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    Scale vectors to unit length.
+
+    Args:
+        vectors: Array of shape (n, dim) or (dim,)
+
+    Returns:
+        Unit vectors, zero vectors left unchanged
+    """
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def quantize(vectors: np.ndarray, quantization: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Encode unit vectors.
+
+    Args:
+        vectors: Normalized float32 vectors of shape (n, dim)
+        quantization: 'int8' or 'binary'
+
+    Returns:
+        Tuple of (codes, int8 scales or None)
+    """
+    if quantization == "binary":
+        return np.packbits(vectors > 0, axis=1), None
+    # Symmetric per-vector scale so the largest component maps to 127
+    max_abs = np.abs(vectors).max(axis=1)
+    scales = np.where(max_abs == 0, 1.0, max_abs / 127).astype(np.float32)
+    codes = np.round(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales
+
+def candidate_scores(
+    query: np.ndarray,
+    codes: np.ndarray,
+    scales: Optional[np.ndarray],
+    quantization: str
+) -> np.ndarray:
+    """
+    Approximate the similarity of every code to the query.
+
+    Args:
+        query: Normalized query vector
+        codes: Codes to score
+        scales: Scales of int8 codes
+        quantization: 'int8' or 'binary'
+
+    Returns:
+        Score per code, higher is closer
+    """
+    scores = np.empty(len(codes), dtype=np.float32)
+    if quantization == "binary":
+        query_bits = np.packbits(query > 0)
+        for start in range(0, len(codes), BLOCK_SIZE):
+            block = codes[start:start + BLOCK_SIZE]
+            # Negative Hamming distance
+            scores[start:start + len(block)] = -_POPCOUNT[block ^ query_bits].sum(axis=1, dtype=np.int32)
+    else:
+        for start in range(0, len(codes), BLOCK_SIZE):
+            block = codes[start:start + BLOCK_SIZE]
+            scores[start:start + len(block)] = (block.astype(np.float32) @ query) * scales[start:start + len(block)]
+    return scores
+
+def search_codes(
+    query: np.ndarray,
+    codes: np.ndarray,
+    scales: Optional[np.ndarray],
+    vectors: np.ndarray,
+    quantization: str,
+    k: int,
+    rescore_factor: int,
+    subset: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the rows closest to a query with the codes, then rescore them.
+
+    Args:
+        query: Normalized query vector
+        codes: Codes of all rows
+        scales: Scales of int8 codes
+        vectors: Float32 vectors of all rows, usually memory-mapped
+        quantization: 'int8' or 'binary'
+        k: Number of rows to return
+        rescore_factor: Candidates rescored per requested row
+        subset: Ascending rows to search, e.g. selected by a metadata
+            filter, None to search all rows
+
+    Returns:
+        Tuple of (rows, exact cosine scores), best first
+    """
+    if subset is not None:
+        codes = codes[subset]
+        scales = None if scales is None else scales[subset]
+    if not len(codes):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    candidates = min(len(codes), k * rescore_factor)
+    scores = candidate_scores(query, codes, scales, quantization)
+    rows = np.sort(np.argpartition(-scores, candidates - 1)[:candidates])
+    if subset is not None:
+        rows = subset[rows]
+
+    # Exact rescoring, rows sorted for sequential reads
+    exact = vectors[rows] @ query
+    order = np.argsort(-exact)[:k]
+    return rows[order], exact[order]
+
+class QuantizedVectorStore(VectorStore):
+    """
+    Vector store keeping only quantized codes in memory.
+
+    Vectors are normalized, so scores are cosine similarities like the
+    cosine Chroma collections. Candidates are found on the codes, then
+    rescored exactly with the float32 vectors, which stay on disk in a
+    memory-mapped file. Per 1536-dim vector this keeps 1540 bytes in
+    memory with int8 codes and 192 bytes with binary codes, instead of
+    6144.
+
+    Files in `persist_directory`:
+        index.json: dimension, quantization and committed count
+        vectors.f32: float32 vectors, one row per chunk
+        codes.bin: int8 or packed binary codes
+        scales.f32: dequantization scale of each int8 code
+        documents.jsonl: id, text and metadata of each chunk
+    """
+
+    def __init__(
+        self,
+        persist_directory: str = "./.quantized",
+        quantization: str = "int8",
+        embedding_function: Optional[Embeddings] = None,
+        rescore_factor: Optional[int] = None
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            persist_directory: Directory holding the index files
+            quantization: 'int8' or 'binary'
+            embedding_function: Embeddings for documents and queries
+            rescore_factor: Candidates rescored per requested result
+        """
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"quantization must be one of {QUANTIZATIONS}, got {quantization!r}")
+        if embedding_function is None:
+            from langchain_openai import OpenAIEmbeddings
+            embedding_function = OpenAIEmbeddings()
+
+        self.persist_directory = persist_directory
+        self.quantization = quantization
+        self.embedding_function = CachedEmbeddings.wrap(embedding_function)
+        self.rescore_factor = rescore_factor or RESCORE_FACTORS[quantization]
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dim: Optional[int] = None
+        self._count = 0
+        # Bytes of documents.jsonl holding the committed rows
+        self._documents_end = 0
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._documents: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors: Optional[np.ndarray] = None
+        self._index = MetadataIndex()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.persist_directory, name)
+
+    def _load(self) -> None:
+        """Load codes and documents of an existing index on first use."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if os.path.exists(self._path("index.json")):
+                with open(self._path("index.json")) as f:
+                    index = json.load(f)
+                if index["quantization"] != self.quantization:
+                    raise ValueError(
+                        f"Index at {self.persist_directory} uses {index['quantization']} codes"
+                    )
+                self._dim = index["dim"]
+                # Rows after the committed count are leftovers of an interrupted write
+                count = index["count"]
+                codes = np.fromfile(self._path("codes.bin"), dtype=self._code_dtype())
+                self._codes = codes[:count * self._code_width()].reshape(count, self._code_width())
+                if self.quantization == "int8":
+                    self._scales = np.fromfile(self._path("scales.f32"), dtype=np.float32)[:count]
+                with open(self._path("documents.jsonl"), "rb") as f:
+                    for _ in range(count):
+                        self._documents.append(json.loads(f.readline()))
+                    documents_end = f.tell()
+                self._rows = {doc["id"]: row for row, doc in enumerate(self._documents)}
+                self._index.add([doc["metadata"] for doc in self._documents])
+                self._count = count
+                self._documents_end = documents_end
+            self._truncate()
+            self._loaded = True
+
+    def _truncate(self) -> None:
+        """Cut the files to the committed rows, so appends follow them."""
+        sizes = {
+            "vectors.f32": self._count * (self._dim or 0) * 4,
+            "codes.bin": self._count * (self._code_width() if self._dim else 0),
+            "scales.f32": self._count * 4,
+            "documents.jsonl": self._documents_end,
+        }
+        for name, size in sizes.items():
+            path = self._path(name)
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                print(f"---DROPPING UNCOMMITTED ROWS OF {path}---")
+                os.truncate(path, size)
+
+    def _code_dtype(self) -> Any:
+        return np.int8 if self.quantization == "int8" else np.uint8
+
+    def _code_width(self) -> int:
+        return self._dim if self.quantization == "int8" else (self._dim + 7) // 8
+
+    def _get_vectors(self) -> np.ndarray:
+        """Map the float32 vectors for rescoring."""
+        vectors = self._vectors
+        if vectors is None or len(vectors) < self._count:
+            vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r", shape=(self._count, self._dim))
+            self._vectors = vectors
+        return vectors
+
+    def store_documents(self, documents: List[Document]) -> Any:
+        """
+        Embed, quantize and append documents to the index.
+
+        Args:
+            documents: Chunks to store
+
+        Returns:
+            The store itself
+        """
+        if not documents:
+            return self
+        return self.store_embeddings(
+            documents,
+            self.embedding_function.embed_documents([doc.page_content for doc in documents])
+        )
+
+    def store_embeddings(self, documents: List[Document], embeddings: Any) -> Any:
+        """
+        Quantize and append documents whose embeddings are already known.
+
+        Args:
+            documents: Chunks to store
+            embeddings: One embedding per chunk
+
+        Returns:
+            The store itself
+        """
+        self._load()
+        if not documents:
+            return self
+        vectors = normalize(np.asarray(embeddings, dtype=np.float32))
+        codes, scales = quantize(vectors, self.quantization)
+        records = [
+            {"id": doc.id or uuid.uuid4().hex, "page_content": doc.page_content, "metadata": doc.metadata}
+            for doc in documents
+        ]
+        lines = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(f"Expected {self._dim}-dim embeddings, got {vectors.shape[1]}")
+            os.makedirs(self.persist_directory, exist_ok=True)
+            # Rows of an interrupted write would shift the ones appended now
+            self._truncate()
+            with open(self._path("vectors.f32"), "ab") as f:
+                vectors.tofile(f)
+            with open(self._path("codes.bin"), "ab") as f:
+                codes.tofile(f)
+            if scales is not None:
+                with open(self._path("scales.f32"), "ab") as f:
+                    scales.tofile(f)
+            with open(self._path("documents.jsonl"), "ab") as f:
+                f.write(lines)
+
+            count = self._count + len(documents)
+            tmp = self._path("index.json.tmp")
+            with open(tmp, "w") as f:
+                json.dump({"dim": self._dim, "quantization": self.quantization, "count": count}, f)
+            os.replace(tmp, self._path("index.json"))
+
+            # Searches keep using the arrays they started with
+            self._codes = codes if self._codes is None else np.concatenate([self._codes, codes])
+            if scales is not None:
+                self._scales = scales if self._scales is None else np.concatenate([self._scales, scales])
+            for row, record in enumerate(records, start=self._count):
+                self._rows[record["id"]] = row
+            self._documents.extend(records)
+            self._index.add([record["metadata"] for record in records])
+            self._count = count
+            self._documents_end += len(lines)
+        return self
+
+    def get_retriever(self) -> Any:
+        return VectorSearchRetriever(vector_store=self)
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a question with the store's embedding function.
+
+        Args:
+            query: Question to embed
+
+        Returns:
+            Query embedding
+        """
+        return self.embedding_function.embed_query(query)
+
+    def _search(self, embedding: List[float], k: int, filters: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Find the rows closest to an embedding.
+
+        Args:
+            embedding: Query embedding
+            k: Number of rows to return
+            filters: Metadata filter spec, only matching rows are scored
+
+        Returns:
+            Tuple of (rows, exact cosine scores), best first
+        """
+        self._load()
+        codes, scales, count = self._codes, self._scales, self._count
+        subset = self._index.select(filters)
+        if subset is not None:
+            # Rows indexed by a concurrent write may not be committed yet
+            subset = subset[subset < count]
+        if not count:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return search_codes(
+            normalize(np.asarray(embedding, dtype=np.float32)),
+            codes[:count],
+            None if scales is None else scales[:count],
+            self._get_vectors(),
+            self.quantization,
+            k,
+            self.rescore_factor,
+            subset
+        )
+
+    def search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """
+        Find the chunks closest to an embedding.
+
+        Args:
+            embedding: Query embedding
+            k: Number of chunks to return
+            filters: Metadata filter spec, see `filters.parse_filters`
+
+        Returns:
+            Closest chunks, with their ids and `metadata['score']` set
+        """
+        rows, scores = self._search(embedding, k, filters)
+        documents = []
+        for row, score in zip(rows, scores):
+            record = self._documents[row]
+            documents.append(Document(
+                id=record["id"],
+                page_content=record["page_content"],
+                metadata={**record["metadata"], "score": float(score)}
+            ))
+        return documents
+
+    def get_documents(self, ids: List[str]) -> List[Document]:
+        """
+        Fetch stored chunks by id.
+
+        Args:
+            ids: Ids of the chunks
+
+        Returns:
+            Chunks that exist, in the order of `ids`
+        """
+        self._load()
+        documents = []
+        for chunk_id in ids:
+            if chunk_id in self._rows:
+                record = self._documents[self._rows[chunk_id]]
+                documents.append(Document(
+                    id=record["id"],
+                    page_content=record["page_content"],
+                    metadata=dict(record["metadata"])
+                ))
+        return documents
+
+    def get_embeddings(self, ids: List[str]) -> np.ndarray:
+        """
+        Fetch the stored embeddings of chunks.
+
+        Args:
+            ids: Ids of the chunks
+
+        Returns:
+            Array of shape (len(ids), dim) in the order of `ids`
+        """
+        self._load()
+        return np.asarray(self._get_vectors()[[self._rows[chunk_id] for chunk_id in ids]])
+
+    def iter_records(self, batch_size: int = 1024) -> Iterator[Tuple[List[Document], np.ndarray]]:
+        """
+        Read every stored chunk with its embedding, in storage order.
+
+        Args:
+            batch_size: Chunks per batch
+
+        Yields:
+            Chunks and an array of their normalized embeddings
+        """
+        self._load()
+        count = self._count
+        for start in range(0, count, batch_size):
+            records = self._documents[start:min(start + batch_size, count)]
+            documents = [
+                Document(id=record["id"], page_content=record["page_content"], metadata=dict(record["metadata"]))
+                for record in records
+            ]
+            yield documents, np.asarray(self._get_vectors()[start:start + len(records)])
+
+    def memory_bytes(self) -> int:
+        """
+        Get the memory used by the codes.
+
+        Returns:
+            Bytes of the in-memory codes and scales
+        """
+        self._load()
+        total = 0 if self._codes is None else self._codes.nbytes
+        return total + (0 if self._scales is None else self._scales.nbytes)
+
+    def recall_at_k(self, queries: Optional[np.ndarray] = None, k: int = 10, sample: int = 100) -> float:
+        """
+        Measure the recall of the quantized search against exact search.
+
+        Args:
+            queries: Query embeddings, stored vectors sampled if not given
+            k: Number of results compared per query
+            sample: Stored vectors sampled when no queries are given
+
+        Returns:
+            Mean fraction of the exact top-k found by the quantized search
+        """
+        self._load()
+        if not self._count:
+            return 1.0
+        vectors = self._get_vectors()
+        if queries is None:
+            rng = np.random.default_rng(0)
+            rows = np.sort(rng.choice(self._count, size=min(sample, self._count), replace=False))
+            queries = np.asarray(vectors[rows])
+        queries = normalize(np.asarray(queries, dtype=np.float32))
+        k = min(k, self._count)
+
+        found = 0
+        for query in queries:
+            exact = np.empty(self._count, dtype=np.float32)
+            for start in range(0, self._count, BLOCK_SIZE):
+                exact[start:start + BLOCK_SIZE] = vectors[start:start + BLOCK_SIZE] @ query
+            expected = set(np.argpartition(-exact, k - 1)[:k].tolist())
+            rows, _ = self._search(query, k)
+            found += len(expected & set(rows.tolist()))
+        return found / (len(queries) * k)
+
+    def cleanup(self):
+        """Clean up vector store directory"""
+        with self._lock:
+            self._vectors = None
+            self._codes = None
+            self._scales = None
+            self._documents = []
+            self._rows = {}
+            self._index = MetadataIndex()
+            self._count = 0
+            self._documents_end = 0
+            self._dim = None
+            shutil.rmtree(self.persist_directory, ignore_errors=True)
+            print(f"Successfully cleaned up vector store at {self.persist_directory}")
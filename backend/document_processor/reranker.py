@@ -0,0 +1,135 @@
+"""
+Module for reranking retrieved chunks locally before LLM grading.
+Scores candidates by cosine similarity and picks a diverse top-N with MMR.
+"""
+
+from typing import List, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+class VectorReranker:
+    """
+    Reranks candidate chunks with their stored embeddings.
+
+    Everything is computed locally in NumPy, so reranking costs no
+    embedding or LLM calls.
+    """
+
+    def __init__(
+        self,
+        top_n: int = 4,
+        lambda_mult: float = 0.7,
+        min_score: Optional[float] = None
+    ):
+        """
+        Initialize the reranker.
+
+        Args:
+            top_n: Number of candidates to keep
+            lambda_mult: Relevance weight of MMR between 0 and 1
+            min_score: Optional minimum cosine similarity to the query
+        """
+        self.top_n = top_n
+        self.lambda_mult = lambda_mult
+        self.min_score = min_score
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """
+        Scale vectors to unit length.
+
+        Args:
+            vectors: Array of shape (n, dim) or (dim,)
+
+        Returns:
+            Unit vectors, zero vectors left unchanged
+        """
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def cosine_scores(self, query_embedding: Sequence[float], embeddings: np.ndarray) -> np.ndarray:
+        """
+        Compute the cosine similarity of every candidate to the query.
+
+        Args:
+            query_embedding: Embedding of the question
+            embeddings: Candidate embeddings of shape (n, dim)
+
+        Returns:
+            Similarity per candidate
+        """
+        query = self._normalize(np.asarray(query_embedding, dtype=np.float32))
+        return self._normalize(np.asarray(embeddings, dtype=np.float32)) @ query
+
+    def _mmr(self, scores: np.ndarray, vectors: np.ndarray) -> List[int]:
+        """
+        Run maximal marginal relevance selection.
+
+        Args:
+            scores: Cosine similarity of each candidate to the query
+            vectors: Unit-length candidate embeddings
+
+        Returns:
+            Indices of the selected candidates in selection order
+        """
+        eligible = np.ones(len(scores), dtype=bool)
+        if self.min_score is not None:
+            eligible &= scores >= self.min_score
+
+        selected: List[int] = []
+        # Highest similarity of each candidate to the already selected ones
+        redundancy = np.full(len(scores), -np.inf, dtype=np.float32)
+        for _ in range(min(self.top_n, int(eligible.sum()))):
+            if selected:
+                mmr = self.lambda_mult * scores - (1 - self.lambda_mult) * redundancy
+            else:
+                mmr = scores.copy()
+            mmr[~eligible] = -np.inf
+            index = int(np.argmax(mmr))
+            selected.append(index)
+            eligible[index] = False
+            redundancy = np.maximum(redundancy, vectors @ vectors[index])
+        return selected
+
+    def select(self, query_embedding: Sequence[float], embeddings: np.ndarray) -> List[int]:
+        """
+        Pick a relevant and diverse subset of candidates.
+
+        Args:
+            query_embedding: Embedding of the question
+            embeddings: Candidate embeddings of shape (n, dim)
+
+        Returns:
+            Indices of the selected candidates in selection order
+        """
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        return self._mmr(self.cosine_scores(query_embedding, vectors), vectors)
+
+    def rerank(
+        self,
+        query_embedding: Sequence[float],
+        documents: List[Document],
+        embeddings: np.ndarray
+    ) -> List[Document]:
+        """
+        Keep the top-N diverse candidates, annotated with their score.
+
+        Args:
+            query_embedding: Embedding of the question
+            documents: Candidate documents
+            embeddings: Embeddings of the documents, in the same order
+
+        Returns:
+            Selected documents with `metadata['rerank_score']` set
+        """
+        if not documents:
+            return []
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        scores = self.cosine_scores(query_embedding, vectors)
+        reranked = []
+        for index in self._mmr(scores, vectors):
+            document = documents[index]
+            document.metadata["rerank_score"] = float(scores[index])
+            reranked.append(document)
+        return reranked
@@ -3,39 +3,82 @@ Module for document retrieval functionality.
 Provides services for retrieving relevant documents from vector stores.
 """
 
-from typing import Any, List, Optional
-from langchain.schema import Document
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from dotenv import load_dotenv
+from pydantic import ConfigDict, Field
+from .dedup import collapse_copies
 from .interfaces import VectorStore
+from .reranker import VectorReranker
+from .working_set import WorkingSet, WorkingSetCache
 
 load_dotenv()
 
+class VectorSearchRetriever(BaseRetriever):
+    """LangChain retriever over a store providing `embed_query` and `search_by_vector`."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_store: Any
+    search_type: str = "similarity"
+    search_kwargs: Dict[str, Any] = Field(default_factory=dict)
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        embedding = self.vector_store.embed_query(query)
+        return self.vector_store.search_by_vector(embedding, k=self.search_kwargs.get("k", 4))
+
 class RetrieverService:
     """
     Service for retrieving documents from vector stores.
     Handles document retrieval with configurable parameters.
+
+    Retrieved documents carry their relevance to the query in
+    `metadata['score']` (cosine similarity for new collections).
     """
 
     def __init__(
-        self, 
+        self,
         vector_store: VectorStore,
         search_type: str = "similarity",
         k: int = 4,
-        score_threshold: Optional[float] = 0.5
+        score_threshold: Optional[float] = 0.5,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.7,
+        accept_threshold: Optional[float] = None,
+        reuse_threshold: Optional[float] = 0.8,
+        working_set_size: int = 32
     ):
         """
         Initialize retriever service with configuration.
-        
+
         Args:
             vector_store: Vector store to retrieve documents from
             search_type: Type of search to perform ('similarity' or 'mmr')
             k: Number of documents to retrieve
             score_threshold: Minimum similarity score threshold
+            fetch_k: Candidates fetched before MMR selection
+            lambda_mult: Relevance weight of MMR between 0 and 1
+            accept_threshold: Score above which documents skip LLM grading, None to grade all
+            reuse_threshold: Best working set score needed to skip the store search
+            working_set_size: Chunks kept in the working set of a conversation
         """
         self.vector_store = vector_store
         self.search_type = search_type
         self.k = k
         self.score_threshold = score_threshold
+        self.fetch_k = fetch_k
+        self.lambda_mult = lambda_mult
+        self.accept_threshold = accept_threshold
+        self.reuse_threshold = reuse_threshold
+        self.working_set_size = working_set_size
+        self.working_sets = WorkingSetCache()
         self._retriever = None
 
     def _initialize_retriever(self) -> None:
@@ -51,7 +94,7 @@ class RetrieverService:
     def get_retriever(self) -> Any:
         """
         Get configured retriever instance.
-        
+
         Returns:
             Configured retriever for document search
         """
@@ -59,19 +102,130 @@ class RetrieverService:
             self._initialize_retriever()
         return self._retriever
 
+    def get_working_set(self, conversation: Optional[str], ids: Optional[List[str]]) -> Optional[WorkingSet]:
+        """
+        Get the working set of a conversation.
+
+        Args:
+            conversation: Thread id of the conversation, None for stateless runs
+            ids: Chunk ids of the working set, from the graph state
+
+        Returns:
+            Working set, None if the conversation has none
+        """
+        if not conversation or not ids or self.reuse_threshold is None:
+            return None
+        return self.working_sets.get(conversation, ids, self.vector_store)
+
+    def extend_working_set(self, ids: Optional[List[str]], documents: List[Document]) -> List[str]:
+        """
+        Add relevant chunks to the ids of a working set.
+
+        Args:
+            ids: Current chunk ids, oldest first
+            documents: Chunks graded relevant in this turn
+
+        Returns:
+            Chunk ids holding at most `working_set_size` most recent chunks
+        """
+        new_ids = [doc.id for doc in documents if doc.id]
+        kept = [chunk_id for chunk_id in ids or [] if chunk_id not in new_ids]
+        return (kept + new_ids)[-self.working_set_size:]
+
+    def retrieve_with_scores(
+        self,
+        query: str,
+        working_set: Optional[WorkingSet] = None,
+        query_embedding: Optional[List[float]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Document], List[float]]:
+        """
+        Retrieve candidate documents and their scores for a query.
+
+        With 'mmr' search `fetch_k` candidates are returned for `rerank`,
+        otherwise the top `k`. Candidates below `score_threshold` are
+        dropped, so an empty result means nothing in the store is relevant.
+        When the best chunk of the conversation's working set scores at
+        least `reuse_threshold`, candidates come from the working set and
+        the store is not searched.
+
+        Metadata filters are pushed into the store's search, so only
+        matching chunks are scored.
+
+        Args:
+            query: Search query string
+            working_set: Working set of the conversation
+            query_embedding: Embedding of the query if already computed
+            filters: Metadata filter spec, e.g. {"source": "report.pdf",
+                "page": {"gte": 3, "lte": 9}}, see `filters.parse_filters`
+
+        Returns:
+            Tuple of (candidates with `metadata['score']`, query embedding)
+        """
+        if query_embedding is None:
+            query_embedding = self.vector_store.embed_query(query)
+        k = self.fetch_k if self.search_type == "mmr" else self.k
+        documents = working_set.search(query_embedding, k, filters) if working_set is not None else []
+        if documents and documents[0].metadata["score"] >= self.reuse_threshold:
+            print(f"---REUSING CHUNKS FROM THE CONVERSATION WORKING SET ({len(working_set.ids)} CHUNKS)---")
+        else:
+            documents = self.vector_store.search_by_vector(query_embedding, k=k, filters=filters)
+        if self.score_threshold is not None:
+            documents = [
+                doc for doc in documents
+                if doc.metadata["score"] >= self.score_threshold
+            ]
+        # Per-source copies of a chunk are only needed by source filters
+        documents = collapse_copies(documents)
+        return documents, query_embedding
+
+    def rerank(self, query_embedding: List[float], documents: List[Document]) -> List[Document]:
+        """
+        Select the final `k` documents among the candidates.
+
+        Args:
+            query_embedding: Embedding of the query
+            documents: Candidates from `retrieve_with_scores`
+
+        Returns:
+            Selected documents, most relevant first
+        """
+        if len(documents) <= self.k:
+            return documents
+        lambda_mult = self.lambda_mult if self.search_type == "mmr" else 1.0
+        embeddings = self.vector_store.get_embeddings([doc.id for doc in documents])
+        reranker = VectorReranker(top_n=self.k, lambda_mult=lambda_mult)
+        return reranker.rerank(query_embedding, documents, embeddings)
+
+    def is_accepted(self, document: Document) -> bool:
+        """
+        Check whether a document scores high enough to skip LLM grading.
+
+        Args:
+            document: Retrieved document
+
+        Returns:
+            True if the document is accepted on its score alone
+        """
+        score = document.metadata.get("score")
+        return (
+            self.accept_threshold is not None
+            and score is not None
+            and score >= self.accept_threshold
+        )
+
     def retrieve_documents(self, query: str) -> List[Document]:
         """
         Retrieve relevant documents for a query.
-        
+
         Args:
             query: Search query string
-            
+
         Returns:
             List of relevant documents
         """
-        if not self._retriever:
-            self._initialize_retriever()
-        return self._retriever.get_relevant_documents(query)
+        documents, query_embedding = self.retrieve_with_scores(query)
+        return self.rerank(query_embedding, documents)
 
     def update_search_parameters(
         self,
@@ -81,7 +235,7 @@ class RetrieverService:
     ) -> None:
         """
         Update search parameters for retriever.
-        
+
         Args:
             search_type: New search type ('similarity' or 'mmr')
             k: New number of documents to retrieve
@@ -93,6 +247,6 @@ class RetrieverService:
             self.k = k
         if score_threshold is not None:
             self.score_threshold = score_threshold
-        
+
         # Reinitialize retriever with new parameters
-        self._initialize_retriever()
\ No newline at end of file
+        self._initialize_retriever()
@@ -3,13 +3,27 @@ Module for document processing service management.
 Provides a centralized service for document processing operations.
 """
 
-from typing import Optional
+import os
+from typing import Optional, Union
+
+from langchain_core.embeddings import Embeddings
+from .dedup import DEDUP_THRESHOLD, NearDuplicateFilter
 from .ingestion import (
     DocumentIngester,
     RecursiveTextSplitter,
+    TikTokenTextSplitter,
     ChromaVectorStore
 )
+from .interfaces import TextSplitter
+from .mapped import MappedVectorStore
+from .quantized import QuantizedVectorStore
 from .retriever import RetrieverService
+from .sharded import ShardedVectorStore
+
+# Encoding the chunk size is measured in
+TOKEN_ENCODING = "cl100k_base"
+# Characters per token of English text, sizes the fallback character splitter
+CHARS_PER_TOKEN = 4
 
 class DocumentService:
     """
@@ -21,11 +35,20 @@ class DocumentService:
         self,
         collection_name: str = "rag-chroma",
         persist_directory: str = "./.chroma",
-        chunk_size: int = 1000,
-        chunk_overlap: int = 100,
+        chunk_size: int = 250,
+        chunk_overlap: int = 25,
         search_type: str = "similarity",
         k: int = 4,
-        score_threshold: float = 0.5
+        score_threshold: float = 0.5,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.7,
+        accept_threshold: Optional[float] = None,
+        reuse_threshold: Optional[float] = 0.8,
+        quantization: Optional[str] = None,
+        shared_index: bool = False,
+        dedup_threshold: float = DEDUP_THRESHOLD,
+        shards: int = 1,
+        shard_by: str = "hash"
     ):
         """
         Initialize document service with configuration.
@@ -33,13 +56,22 @@ class DocumentService:
         Args:
             collection_name: Name for the vector store collection
             persist_directory: Directory for vector store persistence
-            chunk_size: Size of text chunks for splitting
-            chunk_overlap: Overlap between text chunks
-            search_type: Type of search for retrieval
+            chunk_size: Size of text chunks for splitting, in tokens
+            chunk_overlap: Overlap between text chunks, in tokens
+            search_type: 'similarity', or 'mmr' to rerank `fetch_k` candidates
             k: Number of documents to retrieve
             score_threshold: Minimum similarity score for retrieval
+            fetch_k: Candidates fetched before MMR selection
+            lambda_mult: Relevance weight of MMR between 0 and 1
+            accept_threshold: Score above which documents skip LLM grading, None to grade all
+            reuse_threshold: Working set score for answering follow-ups without a store search
+            quantization: 'int8' or 'binary' to use a quantized index instead of Chroma
+            shared_index: Use a memory-mapped index shared by worker processes
+            dedup_threshold: Similarity above which chunks are collapsed at ingestion, 0 to store all
+            shards: Number of shards, searched in parallel, 1 for a single store
+            shard_by: Route chunks to shards by 'hash' of their id or by 'source'
         """
-        self._vector_store: Optional[ChromaVectorStore] = None
+        self._vector_store: Optional[Union[ChromaVectorStore, QuantizedVectorStore, MappedVectorStore, ShardedVectorStore]] = None
         self._ingester: Optional[DocumentIngester] = None
         self._retriever: Optional[RetrieverService] = None
         
@@ -50,21 +82,94 @@ class DocumentService:
         self.search_type = search_type
         self.k = k
         self.score_threshold = score_threshold
+        self.fetch_k = fetch_k
+        self.lambda_mult = lambda_mult
+        self.accept_threshold = accept_threshold
+        self.reuse_threshold = reuse_threshold
+        self.quantization = quantization
+        self.shared_index = shared_index
+        self.dedup_threshold = dedup_threshold
+        self.shards = shards
+        self.shard_by = shard_by
 
-    def _initialize_vector_store(self) -> ChromaVectorStore:
+    def _create_shard(
+        self,
+        path: str,
+        embedding_function: Embeddings
+    ) -> Union[ChromaVectorStore, QuantizedVectorStore, MappedVectorStore]:
+        """
+        Create the store of one shard, of the configured store type.
+
+        Args:
+            path: Directory of the shard
+            embedding_function: Embeddings shared by the shards
+
+        Returns:
+            Store of the shard
+        """
+        if self.shared_index:
+            return MappedVectorStore(path, embedding_function, quantization=self.quantization or "int8")
+        if self.quantization:
+            return QuantizedVectorStore(path, self.quantization, embedding_function)
+        return ChromaVectorStore(os.path.basename(path), path, embedding_function)
+
+    def _initialize_vector_store(self) -> Union[ChromaVectorStore, QuantizedVectorStore, MappedVectorStore, ShardedVectorStore]:
         """
         Initialize vector store with current configuration.
         
         Returns:
             Configured vector store instance
         """
-        if not self._vector_store:
+        if not self._vector_store and self.shards > 1:
+            self._vector_store = ShardedVectorStore(
+                directory=os.path.join(self.persist_directory, f"{self.collection_name}-sharded"),
+                shard_factory=self._create_shard,
+                num_shards=self.shards,
+                shard_by=self.shard_by
+            )
+        elif not self._vector_store and self.shared_index:
+            self._vector_store = MappedVectorStore(
+                index_directory=os.path.join(self.persist_directory, f"{self.collection_name}-mapped"),
+                quantization=self.quantization or "int8"
+            )
+        elif not self._vector_store and self.quantization:
+            self._vector_store = QuantizedVectorStore(
+                persist_directory=os.path.join(self.persist_directory, self.collection_name),
+                quantization=self.quantization
+            )
+        elif not self._vector_store:
             self._vector_store = ChromaVectorStore(
                 collection_name=self.collection_name,
                 persist_directory=self.persist_directory
             )
         return self._vector_store
 
+    def _create_text_splitter(self) -> TextSplitter:
+        """
+        Create the token splitter, or a character splitter of about the same
+        chunk size when the encoding can't be loaded, since tiktoken
+        downloads it on first use.
+
+        Returns:
+            Text splitter of the ingester
+        """
+        try:
+            import tiktoken
+
+            encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+        except Exception as e:
+            print(f"---COULD NOT LOAD THE {TOKEN_ENCODING} ENCODING ({type(e).__name__}), SPLITTING BY CHARACTERS---")
+            return RecursiveTextSplitter(
+                chunk_size=self.chunk_size * CHARS_PER_TOKEN,
+                chunk_overlap=self.chunk_overlap * CHARS_PER_TOKEN
+            )
+        return TikTokenTextSplitter(
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            encoding_name=TOKEN_ENCODING,
+            encoding=encoding
+        )
+
     def _initialize_ingester(self) -> DocumentIngester:
         """
         Initialize document ingester with current configuration.
@@ -73,13 +178,10 @@ class DocumentService:
             Configured document ingester instance
         """
         if not self._ingester:
-            text_splitter = RecursiveTextSplitter(
-                chunk_size=self.chunk_size,
-                chunk_overlap=self.chunk_overlap
-            )
             self._ingester = DocumentIngester(
-                text_splitter=text_splitter,
-                vector_store=self.get_vector_store()
+                text_splitter=self._create_text_splitter(),
+                vector_store=self.get_vector_store(),
+                deduplicator=NearDuplicateFilter(self.dedup_threshold) if self.dedup_threshold else None
             )
         return self._ingester
 
@@ -95,11 +197,15 @@ class DocumentService:
                 vector_store=self.get_vector_store(),
                 search_type=self.search_type,
                 k=self.k,
-                score_threshold=self.score_threshold
+                score_threshold=self.score_threshold,
+                fetch_k=self.fetch_k,
+                lambda_mult=self.lambda_mult,
+                accept_threshold=self.accept_threshold,
+                reuse_threshold=self.reuse_threshold
             )
         return self._retriever
 
-    def get_vector_store(self) -> ChromaVectorStore:
+    def get_vector_store(self) -> Union[ChromaVectorStore, QuantizedVectorStore, MappedVectorStore, ShardedVectorStore]:
         """
         Get vector store instance.
         
@@ -134,7 +240,16 @@ class DocumentService:
         chunk_overlap: Optional[int] = None,
         search_type: Optional[str] = None,
         k: Optional[int] = None,
-        score_threshold: Optional[float] = None
+        score_threshold: Optional[float] = None,
+        fetch_k: Optional[int] = None,
+        lambda_mult: Optional[float] = None,
+        accept_threshold: Optional[float] = None,
+        reuse_threshold: Optional[float] = None,
+        quantization: Optional[str] = None,
+        shared_index: Optional[bool] = None,
+        dedup_threshold: Optional[float] = None,
+        shards: Optional[int] = None,
+        shard_by: Optional[str] = None
     ) -> None:
         """
         Update service configuration parameters.
@@ -147,6 +262,15 @@ class DocumentService:
             search_type: New search type
             k: New number of documents
             score_threshold: New score threshold
+            fetch_k: New number of MMR candidates
+            lambda_mult: New MMR relevance weight
+            accept_threshold: New score for skipping LLM grading
+            reuse_threshold: New working set score for skipping the store search
+            quantization: New quantization, 'none' to go back to Chroma
+            shared_index: Whether to use the shared memory-mapped index
+            dedup_threshold: New similarity for collapsing chunks, 0 to store all
+            shards: New number of shards
+            shard_by: New shard routing, 'hash' or 'source'
         """
         if collection_name:
             self.collection_name = collection_name
@@ -162,6 +286,24 @@ class DocumentService:
             self.k = k
         if score_threshold:
             self.score_threshold = score_threshold
+        if fetch_k:
+            self.fetch_k = fetch_k
+        if lambda_mult is not None:
+            self.lambda_mult = lambda_mult
+        if accept_threshold is not None:
+            self.accept_threshold = accept_threshold
+        if reuse_threshold is not None:
+            self.reuse_threshold = reuse_threshold
+        if quantization:
+            self.quantization = None if quantization == "none" else quantization
+        if shared_index is not None:
+            self.shared_index = shared_index
+        if dedup_threshold is not None:
+            self.dedup_threshold = dedup_threshold
+        if shards:
+            self.shards = shards
+        if shard_by:
+            self.shard_by = shard_by
 
         # Reset services to reinitialize with new configuration
         self._vector_store = None
@@ -169,4 +311,12 @@ class DocumentService:
         self._retriever = None
 
 # Create singleton instance
-document_service = DocumentService() 
\ No newline at end of file
+document_service = DocumentService(
+    search_type=os.getenv("SEARCH_TYPE", "similarity"),
+    fetch_k=int(os.getenv("FETCH_K", "20")),
+    accept_threshold=float(os.environ["ACCEPT_THRESHOLD"]) if os.getenv("ACCEPT_THRESHOLD") else None,
+    quantization=os.getenv("QUANTIZATION") or None,
+    shared_index=os.getenv("SHARED_INDEX", "false").lower() == "true",
+    shards=int(os.getenv("VECTOR_SHARDS", "1")),
+    shard_by=os.getenv("SHARD_BY", "hash")
+) 
\ No newline at end of file
@@ -0,0 +1,364 @@
+"""
+Module for a vector store split across several shards.
+Queries every shard in parallel threads and merges their results by score.
+"""
+
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from .embeddings import CachedEmbeddings
+from .filters import parse_filters
+from .interfaces import VectorStore
+from .retriever import VectorSearchRetriever
+
+SHARD_KEYS = ("hash", "source")
+MANIFEST_FILE = "shards.json"
+
+# Creates the store of a shard from its directory and the shared embeddings
+ShardFactory = Callable[[str, Embeddings], VectorStore]
+
+def _bucket(key: str, num_shards: int) -> int:
+    """Map a routing key to a shard."""
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") % num_shards
+
+class ShardedVectorStore(VectorStore):
+    """
+    Vector store routing chunks to one of `num_shards` stores.
+
+    Chunks are routed by a hash of their id, which spreads them evenly,
+    or by a hash of their `source`, which keeps every chunk of a file in
+    one shard. A search embeds the query once, searches all shards in
+    parallel threads and merges their best-first results with a heap.
+
+    Every shard is an ordinary store in its own directory, created by
+    `shard_factory`, so shards can be rebuilt one at a time while the
+    others keep serving. `shards.json` records the routing and the
+    directory of each shard.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        shard_factory: ShardFactory,
+        num_shards: int = 4,
+        shard_by: str = "hash",
+        embedding_function: Optional[Embeddings] = None
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory holding the shards and their manifest
+            shard_factory: Creates the store of a shard
+            num_shards: Number of shards of a new store
+            shard_by: 'hash' to route by chunk id, 'source' to route by file
+            embedding_function: Embeddings shared by all shards
+        """
+        if shard_by not in SHARD_KEYS:
+            raise ValueError(f"shard_by must be one of {SHARD_KEYS}, got {shard_by!r}")
+        if embedding_function is None:
+            from langchain_openai import OpenAIEmbeddings
+            embedding_function = OpenAIEmbeddings()
+
+        self.directory = directory
+        self.shard_factory = shard_factory
+        self.embedding_function = CachedEmbeddings.wrap(embedding_function)
+        self._lock = threading.Lock()
+
+        manifest = self._read_manifest()
+        if manifest is None:
+            manifest = {"shard_by": shard_by, "shards": [f"shard-{index:03d}.0" for index in range(num_shards)]}
+        elif len(manifest["shards"]) != num_shards or manifest["shard_by"] != shard_by:
+            raise ValueError(
+                f"Store at {directory} has {len(manifest['shards'])} shards by {manifest['shard_by']}, "
+                f"re-ingest to use {num_shards} shards by {shard_by}"
+            )
+        self.shard_by = manifest["shard_by"]
+        self._names: List[str] = manifest["shards"]
+        self.shards: List[VectorStore] = [self._open(name) for name in self._names]
+        # Held by writes to a shard and by its rebuild, so no write lands in a shard being replaced
+        self._write_locks = [threading.Lock() for _ in self.shards]
+        self._executor = ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix="shard")
+
+    @property
+    def num_shards(self) -> int:
+        return len(self.shards)
+
+    def _read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, MANIFEST_FILE)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = os.path.join(self.directory, f"{MANIFEST_FILE}.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"shard_by": self.shard_by, "shards": self._names}, f)
+        os.replace(tmp, os.path.join(self.directory, MANIFEST_FILE))
+
+    def _open(self, name: str) -> VectorStore:
+        return self.shard_factory(os.path.join(self.directory, name), self.embedding_function)
+
+    def shard_of(self, document: Document) -> int:
+        """
+        Get the shard a chunk is routed to.
+
+        Args:
+            document: Chunk with an id
+
+        Returns:
+            Index of the shard
+        """
+        key = document.id if self.shard_by == "hash" else str(document.metadata.get("source", ""))
+        return _bucket(key, self.num_shards)
+
+    def _group(self, documents: List[Document]) -> Dict[int, List[int]]:
+        """Positions of the documents routed to each shard."""
+        groups: Dict[int, List[int]] = {}
+        for position, document in enumerate(documents):
+            groups.setdefault(self.shard_of(document), []).append(position)
+        return groups
+
+    def _with_ids(self, documents: List[Document]) -> List[Document]:
+        """Give chunks without an id one, since hash routing needs it."""
+        return [
+            doc if doc.id else Document(id=uuid.uuid4().hex, page_content=doc.page_content, metadata=doc.metadata)
+            for doc in documents
+        ]
+
+    def _map(self, function: Callable[[int, VectorStore], Any], indices: Optional[List[int]] = None) -> List[Any]:
+        """Call a function on shards in parallel, results in shard order."""
+        shards = self.shards
+        indices = range(len(shards)) if indices is None else indices
+        return list(self._executor.map(lambda index: function(index, shards[index]), indices))
+
+    def _write(self, function: Callable[[int, VectorStore], Any], indices: List[int]) -> List[Any]:
+        """Like `_map`, on the current shards and under their write locks."""
+        def write(index: int, _: VectorStore) -> Any:
+            with self._write_locks[index]:
+                return function(index, self.shards[index])
+        return self._map(write, indices)
+
+    def store_documents(self, documents: List[Document]) -> Any:
+        """
+        Embed and store documents, each shard storing its own in parallel.
+
+        Args:
+            documents: Chunks to store
+
+        Returns:
+            The store itself
+        """
+        documents = self._with_ids(documents)
+        groups = self._group(documents)
+        self._write_manifest()
+        self._write(
+            lambda index, shard: shard.store_documents([documents[i] for i in groups[index]]),
+            sorted(groups)
+        )
+        return self
+
+    def store_embeddings(self, documents: List[Document], embeddings: Any) -> Any:
+        """
+        Store documents whose embeddings are already known.
+
+        Args:
+            documents: Chunks to store
+            embeddings: One embedding per chunk
+
+        Returns:
+            The store itself
+        """
+        documents = self._with_ids(documents)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        groups = self._group(documents)
+        self._write_manifest()
+        self._write(
+            lambda index, shard: shard.store_embeddings(
+                [documents[i] for i in groups[index]],
+                embeddings[groups[index]]
+            ),
+            sorted(groups)
+        )
+        return self
+
+    def get_retriever(self) -> Any:
+        return VectorSearchRetriever(vector_store=self)
+
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a question with the shared embedding function.
+
+        Args:
+            query: Question to embed
+
+        Returns:
+            Query embedding
+        """
+        return self.embedding_function.embed_query(query)
+
+    def _shards_for(self, filters: Optional[Dict[str, Any]]) -> Optional[List[int]]:
+        """Shards that can hold chunks matching a filter, None for all of them."""
+        values, _ = parse_filters(filters).get("source", (None, {}))
+        if self.shard_by != "source" or values is None:
+            return None
+        return sorted({_bucket(str(value), self.num_shards) for value in values})
+
+    def search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """
+        Find the chunks closest to an embedding across all shards.
+
+        With source routing, a filter on `source` only searches the
+        shards holding those files.
+
+        Args:
+            embedding: Query embedding
+            k: Number of chunks to return
+            filters: Metadata filter spec, passed to every shard searched
+
+        Returns:
+            Closest chunks, with their ids and `metadata['score']` set
+        """
+        results = self._map(
+            lambda index, shard: shard.search_by_vector(embedding, k=k, filters=filters),
+            self._shards_for(filters)
+        )
+        # Every shard returns its chunks best first
+        merged = heapq.merge(*results, key=lambda doc: -doc.metadata["score"])
+        return list(itertools.islice(merged, k))
+
+    def _locate(self, ids: List[str]) -> Dict[int, List[str]]:
+        """Shards to ask for some ids: the owner by hash, all of them by source."""
+        if self.shard_by == "hash":
+            groups: Dict[int, List[str]] = {}
+            for chunk_id in ids:
+                groups.setdefault(_bucket(chunk_id, self.num_shards), []).append(chunk_id)
+            return groups
+        return {index: ids for index in range(self.num_shards)}
+
+    def get_documents(self, ids: List[str]) -> List[Document]:
+        """
+        Fetch stored chunks by id.
+
+        Args:
+            ids: Ids of the chunks
+
+        Returns:
+            Chunks that exist, in the order of `ids`
+        """
+        groups = self._locate(ids)
+        results = self._map(lambda index, shard: shard.get_documents(groups[index]), sorted(groups))
+        by_id = {doc.id: doc for doc in itertools.chain(*results)}
+        return [by_id[chunk_id] for chunk_id in ids if chunk_id in by_id]
+
+    def get_embeddings(self, ids: List[str]) -> np.ndarray:
+        """
+        Fetch the stored embeddings of chunks.
+
+        Args:
+            ids: Ids of the chunks
+
+        Returns:
+            Array of shape (len(ids), dim) in the order of `ids`; by source,
+            ids no shard holds are skipped, as `get_documents` does
+        """
+        if self.shard_by == "source":
+            # Ask the shards holding each id rather than all of them
+            owners = {doc.id: self.shard_of(doc) for doc in self.get_documents(ids)}
+            groups: Dict[int, List[str]] = {}
+            for chunk_id in ids:
+                owner = owners.get(chunk_id)
+                if owner is not None:
+                    groups.setdefault(owner, []).append(chunk_id)
+        else:
+            groups = self._locate(ids)
+        results = self._map(lambda index, shard: shard.get_embeddings(groups[index]), sorted(groups))
+        rows = {
+            chunk_id: row
+            for index, embeddings in zip(sorted(groups), results)
+            for chunk_id, row in zip(groups[index], embeddings)
+        }
+        return np.asarray([rows[chunk_id] for chunk_id in ids if chunk_id in rows], dtype=np.float32)
+
+    def iter_records(self, batch_size: int = 1024) -> Iterator[Tuple[List[Document], np.ndarray]]:
+        """
+        Read every stored chunk with its embedding, shard by shard.
+
+        Args:
+            batch_size: Chunks per batch
+
+        Yields:
+            Chunks and an array of their embeddings
+        """
+        for shard in list(self.shards):
+            yield from shard.iter_records(batch_size)
+
+    def rebuild_shard(self, index: int, documents: Optional[List[Document]] = None) -> VectorStore:
+        """
+        Rebuild one shard in a new directory and switch to it.
+
+        The other shards, and this one until the switch, keep serving.
+        Writes routed to this shard wait for the switch and land in the
+        new shard. Without `documents` the shard is rebuilt from its own chunks and
+        embeddings, without embedding calls. With `documents`, the ones
+        routed to this shard are embedded again and the others ignored.
+
+        Args:
+            index: Index of the shard
+            documents: Chunks to rebuild the shard from
+
+        Returns:
+            The new store of the shard
+        """
+        with self._write_locks[index]:
+            old_name = self._names[index]
+            prefix, generation = old_name.rsplit(".", 1)
+            new_name = f"{prefix}.{int(generation) + 1}"
+            shutil.rmtree(os.path.join(self.directory, new_name), ignore_errors=True)
+            new_shard = self._open(new_name)
+            print(f"---REBUILDING SHARD {index} INTO {new_name}---")
+
+            if documents is None:
+                for batch, embeddings in self.shards[index].iter_records():
+                    new_shard.store_embeddings(batch, embeddings)
+            else:
+                routed = [doc for doc in self._with_ids(documents) if self.shard_of(doc) == index]
+                if routed:
+                    new_shard.store_documents(routed)
+
+            with self._lock:
+                old_shard = self.shards[index]
+                shards, names = list(self.shards), list(self._names)
+                shards[index], names[index] = new_shard, new_name
+                # Searches already running keep the list they started with
+                self.shards, self._names = shards, names
+                self._write_manifest()
+        old_shard.cleanup()
+        shutil.rmtree(os.path.join(self.directory, old_name), ignore_errors=True)
+        return new_shard
+
+    def cleanup(self):
+        """Clean up every shard and the store directory"""
+        for shard in self.shards:
+            shard.cleanup()
+        shutil.rmtree(self.directory, ignore_errors=True)
+        print(f"Successfully cleaned up vector store at {self.directory}")
@@ -0,0 +1,178 @@
+"""
+Module for exporting and importing vector store snapshots.
+Snapshots carry the embeddings, so restoring one never calls the embedding provider.
+
+Usage:
+    python -m backend.document_processor.snapshot export ./snapshot
+    python -m backend.document_processor.snapshot import ./snapshot
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from langchain_core.documents import Document
+
+SNAPSHOT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+# Chunks read from the store at once while exporting
+EXPORT_BATCH_SIZE = 4096
+
+def _checksum(path: str) -> str:
+    """Hash a snapshot file."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def export_snapshot(vector_store: Any, directory: str, batch_size: int = EXPORT_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Write every chunk of a store and its embedding to a snapshot directory.
+
+    Files of a snapshot, in the layout of the memory-mapped index:
+        manifest.json: version, count, dimension and checksum of each file
+        embeddings.f32: float32 embeddings, one row per chunk
+        records.bin: JSON records (id, text, metadata) back to back
+        offsets.u64: byte offset of every record, plus the end offset
+
+    The snapshot is written next to `directory` and renamed into place,
+    replacing an existing snapshot only once it is complete.
+
+    Args:
+        vector_store: Store with an `iter_records` method
+        directory: Snapshot directory
+        batch_size: Chunks read from the store at once
+
+    Returns:
+        The manifest of the snapshot
+    """
+    tmp = f"{directory.rstrip(os.sep)}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    count, dim, offset = 0, None, 0
+    with open(os.path.join(tmp, "embeddings.f32"), "wb") as embeddings_file, \
+            open(os.path.join(tmp, "records.bin"), "wb") as records_file, \
+            open(os.path.join(tmp, "offsets.u64"), "wb") as offsets_file:
+        np.zeros(1, dtype=np.uint64).tofile(offsets_file)
+        for documents, embeddings in vector_store.iter_records(batch_size):
+            if not documents:
+                continue
+            if dim is None:
+                dim = embeddings.shape[1]
+            embeddings.astype(np.float32, copy=False).tofile(embeddings_file)
+            encoded = [
+                json.dumps({"id": doc.id, "page_content": doc.page_content, "metadata": doc.metadata}).encode("utf-8")
+                for doc in documents
+            ]
+            records_file.write(b"".join(encoded))
+            lengths = np.asarray([len(record) for record in encoded], dtype=np.uint64)
+            (offset + np.cumsum(lengths, dtype=np.uint64)).tofile(offsets_file)
+            offset += int(lengths.sum())
+            count += len(documents)
+
+    files = ("embeddings.f32", "records.bin", "offsets.u64")
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "count": count,
+        "dim": dim or 0,
+        "checksums": {name: _checksum(os.path.join(tmp, name)) for name in files},
+        "created_at": time.time(),
+    }
+    with open(os.path.join(tmp, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(tmp, directory)
+    return manifest
+
+def read_manifest(directory: str, verify: bool = True) -> Dict[str, Any]:
+    """
+    Read the manifest of a snapshot and check its files.
+
+    Args:
+        directory: Snapshot directory
+        verify: Compare the checksum of every file with the manifest
+
+    Returns:
+        The manifest
+
+    Raises:
+        ValueError: If the snapshot is missing, of another version or corrupt
+    """
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        raise ValueError(f"No snapshot at {directory}")
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {manifest.get('version')!r}")
+    for name, checksum in manifest["checksums"].items():
+        file_path = os.path.join(directory, name)
+        if not os.path.exists(file_path):
+            raise ValueError(f"Snapshot file {name} is missing")
+        if verify and _checksum(file_path) != checksum:
+            raise ValueError(f"Snapshot file {name} does not match its checksum")
+    return manifest
+
+def import_snapshot(vector_store: Any, directory: str, verify: bool = True) -> int:
+    """
+    Load a snapshot into a store without embedding anything.
+
+    Args:
+        vector_store: Store with a `store_embeddings` method
+        directory: Snapshot directory
+        verify: Check the file checksums before loading
+
+    Returns:
+        Number of imported chunks
+
+    Raises:
+        ValueError: If the snapshot is missing, of another version or corrupt
+    """
+    manifest = read_manifest(directory, verify)
+    count, dim = manifest["count"], manifest["dim"]
+    if not count:
+        return 0
+
+    offsets = np.fromfile(os.path.join(directory, "offsets.u64"), dtype=np.uint64)
+    embeddings = np.memmap(os.path.join(directory, "embeddings.f32"), dtype=np.float32, mode="r")
+    if len(offsets) != count + 1 or embeddings.size != count * dim:
+        raise ValueError(f"Snapshot at {directory} does not hold {count} chunks")
+
+    with open(os.path.join(directory, "records.bin"), "rb") as f:
+        records = f.read()
+    documents: List[Document] = []
+    for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist()):
+        record = json.loads(records[start:end])
+        documents.append(Document(id=record["id"], page_content=record["page_content"], metadata=record["metadata"]))
+
+    # One call, so stores writing a generation per call write a single one
+    vector_store.store_embeddings(documents, embeddings.reshape(count, dim))
+    return count
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export or import a snapshot of the document store")
+    parser.add_argument("command", choices=["export", "import"], help="Direction of the copy")
+    parser.add_argument("directory", help="Snapshot directory")
+    parser.add_argument("--no-verify", action="store_true", help="Skip checksum verification on import")
+    args = parser.parse_args()
+
+    from .service import document_service
+
+    vector_store = document_service.get_vector_store()
+    start = time.perf_counter()
+    if args.command == "export":
+        count = export_snapshot(vector_store, args.directory)["count"]
+    else:
+        count = import_snapshot(vector_store, args.directory, verify=not args.no_verify)
+    print(f"---{args.command.upper()}ED {count} CHUNKS IN {time.perf_counter() - start:.2f}s---")
+
+if __name__ == "__main__":
+    main()
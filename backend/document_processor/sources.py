@@ -0,0 +1,132 @@
+"""
+Module for passing uploaded files to the loaders without writing them to disk.
+Small uploads stay in memory, large ones are spilled to a temporary file.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+from typing import Any, BinaryIO, Optional, Union
+
+# Uploads larger than this are spilled to a temporary file
+SPILL_THRESHOLD = int(os.getenv("INGEST_SPILL_BYTES", str(64 * 1024 * 1024)))
+
+# A file given to a loader: a path on disk or an uploaded file
+FileSource = Union[str, "InMemoryFile"]
+
+class InMemoryFile:
+    """
+    Named file content handed to the document loaders.
+
+    Bytes objects and unmodified `BytesIO` buffers (Streamlit uploads) are
+    referenced without copying. Other streams (FastAPI uploads) are read
+    into memory up to `spill_threshold` and copied to a temporary file
+    beyond it, which `path` then points to.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        data: Union[bytes, bytearray, memoryview, BinaryIO],
+        spill_threshold: int = SPILL_THRESHOLD
+    ):
+        """
+        Initialize the file.
+
+        Args:
+            name: File name, used for the loader and the `source` metadata
+            data: Content as a buffer or a binary stream positioned at its start
+            spill_threshold: Size in bytes above which the content goes to disk
+        """
+        self.name = name
+        self.path: Optional[str] = None
+        self._data: Optional[bytes] = None
+
+        if isinstance(data, memoryview) and isinstance(data.obj, bytes) and data.nbytes == len(data.obj):
+            data = data.obj
+        if isinstance(data, io.BytesIO):
+            # Shares the buffer of an unmodified BytesIO
+            data = data.getvalue()
+        if isinstance(data, (bytearray, memoryview)):
+            data = bytes(data)
+
+        if isinstance(data, bytes):
+            if len(data) <= spill_threshold:
+                self._data = data
+            else:
+                self._spill(io.BytesIO(data))
+            return
+
+        head = data.read(spill_threshold + 1)
+        if len(head) <= spill_threshold:
+            self._data = head
+        else:
+            self._spill(io.BytesIO(head), data)
+
+    def _spill(self, *streams: Any) -> None:
+        """Copy the content to a temporary file."""
+        suffix = os.path.splitext(self.name)[1]
+        with tempfile.NamedTemporaryFile(prefix="rag-upload-", suffix=suffix, delete=False) as f:
+            for stream in streams:
+                shutil.copyfileobj(stream, f)
+        self.path = f.name
+
+    @property
+    def size(self) -> int:
+        """Size of the content in bytes."""
+        return os.path.getsize(self.path) if self.path else len(self._data)
+
+    def open(self) -> BinaryIO:
+        """
+        Open the content for reading.
+
+        Returns:
+            Binary stream, sharing the in-memory bytes
+        """
+        if self.path:
+            return open(self.path, "rb")
+        return io.BytesIO(self._data)
+
+    def read_bytes(self) -> bytes:
+        """Get the whole content."""
+        if self.path:
+            with open(self.path, "rb") as f:
+                return f.read()
+        return self._data
+
+    def close(self) -> None:
+        """Remove the spilled file, if any."""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+    def __enter__(self) -> "InMemoryFile":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+def source_name(source: FileSource) -> str:
+    """
+    Get the name reported in the `source` metadata of a file.
+
+    Args:
+        source: Path or uploaded file
+
+    Returns:
+        The path, or the name of the upload
+    """
+    return source if isinstance(source, str) else source.name
+
+def source_exists(source: FileSource) -> bool:
+    """
+    Check whether a file can be loaded.
+
+    Args:
+        source: Path or uploaded file
+
+    Returns:
+        True for uploads and existing paths
+    """
+    return not isinstance(source, str) or os.path.exists(source)
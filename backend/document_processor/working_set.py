@@ -0,0 +1,138 @@
+"""
+Module for reusing retrieved chunks across the turns of a conversation.
+Scores follow-up questions against recently relevant chunks before the store.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .filters import matches
+from .interfaces import VectorStore
+from .reranker import VectorReranker
+
+class WorkingSet:
+    """
+    Chunks graded relevant in recent turns of one conversation.
+
+    Embeddings are kept normalized, so a follow-up question is scored
+    against every chunk with one matrix-vector product.
+    """
+
+    def __init__(self, documents: List[Document], embeddings: np.ndarray):
+        """
+        Initialize the working set.
+
+        Args:
+            documents: Chunks of the working set
+            embeddings: Their stored embeddings, one row per chunk
+        """
+        self.documents = documents
+        self.ids = [doc.id for doc in documents]
+        self.embeddings = VectorReranker._normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(documents), -1))
+
+    def search(
+        self,
+        query_embedding: List[float],
+        k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """
+        Find the chunks closest to a query.
+
+        Args:
+            query_embedding: Embedding of the query
+            k: Number of chunks to return
+            filters: Metadata filter spec, see `filters.parse_filters`
+
+        Returns:
+            Closest chunks, copied with `metadata['score']` set, best first
+        """
+        if not self.documents:
+            return []
+        scores = self.embeddings @ VectorReranker._normalize(np.asarray(query_embedding, dtype=np.float32))
+        rows = [
+            row for row in np.argsort(-scores)
+            if filters is None or matches(self.documents[row].metadata, filters)
+        ][:k]
+        return [
+            Document(
+                id=self.documents[row].id,
+                page_content=self.documents[row].page_content,
+                metadata={**self.documents[row].metadata, "score": float(scores[row])}
+            )
+            for row in rows
+        ]
+
+class WorkingSetCache:
+    """
+    Working sets of recent conversations, least recently used evicted.
+
+    The graph state only carries the chunk ids of a working set. Chunks
+    and embeddings not cached in this process (a new worker, or chunks
+    added by the last turn) are fetched from the vector store by id.
+    """
+
+    def __init__(self, max_conversations: int = 256):
+        """
+        Initialize the cache.
+
+        Args:
+            max_conversations: Number of conversations kept in memory
+        """
+        self.max_conversations = max_conversations
+        self._sets: "OrderedDict[str, WorkingSet]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conversation: str, ids: List[str], vector_store: VectorStore) -> Optional[WorkingSet]:
+        """
+        Get the working set of a conversation.
+
+        Args:
+            conversation: Thread id of the conversation
+            ids: Chunk ids of the working set, from the graph state
+            vector_store: Store holding the chunks
+
+        Returns:
+            Working set with the chunks that still exist in the store,
+            None if none of them does
+        """
+        with self._lock:
+            cached = self._sets.get(conversation)
+            if cached is not None:
+                self._sets.move_to_end(conversation)
+        if cached is not None and cached.ids == ids:
+            return cached
+
+        known: Dict[str, int] = {} if cached is None else {chunk_id: row for row, chunk_id in enumerate(cached.ids)}
+        missing = [chunk_id for chunk_id in ids if chunk_id not in known]
+        fetched = vector_store.get_documents(missing) if missing else []
+        fetched_embeddings = vector_store.get_embeddings([doc.id for doc in fetched]) if fetched else None
+        by_id = {doc.id: (doc, fetched_embeddings[row]) for row, doc in enumerate(fetched)}
+        for chunk_id, row in known.items():
+            by_id[chunk_id] = (cached.documents[row], cached.embeddings[row])
+
+        # Chunks removed from the store since they were graded are dropped
+        entries = [by_id[chunk_id] for chunk_id in ids if chunk_id in by_id]
+        if not entries:
+            with self._lock:
+                self._sets.pop(conversation, None)
+            return None
+        working_set = WorkingSet(
+            [document for document, _ in entries],
+            np.asarray([embedding for _, embedding in entries], dtype=np.float32)
+        )
+        with self._lock:
+            self._sets[conversation] = working_set
+            self._sets.move_to_end(conversation)
+            while len(self._sets) > self.max_conversations:
+                self._sets.popitem(last=False)
+        return working_set
+
+    def clear(self) -> None:
+        """Forget every cached working set."""
+        with self._lock:
+            self._sets.clear()
@@ -0,0 +1,319 @@
+"""
+Module providing deterministic offline stand-ins for external services.
+Fake chat models, embeddings and search tools used by benchmarks, tests and the warmup.
+"""
+
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import PrivateAttr
+
+_WORD_PATTERN = re.compile(r"\w+")
+# Pre-tokenization pattern of the GPT-2 encoding
+_GPT2_PATTERN = r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+"""
+
+def _stable_seed(*parts: Any) -> int:
+    """
+    Build a process-independent seed from arbitrary values.
+
+    Args:
+        parts: Values identifying the call
+
+    Returns:
+        Integer seed derived from the values
+    """
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+class LatencyDistribution:
+    """
+    Random latency used by fakes to simulate remote calls.
+
+    Specs are written as `kind:param[:param]`:
+        - `none` or `0`: no latency
+        - `fixed:S`: always S seconds
+        - `uniform:A:B`: uniform between A and B seconds
+        - `lognormal:MEDIAN:SIGMA`: log-normal with the given median and shape
+        - `exponential:MEAN`: exponential with the given mean
+    """
+
+    def __init__(self, spec: str = "none", seed: Optional[int] = None):
+        """
+        Initialize the distribution from a spec string.
+
+        Args:
+            spec: Distribution spec as described above
+            seed: Optional random seed
+
+        Raises:
+            ValueError: If the spec is not recognised
+        """
+        self.spec = spec
+        self._rng = random.Random(seed)
+        kind, *params = spec.split(":")
+        try:
+            values = [float(param) for param in params]
+        except ValueError:
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+        if kind in ("none", "0") and not values:
+            self._sample = lambda: 0.0
+        elif kind == "fixed" and len(values) == 1:
+            self._sample = lambda: values[0]
+        elif kind == "uniform" and len(values) == 2:
+            self._sample = lambda: self._rng.uniform(values[0], values[1])
+        elif kind == "lognormal" and len(values) == 2:
+            mu = math.log(values[0])
+            self._sample = lambda: self._rng.lognormvariate(mu, values[1])
+        elif kind == "exponential" and len(values) == 1:
+            self._sample = lambda: self._rng.expovariate(1 / values[0])
+        else:
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+    def sample(self) -> float:
+        """Draw one latency in seconds."""
+        return max(0.0, self._sample())
+
+    def sleep(self) -> None:
+        """Block for one sampled latency."""
+        delay = self.sample()
+        if delay:
+            time.sleep(delay)
+
+    def __repr__(self) -> str:
+        return f"LatencyDistribution({self.spec!r})"
+
+def _sleep(latency: Optional[LatencyDistribution]) -> None:
+    if latency is not None:
+        latency.sleep()
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic chat model that never touches the network.
+
+    Plain invocations return a fixed response, streamed word by word when
+    the caller streams. Structured output invocations
+    fill every boolean field of the schema, answering True with the
+    probability configured for that schema in `verdicts` (1.0 by default).
+    The answer only depends on the seed and the prompt, so repeated runs
+    route through the graph identically. Optional latency distributions
+    simulate the provider's response time.
+    """
+
+    response: str = "This is a deterministic answer generated offline."
+    verdicts: Dict[str, float] = {}
+    seed: int = 0
+    latency: Optional[Any] = None
+    structured_latency: Optional[Any] = None
+
+    _calls: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _calls_lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def calls(self) -> Dict[str, int]:
+        """Number of calls served, keyed by schema name or 'generate'."""
+        return dict(self._calls)
+
+    def reset_calls(self) -> None:
+        """Reset the call counters."""
+        self._calls.clear()
+
+    def _count(self, name: str) -> None:
+        # Concurrent graph runs share the model
+        with self._calls_lock:
+            self._calls[name] = self._calls.get(name, 0) + 1
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self._count("generate")
+        _sleep(self.latency)
+        message = AIMessage(content=self.response)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        self._count("generate")
+        _sleep(self.latency)
+        for token in re.findall(r"\S+\s*", self.response):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    def _structured(self, schema: type, prompt: Any) -> Any:
+        """
+        Build a structured answer for a prompt.
+
+        Args:
+            schema: Pydantic model requested by the chain
+            prompt: Formatted prompt the chain would send
+
+        Returns:
+            Instance of the schema with all boolean fields decided
+        """
+        name = schema.__name__
+        self._count(name)
+        _sleep(self.structured_latency or self.latency)
+        rng = random.Random(_stable_seed(self.seed, name, str(prompt)))
+        probability = self.verdicts.get(name, 1.0)
+        values = {
+            field: rng.random() < probability
+            for field, info in schema.model_fields.items()
+            if info.annotation is bool
+        }
+        return schema(**values)
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> RunnableLambda:
+        """Return a runnable producing instances of `schema`."""
+        return RunnableLambda(lambda prompt: self._structured(schema, prompt))
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic hashing embeddings.
+
+    Each word is hashed into one of `size` signed buckets and the result is
+    L2-normalised, so texts sharing vocabulary get high cosine similarity,
+    which keeps similarity thresholds and reranking meaningful offline.
+    """
+
+    def __init__(self, size: int = 256, latency: Optional[LatencyDistribution] = None):
+        """
+        Initialize fake embeddings.
+
+        Args:
+            size: Dimension of the produced vectors
+            latency: Optional latency applied per embedding request
+        """
+        self.size = size
+        self.latency = latency
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        hashes = [zlib.crc32(word.encode("utf-8")) for word in _WORD_PATTERN.findall(text.lower())]
+        if hashes:
+            codes = np.asarray(hashes, dtype=np.uint64)
+            signs = np.where((codes >> np.uint64(31)) & np.uint64(1), -1.0, 1.0)
+            np.add.at(vector, (codes % np.uint64(self.size)).astype(np.intp), signs)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[0] = 1.0
+            norm = 1.0
+        return (vector / norm).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents."""
+        _sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query."""
+        _sleep(self.latency)
+        return self._embed(text)
+
+def fake_encoding(texts: List[str], vocab_size: int = 20000) -> Any:
+    """
+    Build a small tiktoken encoding from sample texts.
+
+    The vocabulary holds every byte plus the prefixes of the most frequent
+    words, so frequent words encode to one token like with a real BPE.
+    Used where the real encodings cannot be downloaded.
+
+    Args:
+        texts: Sample texts to take the vocabulary from
+        vocab_size: Maximum number of tokens
+
+    Returns:
+        tiktoken Encoding
+    """
+    import tiktoken
+
+    counts: Dict[bytes, int] = {}
+    for text in texts:
+        for word in _WORD_PATTERN.findall(text):
+            # Words are learned with and without their leading space
+            for encoded in (word.encode("utf-8"), f" {word}".encode("utf-8")):
+                counts[encoded] = counts.get(encoded, 0) + 1
+
+    ranks = {bytes([byte]): byte for byte in range(256)}
+    prefixes = set()
+    for word, _ in sorted(counts.items(), key=lambda item: -item[1]):
+        new = {word[:end] for end in range(2, len(word) + 1)} - prefixes
+        if len(ranks) + len(prefixes) + len(new) > vocab_size:
+            break
+        prefixes |= new
+    # Shorter prefixes get lower ranks so every word has a merge path
+    for prefix in sorted(prefixes, key=lambda value: (len(value), value)):
+        ranks[prefix] = len(ranks)
+    return tiktoken.Encoding(
+        name="fake",
+        pat_str=_GPT2_PATTERN,
+        mergeable_ranks=ranks,
+        special_tokens={},
+    )
+
+class FakeSearchTool:
+    """
+    Offline replacement for TavilySearchResults.
+
+    Returns `max_results` deterministic results derived from the query.
+    """
+
+    def __init__(
+        self,
+        max_results: int = 3,
+        latency: Optional[LatencyDistribution] = None,
+        **kwargs: Any
+    ):
+        """
+        Initialize fake search tool.
+
+        Args:
+            max_results: Number of results returned per query
+            latency: Optional latency applied per search
+        """
+        self.max_results = max_results
+        self.latency = latency
+        self.calls = 0
+        # A tool shared through the config is invoked from several threads
+        self._calls_lock = threading.Lock()
+
+    def invoke(self, inputs: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Return search results for `inputs['query']`."""
+        with self._calls_lock:
+            self.calls += 1
+        _sleep(self.latency)
+        query = inputs["query"]
+        return [
+            {
+                "url": f"https://example.com/{_stable_seed(query, i)}",
+                "content": f"Result {i + 1} about {query}.",
+            }
+            for i in range(self.max_results)
+        ]
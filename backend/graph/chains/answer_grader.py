@@ -4,8 +4,11 @@ Provides functionality to evaluate answer relevance and quality.
 """
 
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
+from typing import Any, Optional
+from langchain_core.runnables import Runnable, RunnableConfig
+from .batching import grader_batcher
+from .llm import DEFAULT_MODEL, ChainCache, resolve_model
 from ..prompts.templates.answer_grader_template import ANSWER_GRADE_TEMPLATE
 
 class AnswerGrade(BaseModel):
@@ -27,34 +30,36 @@ class AnswerGrader:
     Uses LLM to perform the evaluation.
     """
     
-    def __init__(self, model_name: str = "gpt-4o-mini", temperature: float = 0):
+    def __init__(self, model_name: str = DEFAULT_MODEL, temperature: float = 0):
         """
         Initialize the grader with specific LLM configuration.
         
         Args:
-            model_name: Name of the LLM model to use
+            model_name: Model used when the request does not select one
             temperature: Temperature setting for generation
         """
-        self.llm = ChatOpenAI(model=model_name, temperature=temperature)
-        self._create_chain()
+        self.model_name = model_name
+        self.temperature = temperature
+        self.chains = ChainCache(self._build_chain, temperature)
 
-    def _create_chain(self):
+    def _build_chain(self, llm: Any) -> Runnable:
         """Creates the evaluation chain."""
-
         prompt = ChatPromptTemplate.from_template(ANSWER_GRADE_TEMPLATE)
-        self.chain = prompt | self.llm.with_structured_output(AnswerGrade)
+        return prompt | llm.with_structured_output(AnswerGrade)
 
-    def invoke(self, inputs: dict) -> AnswerGrade:
+    def invoke(self, inputs: dict, config: Optional[RunnableConfig] = None) -> AnswerGrade:
         """
         Evaluate how well an answer addresses a question.
         
         Args:
             inputs: Dictionary containing 'question' and 'generation'
+            config: Optional runnable config; `configurable.model` selects the model
             
         Returns:
             AnswerGrade containing the evaluation results
         """
-        return self.chain.invoke(inputs)
+        chain = self.chains.get(resolve_model(config, self.model_name))
+        return grader_batcher.submit(chain, inputs, config).result()
 
 # Create singleton instance
 answer_grader = AnswerGrader()
\ No newline at end of file
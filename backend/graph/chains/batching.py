@@ -0,0 +1,145 @@
+"""
+Module for coalescing concurrent grader calls into batches.
+Collects calls arriving within a short window and dispatches them together.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+# Time a call waits for others to join its batch; 0 disables batching
+BATCH_WINDOW_MS = float(os.getenv("GRADER_BATCH_WINDOW_MS", "10"))
+MAX_BATCH_SIZE = int(os.getenv("GRADER_MAX_BATCH_SIZE", "32"))
+# Provider calls in flight per batch
+MAX_CONCURRENCY = int(os.getenv("GRADER_MAX_CONCURRENCY", "32"))
+# Batches running at the same time across all chains
+MAX_BATCHES_IN_FLIGHT = 64
+
+class MicroBatcher:
+    """
+    Dynamic batching scheduler for calls to the same chain.
+
+    The first call for a chain opens a batch that stays open for the
+    window or until it is full. All calls in a batch are then sent through
+    one `Runnable.batch`, which runs every step of the chain once for the
+    whole batch and bounds the provider calls in flight, and each caller
+    gets its own result back. Calls keep their own config, so callbacks
+    and tracing still belong to the request that made them.
+    """
+
+    def __init__(
+        self,
+        window_ms: float = BATCH_WINDOW_MS,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_concurrency: int = MAX_CONCURRENCY
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            window_ms: Milliseconds a batch waits for more calls
+            max_batch_size: Calls that close a batch immediately
+            max_concurrency: Provider calls in flight per batch
+        """
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self._pending: Dict[int, Tuple[float, List[Tuple[Runnable, Any, RunnableConfig, Future]]]] = {}
+        self._condition = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._scheduler: Optional[threading.Thread] = None
+        self.batches = 0
+        self.batched_calls = 0
+
+    def _start(self) -> None:
+        """Start the scheduler thread on first use."""
+        if self._scheduler is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=MAX_BATCHES_IN_FLIGHT,
+                thread_name_prefix="grader-batch"
+            )
+            self._scheduler = threading.Thread(target=self._run, name="grader-batcher", daemon=True)
+            self._scheduler.start()
+
+    def submit(
+        self,
+        chain: Runnable,
+        inputs: Any,
+        config: Optional[RunnableConfig] = None
+    ) -> Future:
+        """
+        Schedule one call of a chain.
+
+        Args:
+            chain: Chain to call
+            inputs: Inputs of the call
+            config: Config of the request making the call
+
+        Returns:
+            Future resolved with the chain output
+        """
+        future: Future = Future()
+        call = (chain, inputs, config or {}, future)
+        with self._condition:
+            self._start()
+            if self.window <= 0:
+                # Without a window every call is its own batch
+                self._executor.submit(self._dispatch, [call])
+                return future
+
+            deadline, calls = self._pending.setdefault(id(chain), (time.monotonic() + self.window, []))
+            calls.append(call)
+            if len(calls) >= self.max_batch_size:
+                del self._pending[id(chain)]
+                self._executor.submit(self._dispatch, calls)
+            elif len(calls) == 1:
+                self._condition.notify()
+        return future
+
+    def _run(self) -> None:
+        """Dispatch batches as their windows close."""
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                key, (deadline, calls) = min(self._pending.items(), key=lambda item: item[1][0])
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                del self._pending[key]
+                self._executor.submit(self._dispatch, calls)
+
+    def _dispatch(self, calls: List[Tuple[Runnable, Any, RunnableConfig, Future]]) -> None:
+        """
+        Run one batch and hand every caller its result.
+
+        Args:
+            calls: Calls of the batch, all to the same chain
+        """
+        with self._condition:
+            self.batches += 1
+            self.batched_calls += len(calls)
+        chain = calls[0][0]
+        configs = [dict(config, max_concurrency=self.max_concurrency) for _, _, config, _ in calls]
+        try:
+            results = chain.batch(
+                [inputs for _, inputs, _, _ in calls],
+                configs,
+                return_exceptions=True,
+            )
+        except Exception as e:
+            results = [e] * len(calls)
+
+        for (_, _, _, future), result in zip(calls, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+# Create singleton instance
+grader_batcher = MicroBatcher()
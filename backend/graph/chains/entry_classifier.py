@@ -4,10 +4,10 @@ Decides whether a question needs information search or can be answered directly.
 """
 
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
-import streamlit as st
+from typing import List, Dict, Any, Optional
+from langchain_core.runnables import Runnable, RunnableConfig
+from .llm import ChainCache, resolve_model
 from ..prompts.templates.entry_classifier_template import CLASSIFICATION_TEMPLATE
 
 class EntryClassification(BaseModel):
@@ -35,16 +35,12 @@ class EntryClassifier:
             temperature: Temperature setting for generation
         """
         self.temperature = temperature
-        self._create_chain()
+        self.chains = ChainCache(self._build_chain, temperature)
 
-    def _create_chain(self) -> None:
+    def _build_chain(self, llm: Any) -> Runnable:
         """Creates the classification chain with the evaluation prompt."""
-        self.llm = ChatOpenAI(
-            model=st.session_state.get("selected_model", "gpt-4o-mini"),
-            temperature=self.temperature
-        )
         prompt = ChatPromptTemplate.from_template(CLASSIFICATION_TEMPLATE)
-        self.chain = prompt | self.llm.with_structured_output(EntryClassification)
+        return prompt | llm.with_structured_output(EntryClassification)
 
     def _format_chat_history(self, chat_history: List[Dict[str, Any]]) -> str:
         """
@@ -65,21 +61,27 @@ class EntryClassifier:
             formatted.append(f"{role}: {msg['content']}")
         return "\n".join(formatted)
 
-    def invoke(self, inputs: Dict[str, Any]) -> EntryClassification:
+    def invoke(
+        self,
+        inputs: Dict[str, Any],
+        config: Optional[RunnableConfig] = None
+    ) -> EntryClassification:
         """
         Classify a question to determine if it needs information search.
         
         Args:
             inputs: Dictionary containing 'question' and optional 'chat_history'
-            
+            config: Optional runnable config; `configurable.model` selects the model
+                
         Returns:
             EntryClassification containing the decision
         """
+        chain = self.chains.get(resolve_model(config))
         formatted_history = self._format_chat_history(inputs.get("chat_history", []))
-        return self.chain.invoke({
+        return chain.invoke({
             "question": inputs["question"],
             "chat_history": formatted_history
-        })
+        }, config=config)
 
 # Create singleton instance
 entry_classifier = EntryClassifier()
\ No newline at end of file
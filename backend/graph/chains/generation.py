@@ -4,12 +4,15 @@ Provides functionality to generate contextual and chat-aware responses.
 """
 
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 from langchain_core.output_parsers import StrOutputParser
 from typing import Dict, Any, Optional
-import streamlit as st
+from langchain_core.runnables import Runnable, RunnableConfig
+from .llm import ChainCache, resolve_model
 from ..prompts.templates.generation_template import RESPONSE_TEMPLATE
 
+# Tag of the answer model calls, used to stream answer tokens but not grader output
+GENERATION_TAG = "rag:generation"
+
 class ResponseGenerator:
     """
     Generates responses to questions using context and chat history.
@@ -18,20 +21,18 @@ class ResponseGenerator:
     
     def __init__(self, temperature: float = 0):
         self.temperature = temperature
-        self._create_chain()
+        self.chains = ChainCache(self._build_chain, temperature)
 
-    def _create_chain(self) -> None:
+    def _build_chain(self, llm: Any) -> Runnable:
         """Creates the generation chain with the response prompt."""
-        self.llm = ChatOpenAI(
-            model=st.session_state.get("selected_model", "gpt-4o-mini"),
-            temperature=self.temperature
-        )
-        print("MODEL")
-        print(st.session_state.get("selected_model", "gpt-4o-mini"))
         prompt = ChatPromptTemplate.from_template(RESPONSE_TEMPLATE)
-        self.chain = prompt | self.llm | StrOutputParser()
+        return prompt | llm.with_config(tags=[GENERATION_TAG]) | StrOutputParser()
 
-    def invoke(self, inputs: Dict[str, Any]) -> str:
+    def invoke(
+        self,
+        inputs: Dict[str, Any],
+        config: Optional[RunnableConfig] = None
+    ) -> str:
         """
         Generate a response to a question using context and chat history.
         
@@ -40,11 +41,13 @@ class ResponseGenerator:
                 - question: The question to answer
                 - context: Relevant context for the answer
                 - chat_history: Optional previous conversation
+            config: Optional runnable config; `configurable.model` selects the model
                 
         Returns:
             Generated response as string
         """
-        return self.chain.invoke(inputs)
+        chain = self.chains.get(resolve_model(config))
+        return chain.invoke(inputs, config=config)
 
 # Create singleton instance
 generation_chain = ResponseGenerator()
\ No newline at end of file
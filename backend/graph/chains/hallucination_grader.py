@@ -4,11 +4,12 @@ Evaluates potential hallucinations in LLM responses.
 """
 
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
-from langchain.schema import Document
-import streamlit as st
+from typing import List, Dict, Any, Optional
+from langchain_core.documents import Document
+from langchain_core.runnables import Runnable, RunnableConfig
+from .batching import grader_batcher
+from .llm import ChainCache, resolve_model
 from ..prompts.templates.hallucination_grader_template import HALLUCINATION_TEMPLATE
 
 class HallucinationGrade(BaseModel):
@@ -36,16 +37,12 @@ class HallucinationGrader:
             temperature: Temperature setting for generation
         """
         self.temperature = temperature
-        self._create_chain()
+        self.chains = ChainCache(self._build_chain, temperature)
 
-    def _create_chain(self) -> None:
+    def _build_chain(self, llm: Any) -> Runnable:
         """Creates the evaluation chain with the grading prompt."""
-        self.llm = ChatOpenAI(
-            model=st.session_state.get("selected_model", "gpt-4o-mini"),
-            temperature=self.temperature
-        )
         prompt = ChatPromptTemplate.from_template(HALLUCINATION_TEMPLATE)
-        self.chain = prompt | self.llm.with_structured_output(HallucinationGrade)
+        return prompt | llm.with_structured_output(HallucinationGrade)
 
     def _format_documents(self, documents: List[Document]) -> str:
         """
@@ -59,7 +56,11 @@ class HallucinationGrader:
         """
         return "\n\n".join(doc.page_content for doc in documents)
 
-    def invoke(self, inputs: Dict[str, Any]) -> HallucinationGrade:
+    def invoke(
+        self,
+        inputs: Dict[str, Any],
+        config: Optional[RunnableConfig] = None
+    ) -> HallucinationGrade:
         """
         Evaluate whether a response is grounded in provided documents.
         
@@ -67,15 +68,17 @@ class HallucinationGrader:
             inputs: Dictionary containing:
                 - documents: List of reference documents
                 - generation: Generated response to evaluate
+            config: Optional runnable config; `configurable.model` selects the model
                 
         Returns:
             HallucinationGrade containing the evaluation result
         """
+        chain = self.chains.get(resolve_model(config))
         formatted_docs = self._format_documents(inputs["documents"])
-        return self.chain.invoke({
+        return grader_batcher.submit(chain, {
             "documents": formatted_docs,
             "generation": inputs["generation"]
-        })
+        }, config).result()
 
 # Create singleton instance
 hallucination_grader = HallucinationGrader()
\ No newline at end of file
@@ -0,0 +1,188 @@
+"""
+Module for sharing chat model clients between chains and sessions.
+Keeps one pooled client per (model, temperature) and resolves the model per request.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Connections kept open to the provider, shared by every model client
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+
+_http_clients: Optional[Tuple[Any, Any]] = None
+_http_lock = threading.Lock()
+
+def _get_http_clients() -> Tuple[Any, Any]:
+    """
+    Get the keep-alive HTTP clients shared by all chat models.
+
+    Returns:
+        Tuple of (sync client, async client)
+    """
+    global _http_clients
+    if _http_clients is None:
+        with _http_lock:
+            if _http_clients is None:
+                import httpx
+
+                limits = httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_CONNECTIONS,
+                )
+                _http_clients = (httpx.Client(limits=limits), httpx.AsyncClient(limits=limits))
+    return _http_clients
+
+def create_llm(model: str, temperature: float = 0) -> Any:
+    """
+    Create a chat model client on the shared connection pool.
+
+    Args:
+        model: Name of the model
+        temperature: Temperature setting for generation
+
+    Returns:
+        Configured chat model
+    """
+    from langchain_openai import ChatOpenAI
+
+    http_client, http_async_client = _get_http_clients()
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        http_client=http_client,
+        http_async_client=http_async_client,
+    )
+
+def resolve_model(config: Optional[RunnableConfig], default: str = DEFAULT_MODEL) -> str:
+    """
+    Get the model requested in a runnable config.
+
+    Args:
+        config: Config of the current graph invocation, if any
+        default: Model used when the request does not name one
+
+    Returns:
+        Name of the model to use
+    """
+    configurable = (config or {}).get("configurable") or {}
+    return configurable.get("model") or default
+
+class ModelRegistry:
+    """
+    Process-wide registry of chat model clients.
+
+    Clients are created once per (model, temperature) and reused by every
+    chain and session, so switching models never rebuilds anything.
+    """
+
+    def __init__(self, factory: Callable[[str, float], Any] = create_llm):
+        """
+        Initialize the registry.
+
+        Args:
+            factory: Callable creating a client from (model, temperature)
+        """
+        self.factory = factory
+        self._models: Dict[Tuple[str, float], Any] = {}
+        self._overrides: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model: str, temperature: float = 0) -> Any:
+        """
+        Get the client for a model, creating it on first use.
+
+        Args:
+            model: Name of the model
+            temperature: Temperature setting for generation
+
+        Returns:
+            Shared chat model client
+        """
+        if model in self._overrides:
+            return self._overrides[model]
+        key = (model, temperature)
+        llm = self._models.get(key)
+        if llm is None:
+            with self._lock:
+                llm = self._models.get(key)
+                if llm is None:
+                    llm = self.factory(model, temperature)
+                    self._models[key] = llm
+        return llm
+
+    def register(self, model: str, llm: Any) -> None:
+        """
+        Serve a model name from a given client, whatever the temperature.
+
+        Args:
+            model: Name requests select the client with
+            llm: Chat model client
+        """
+        with self._lock:
+            self._overrides[model] = llm
+
+    def unregister(self, model: str) -> None:
+        """
+        Remove a client added with `register`.
+
+        Args:
+            model: Name of the model
+        """
+        with self._lock:
+            self._overrides.pop(model, None)
+
+    def set_factory(self, factory: Callable[[str, float], Any]) -> None:
+        """
+        Replace the client factory and drop the existing clients.
+
+        Args:
+            factory: Callable creating a client from (model, temperature)
+        """
+        with self._lock:
+            self.factory = factory
+            self._models = {}
+
+class ChainCache:
+    """
+    Per-model cache of a chain built on the registry's clients.
+
+    A cached chain is rebuilt when the registry hands out a different
+    client for its model, e.g. after the factory was replaced.
+    """
+
+    def __init__(self, build: Callable[[Any], Runnable], temperature: float = 0):
+        """
+        Initialize the cache.
+
+        Args:
+            build: Callable building the chain from a chat model client
+            temperature: Temperature setting for generation
+        """
+        self.build = build
+        self.temperature = temperature
+        self._chains: Dict[str, Tuple[Any, Runnable]] = {}
+
+    def get(self, model: str) -> Runnable:
+        """
+        Get the chain for a model.
+
+        Args:
+            model: Name of the model
+
+        Returns:
+            Chain bound to the shared client of the model
+        """
+        llm = model_registry.get(model, self.temperature)
+        cached = self._chains.get(model)
+        if cached is None or cached[0] is not llm:
+            cached = (llm, self.build(llm))
+            self._chains[model] = cached
+        return cached[1]
+
+# Create singleton instance
+model_registry = ModelRegistry()
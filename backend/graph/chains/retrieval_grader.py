@@ -4,10 +4,11 @@ Evaluates semantic and keyword relevance of documents.
 """
 
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
-from typing import Dict, Any
-import streamlit as st
+from typing import Dict, Any, List, Optional
+from langchain_core.runnables import Runnable, RunnableConfig
+from .batching import grader_batcher
+from .llm import ChainCache, resolve_model
 from ..prompts.templates.retrieval_grader_template import RELEVANCE_TEMPLATE
 
 class DocumentRelevanceGrade(BaseModel):
@@ -35,18 +36,18 @@ class RelevanceGrader:
             temperature: Temperature setting for generation
         """
         self.temperature = temperature
-        self._create_chain()
+        self.chains = ChainCache(self._build_chain, temperature)
 
-    def _create_chain(self) -> None:
+    def _build_chain(self, llm: Any) -> Runnable:
         """Creates the evaluation chain with the grading prompt."""
-        self.llm = ChatOpenAI(
-            model=st.session_state.get("selected_model", "gpt-4o-mini"),
-            temperature=self.temperature
-        )
         prompt = ChatPromptTemplate.from_template(RELEVANCE_TEMPLATE)
-        self.chain = prompt | self.llm.with_structured_output(DocumentRelevanceGrade)
+        return prompt | llm.with_structured_output(DocumentRelevanceGrade)
 
-    def invoke(self, inputs: Dict[str, Any]) -> DocumentRelevanceGrade:
+    def invoke(
+        self,
+        inputs: Dict[str, Any],
+        config: Optional[RunnableConfig] = None
+    ) -> DocumentRelevanceGrade:
         """
         Evaluate whether a document is relevant to a question.
         
@@ -54,11 +55,35 @@ class RelevanceGrader:
             inputs: Dictionary containing:
                 - document: Document content to evaluate
                 - question: Question to check relevance against
+            config: Optional runnable config; `configurable.model` selects the model
                 
         Returns:
             DocumentRelevanceGrade containing the evaluation result
         """
-        return self.chain.invoke(inputs)
+        chain = self.chains.get(resolve_model(config))
+        return grader_batcher.submit(chain, inputs, config).result()
+
+    def batch(
+        self,
+        inputs: List[Dict[str, Any]],
+        config: Optional[RunnableConfig] = None
+    ) -> List[DocumentRelevanceGrade]:
+        """
+        Evaluate several documents at once.
+
+        All calls are submitted together, so they share a batch with each
+        other and with concurrent requests.
+        
+        Args:
+            inputs: List of dictionaries as accepted by `invoke`
+            config: Optional runnable config; `configurable.model` selects the model
+                
+        Returns:
+            DocumentRelevanceGrade for each input, in order
+        """
+        chain = self.chains.get(resolve_model(config))
+        futures = [grader_batcher.submit(chain, item, config) for item in inputs]
+        return [future.result() for future in futures]
 
 # Create singleton instance
 retrieval_grader = RelevanceGrader()
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Module for persisting conversation state between graph runs.
+Stores checkpoints in SQLite keyed by thread id, shared by worker processes.
+"""
+
+import asyncio
+import os
+import sqlite3
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+# SQLite file holding the checkpoints of every conversation
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", "./.checkpoints.sqlite")
+
+class SqliteCheckpointer(SqliteSaver):
+    """
+    SQLite checkpointer usable from synchronous and asynchronous runs.
+
+    `SqliteSaver` only implements the synchronous methods. The async ones
+    run them in the default executor, so the API can stream the graph
+    with the same checkpointer the Streamlit app uses. The database runs
+    in WAL mode, so several processes can share it.
+    """
+
+    @staticmethod
+    async def _run(function: Any, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await self._run(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoints = await self._run(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        return await self._run(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        return await self._run(self.put_writes, config, writes, task_id, task_path)
+
+def create_checkpointer(path: str = CHECKPOINT_DB) -> SqliteCheckpointer:
+    """
+    Open the checkpoint database.
+
+    Args:
+        path: SQLite file, created if missing
+
+    Returns:
+        Checkpointer for compiling the graph
+    """
+    # Wait for writes of other processes instead of failing
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+    return SqliteCheckpointer(conn)
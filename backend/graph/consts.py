@@ -1,4 +1,5 @@
 RETRIEVE = "retrieve"
+RERANK = "rerank"
 GRADE_DOCUMENTS = "grade_documents"
 GENERATE = "generate"
 WEBSEARCH = "websearch"
\ No newline at end of file
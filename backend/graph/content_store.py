@@ -0,0 +1,223 @@
+"""
+Module for keeping document content out of the graph state.
+Nodes exchange chunk references and resolve text from a per-request store.
+"""
+
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
+
+from backend.graph.state import DocumentRef, GraphState
+
+# Key of the content store in `config["configurable"]`
+CONTENT_STORE_KEY = "content_store"
+
+def _load_from_vector_store(ids: List[str]) -> List[Document]:
+    """Load chunks by id from the vector store the retriever searches."""
+    from backend.document_processor.service import document_service
+
+    return document_service.get_retriever().vector_store.get_documents(ids)
+
+class ContentStore:
+    """
+    Documents and query embeddings referenced by the state of one request.
+
+    Documents produced during the run are kept in memory. References to
+    chunks that are not (for example when a checkpoint is resumed in
+    another process) are loaded once from the vector store.
+    """
+
+    def __init__(self, loader: Optional[Callable[[List[str]], List[Document]]] = None):
+        """
+        Initialize the store.
+
+        Args:
+            loader: Loads documents by id, the vector store by default
+        """
+        self.loader = loader or _load_from_vector_store
+        self._documents: Dict[str, Document] = {}
+        self._embeddings: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, documents: List[Document]) -> List[DocumentRef]:
+        """
+        Keep documents and reference them.
+
+        Args:
+            documents: Documents to keep; ids are assigned where missing
+
+        Returns:
+            References in the same order
+        """
+        refs = []
+        with self._lock:
+            for document in documents:
+                if not document.id:
+                    document.id = uuid.uuid4().hex
+                self._documents[document.id] = document
+                refs.append(DocumentRef(id=document.id, score=document.metadata.get("score")))
+        return refs
+
+    def get(self, refs: List[DocumentRef]) -> List[Document]:
+        """
+        Resolve references to documents.
+
+        Args:
+            refs: References from the state
+
+        Returns:
+            Documents in the order of `refs`
+
+        Raises:
+            KeyError: If a document is neither kept nor loadable
+        """
+        with self._lock:
+            missing = [ref["id"] for ref in refs if ref["id"] not in self._documents]
+        if missing:
+            scores = {ref["id"]: ref.get("score") for ref in refs}
+            loaded = self.loader(missing)
+            with self._lock:
+                for document in loaded:
+                    # Stored chunks do not keep the score of this retrieval
+                    if scores.get(document.id) is not None:
+                        document.metadata["score"] = scores[document.id]
+                    self._documents[document.id] = document
+        with self._lock:
+            return [self._documents[ref["id"]] for ref in refs]
+
+    def put_embedding(self, key: str, embedding: List[float]) -> None:
+        """
+        Keep a query embedding.
+
+        Args:
+            key: Question the embedding belongs to
+            embedding: Query embedding
+        """
+        with self._lock:
+            self._embeddings[key] = embedding
+
+    def get_embedding(self, key: str) -> Optional[List[float]]:
+        """
+        Get a kept query embedding.
+
+        Args:
+            key: Question the embedding belongs to
+
+        Returns:
+            Query embedding, None if not kept
+        """
+        with self._lock:
+            return self._embeddings.get(key)
+
+class StateDocuments:
+    """
+    Reads and writes the documents of the graph state.
+
+    Without a content store in the config, state carries full documents
+    in `documents` as before. With one, it carries `document_refs` and
+    the query embedding stays in the store, so every state update and
+    checkpoint holds only ids and scores.
+    """
+
+    @staticmethod
+    def get_store(config: Optional[RunnableConfig]) -> Optional[ContentStore]:
+        """
+        Get the content store of a run.
+
+        Args:
+            config: Runnable config of the graph invocation
+
+        Returns:
+            Content store, None when state carries full documents
+        """
+        return ((config or {}).get("configurable") or {}).get(CONTENT_STORE_KEY)
+
+    @staticmethod
+    def has_documents(state: GraphState) -> bool:
+        """
+        Check whether the state holds any documents without resolving them.
+
+        Args:
+            state: Current graph state
+
+        Returns:
+            True if documents or references are present
+        """
+        return bool(state.get("document_refs") or state.get("documents"))
+
+    @staticmethod
+    def read(state: GraphState, config: Optional[RunnableConfig] = None) -> List[Document]:
+        """
+        Get the documents of the state.
+
+        Args:
+            state: Current graph state
+            config: Runnable config of the graph invocation
+
+        Returns:
+            Documents, resolved from the content store when referenced
+        """
+        store = StateDocuments.get_store(config)
+        if store is not None and state.get("document_refs"):
+            return store.get(state["document_refs"])
+        return list(state.get("documents") or [])
+
+    @staticmethod
+    def write(documents: List[Document], config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+        """
+        Build the state update holding documents.
+
+        Args:
+            documents: Documents to put in the state
+            config: Runnable config of the graph invocation
+
+        Returns:
+            State update with documents or references
+        """
+        store = StateDocuments.get_store(config)
+        if store is None:
+            return {"documents": documents}
+        return {"document_refs": store.put(documents)}
+
+    @staticmethod
+    def read_embedding(state: GraphState, config: Optional[RunnableConfig] = None) -> Optional[List[float]]:
+        """
+        Get the query embedding of the state.
+
+        Args:
+            state: Current graph state
+            config: Runnable config of the graph invocation
+
+        Returns:
+            Query embedding, None if the question was not embedded
+        """
+        store = StateDocuments.get_store(config)
+        if store is not None and state.get("query_embedding") is None:
+            return store.get_embedding(state["question"])
+        return state.get("query_embedding")
+
+    @staticmethod
+    def write_embedding(
+        question: str,
+        embedding: List[float],
+        config: Optional[RunnableConfig] = None
+    ) -> Dict[str, Any]:
+        """
+        Build the state update holding the query embedding.
+
+        Args:
+            question: Question that was embedded
+            embedding: Query embedding
+            config: Runnable config of the graph invocation
+
+        Returns:
+            State update, empty when the embedding is kept in the store
+        """
+        store = StateDocuments.get_store(config)
+        if store is None:
+            return {"query_embedding": embedding}
+        store.put_embedding(question, embedding)
+        return {}
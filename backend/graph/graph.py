@@ -1,65 +1,229 @@
 """
 Module defining the core graph structure and workflow.
+Each profile's graph is compiled on first use, with a checkpointer for
+conversations; render it with:
+
+    python -m backend.graph.graph --output graph.png --profile thorough
 """
 
+import argparse
+import os
+import threading
+from typing import Any, Dict, Optional
+
 from dotenv import load_dotenv
 from langgraph.graph import END, StateGraph
 
 from backend.graph.state import GraphState
-from backend.graph.nodes import generate, grade_documents, retrieve, web_search
+from backend.graph.nodes import generate, grade_documents, rerank, retrieve, web_search
 from backend.graph.utils import (
+    decide_after_retrieval,
     decide_next_step,
     grade_generation_grounded_in_documents_and_question,
     decide_entry_point
 )
-from backend.graph.consts import RETRIEVE, GRADE_DOCUMENTS, GENERATE, WEBSEARCH
+from backend.graph.consts import RETRIEVE, RERANK, GRADE_DOCUMENTS, GENERATE, WEBSEARCH
 
 load_dotenv()
 
-# Create graph
-workflow = StateGraph(GraphState)
-
-# Add nodes
-workflow.add_node(RETRIEVE, retrieve)
-workflow.add_node(GRADE_DOCUMENTS, grade_documents)
-workflow.add_node(GENERATE, generate)
-workflow.add_node(WEBSEARCH, web_search)
-
-# Set entry point
-workflow.set_conditional_entry_point(
-    decide_entry_point,
-    {
-        GENERATE: GENERATE,
-        RETRIEVE: RETRIEVE,
-    },
-)
+# Graph variants, from the cheapest to the fully verified flow
+PROFILES = ("fast", "balanced", "thorough")
+# Profile of requests that do not select one
+DEFAULT_PROFILE = os.getenv("GRAPH_PROFILE", "thorough")
 
-# Add edges
-workflow.add_edge(RETRIEVE, GRADE_DOCUMENTS)
+_apps: Dict[str, Any] = {}
+_conversation_apps: Dict[str, Any] = {}
+_checkpointer: Optional[Any] = None
+_app_lock = threading.Lock()
 
-workflow.add_conditional_edges(
-    GRADE_DOCUMENTS,
-    decide_next_step,
-    {
-        WEBSEARCH: WEBSEARCH,
-        GENERATE: GENERATE,
-    },
-)
+def _add_thorough_edges(workflow: StateGraph) -> None:
+    """Grade documents, then check the answer and regenerate until it is grounded and useful."""
+    workflow.add_edge(RERANK, GRADE_DOCUMENTS)
 
-workflow.add_conditional_edges(
-    GENERATE,
-    grade_generation_grounded_in_documents_and_question,
-    {
-        "not supported": GENERATE,
-        "useful": END,
-        "not useful": WEBSEARCH,
-    },
-)
-workflow.add_edge(WEBSEARCH, GENERATE)
-workflow.add_edge(GENERATE, END)
+    workflow.add_conditional_edges(
+        GRADE_DOCUMENTS,
+        decide_next_step,
+        {
+            WEBSEARCH: WEBSEARCH,
+            GENERATE: GENERATE,
+        },
+    )
+
+    workflow.add_conditional_edges(
+        GENERATE,
+        grade_generation_grounded_in_documents_and_question,
+        {
+            "not supported": GENERATE,
+            "useful": END,
+            "not useful": WEBSEARCH,
+        },
+    )
+    workflow.add_edge(WEBSEARCH, GENERATE)
+    workflow.add_edge(GENERATE, END)
+
+def _add_balanced_edges(workflow: StateGraph) -> None:
+    """Grade documents, then answer once."""
+    workflow.add_edge(RERANK, GRADE_DOCUMENTS)
+
+    workflow.add_conditional_edges(
+        GRADE_DOCUMENTS,
+        decide_next_step,
+        {
+            WEBSEARCH: WEBSEARCH,
+            GENERATE: GENERATE,
+        },
+    )
+    workflow.add_edge(WEBSEARCH, GENERATE)
+    workflow.add_edge(GENERATE, END)
+
+def _add_fast_edges(workflow: StateGraph) -> None:
+    """Answer once from the reranked candidates, without any grader."""
+    workflow.add_edge(RERANK, GENERATE)
+    workflow.add_edge(WEBSEARCH, GENERATE)
+    workflow.add_edge(GENERATE, END)
+
+_PROFILE_EDGES = {
+    "fast": _add_fast_edges,
+    "balanced": _add_balanced_edges,
+    "thorough": _add_thorough_edges,
+}
+
+def build_workflow(profile: str = "thorough") -> StateGraph:
+    """
+    Create the graph with all nodes and edges of a profile.
+
+    Every profile classifies the question and retrieves with the score
+    threshold, falling back to web search when nothing scores high
+    enough. After that:
+        fast: answers from the reranked candidates, without graders
+        balanced: grades the documents, then answers once
+        thorough: also checks the answer for hallucinations and
+            usefulness, regenerating or searching the web until it passes
+
+    Args:
+        profile: One of `PROFILES`
+
+    Returns:
+        Uncompiled state graph
+
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    if profile not in _PROFILE_EDGES:
+        raise ValueError(f"Unknown graph profile {profile!r}, use one of {PROFILES}")
+    workflow = StateGraph(GraphState)
+
+    # Add nodes
+    workflow.add_node(RETRIEVE, retrieve)
+    workflow.add_node(RERANK, rerank)
+    workflow.add_node(GENERATE, generate)
+    workflow.add_node(WEBSEARCH, web_search)
+    if profile != "fast":
+        workflow.add_node(GRADE_DOCUMENTS, grade_documents)
+
+    # Set entry point
+    workflow.set_conditional_entry_point(
+        decide_entry_point,
+        {
+            GENERATE: GENERATE,
+            RETRIEVE: RETRIEVE,
+        },
+    )
+
+    # Add edges
+    workflow.add_conditional_edges(
+        RETRIEVE,
+        decide_after_retrieval,
+        {
+            RERANK: RERANK,
+            WEBSEARCH: WEBSEARCH,
+        },
+    )
+    _PROFILE_EDGES[profile](workflow)
+    return workflow
+
+def get_app(profile: Optional[str] = None) -> Any:
+    """
+    Get the compiled graph of a profile, compiling it on first use.
+
+    Args:
+        profile: One of `PROFILES`, `DEFAULT_PROFILE` when None
+
+    Returns:
+        Compiled graph
+    """
+    profile = profile or DEFAULT_PROFILE
+    app = _apps.get(profile)
+    if app is None:
+        with _app_lock:
+            app = _apps.get(profile)
+            if app is None:
+                app = _apps[profile] = build_workflow(profile).compile()
+    return app
+
+def get_conversation_app(profile: Optional[str] = None) -> Any:
+    """
+    Get the graph of a profile compiled with the SQLite checkpointer.
+
+    Runs need a `thread_id` in `config["configurable"]`. The state of the
+    thread, including its chat history, is loaded from the checkpoint, so
+    a turn only sends `new_turn(question)` and any worker process can
+    continue the conversation. Profiles share the checkpointer, so a
+    thread can switch profiles between turns.
+
+    Args:
+        profile: One of `PROFILES`, `DEFAULT_PROFILE` when None
+
+    Returns:
+        Compiled graph with persistent conversation state
+    """
+    global _checkpointer
+    profile = profile or DEFAULT_PROFILE
+    app = _conversation_apps.get(profile)
+    if app is None:
+        with _app_lock:
+            app = _conversation_apps.get(profile)
+            if app is None:
+                if _checkpointer is None:
+                    from backend.graph.checkpointer import create_checkpointer
+
+                    _checkpointer = create_checkpointer()
+                app = _conversation_apps[profile] = build_workflow(profile).compile(checkpointer=_checkpointer)
+    return app
+
+def __getattr__(name: str) -> Any:
+    # Keeps `from backend.graph.graph import app` working without compiling at import
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def render(output_file: str = "graph.png", profile: Optional[str] = None) -> None:
+    """
+    Render the graph as a PNG image.
+
+    Uses the Mermaid rendering service, so it needs network access.
+
+    Args:
+        output_file: Path of the image to write
+        profile: Profile of the graph, `DEFAULT_PROFILE` when None
+    """
+    get_app(profile).get_graph().draw_mermaid_png(output_file_path=output_file)
+    print(f"Graph rendered to {output_file}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Render the RAG graph")
+    parser.add_argument("--output", default="graph.png", help="PNG file to write")
+    parser.add_argument(
+        "--mermaid", action="store_true",
+        help="Print the Mermaid definition instead of rendering (works offline)"
+    )
+    parser.add_argument("--profile", choices=PROFILES, default=None, help="Graph profile to draw")
+    args = parser.parse_args()
 
-# Compile graph
-app = workflow.compile()
+    if args.mermaid:
+        print(get_app(args.profile).get_graph().draw_mermaid())
+    else:
+        render(args.output, args.profile)
 
-# Generate visualization
-app.get_graph().draw_mermaid_png(output_file_path="graph.png")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 from backend.graph.nodes.generate import generate
 from backend.graph.nodes.grade_documents import grade_documents
+from backend.graph.nodes.rerank import rerank
 from backend.graph.nodes.retrieve import retrieve
 from backend.graph.nodes.web_search import web_search
 
-__all__ = ["generate", "grade_documents", "retrieve", "web_search"]
+__all__ = ["generate", "grade_documents", "rerank", "retrieve", "web_search"]
@@ -3,9 +3,11 @@ Module for generating responses to questions using context and chat history.
 Handles response generation and chat history management.
 """
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from datetime import datetime
+from langchain_core.runnables import RunnableConfig
 from backend.graph.chains.generation import generation_chain
+from backend.graph.content_store import StateDocuments
 from backend.graph.state import GraphState, ChatMessage
 
 class ResponseGenerator:
@@ -64,12 +66,13 @@ class ResponseGenerator:
             documents_used=[doc.metadata.get("source", "unknown") for doc in documents]
         ))
 
-def generate(state: GraphState) -> Dict[str, Any]:
+def generate(state: GraphState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
     """
     Generate a response to the user's question using available context.
     
     Args:
         state: Current graph state containing question and context
+        config: Runnable config of the graph invocation
         
     Returns:
         Updated state with generated response and chat history
@@ -81,8 +84,11 @@ def generate(state: GraphState) -> Dict[str, Any]:
     print(f"---GENERATION ATTEMPT {generation_attempts}/3---")
     
     question = state["question"]
-    documents = state.get("documents", [])
-    chat_history = state.get("chat_history", [])
+    documents = StateDocuments.read(state, config)
+    chat_history = list(state.get("chat_history", []))
+    # A draft of this turn rejected by the graders is replaced, not kept
+    if generation_attempts > 1 and chat_history and chat_history[-1]["role"] == "assistant":
+        chat_history.pop()
     
     # Update chat history and generate response
     ResponseGenerator._add_user_message(chat_history, question)
@@ -92,13 +98,12 @@ def generate(state: GraphState) -> Dict[str, Any]:
         "question": question,
         "context": context,
         "chat_history": chat_history
-    })
+    }, config=config)
     
     ResponseGenerator._add_assistant_message(chat_history, generation, documents)
     
     return {
         "generation": generation,
-        "documents": documents,
         "question": question,
         "generation_attempts": generation_attempts,
         "chat_history": chat_history
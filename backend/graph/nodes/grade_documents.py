@@ -3,9 +3,12 @@ Module for evaluating document relevance to questions.
 Filters and grades retrieved documents based on their relevance.
 """
 
-from typing import Any, Dict, List
-from langchain.schema import Document
+from typing import Any, Dict, List, Optional
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
+from backend.document_processor.service import document_service
 from backend.graph.chains.retrieval_grader import retrieval_grader
+from backend.graph.content_store import StateDocuments
 from backend.graph.state import GraphState
 
 class DocumentGrader:
@@ -14,71 +17,98 @@ class DocumentGrader:
     """
 
     @staticmethod
-    def _grade_document(question: str, document: Document) -> bool:
+    def _grade_documents(
+        question: str,
+        documents: List[Document],
+        config: Optional[RunnableConfig] = None
+    ) -> List[bool]:
         """
-        Grade a single document's relevance to a question.
+        Grade the relevance of several documents to a question.
+
+        The documents are graded concurrently, batched with the grader
+        calls of other requests.
         
         Args:
             question: Question to check relevance against
-            document: Document to evaluate
+            documents: Documents to evaluate
+            config: Runnable config of the graph invocation
             
         Returns:
-            True if document is relevant, False otherwise
+            Whether each document is relevant, in order
         """
-        print("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
-        grade = retrieval_grader.invoke({
-            "question": question,
-            "document": document.page_content
-        })
+        print(f"---CHECK RELEVANCE OF {len(documents)} DOCUMENTS TO QUESTION---")
+        grades = retrieval_grader.batch([
+            {"question": question, "document": document.page_content}
+            for document in documents
+        ], config=config)
         
-        is_relevant = grade.binary_score
-        print(f"---DOCUMENT IS {'RELEVANT' if is_relevant else 'NOT RELEVANT'}---")
-        return is_relevant
+        for grade in grades:
+            print(f"---DOCUMENT IS {'RELEVANT' if grade.binary_score else 'NOT RELEVANT'}---")
+        return [grade.binary_score for grade in grades]
 
     @staticmethod
     def filter_relevant_documents(
         question: str,
-        documents: List[Document]
+        documents: List[Document],
+        config: Optional[RunnableConfig] = None
     ) -> List[Document]:
         """
         Filter documents based on their relevance to the question.
         
+        Documents scoring at least the retriever's accept threshold are
+        kept without asking the LLM grader.
+        
         Args:
             question: Question to check relevance against
             documents: List of documents to filter
+            config: Runnable config of the graph invocation
             
         Returns:
             List of relevant documents
         """
+        retriever = document_service.get_retriever()
+        accepted = [retriever.is_accepted(doc) for doc in documents]
+        for doc, is_accepted in zip(documents, accepted):
+            if is_accepted:
+                print(f"---DOCUMENT ACCEPTED BY SCORE {doc.metadata['score']:.2f}---")
+        
+        # Only documents without a confident score are sent to the LLM grader
+        to_grade = [doc for doc, is_accepted in zip(documents, accepted) if not is_accepted]
+        grades = iter(DocumentGrader._grade_documents(question, to_grade, config) if to_grade else [])
         relevant_docs = [
-            doc for doc in documents 
-            if DocumentGrader._grade_document(question, doc)
+            doc for doc, is_accepted in zip(documents, accepted)
+            if is_accepted or next(grades)
         ]
         
         print(f"---FOUND {len(relevant_docs)} RELEVANT DOCUMENTS---")
         return relevant_docs
 
-def grade_documents(state: GraphState) -> Dict[str, Any]:
+def grade_documents(state: GraphState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
     """
     Grade and filter documents based on their relevance to the question.
     
     Args:
         state: Current graph state containing documents and question
+        config: Runnable config of the graph invocation
         
     Returns:
-        Updated state with filtered relevant documents
+        Updated state with filtered relevant documents and the
+        conversation's working set
     """
     print("---GRADE DOCUMENTS---")
     
     question = state["question"]
-    documents = state["documents"]
+    documents = StateDocuments.read(state, config)
     web_search = state.get("web_search", False)
     
     # Filter documents based on relevance
-    filtered_docs = DocumentGrader.filter_relevant_documents(question, documents)
+    filtered_docs = DocumentGrader.filter_relevant_documents(question, documents, config)
+    
+    working_set = document_service.get_retriever().extend_working_set(state.get("working_set"), filtered_docs)
     
     return {
-        "documents": filtered_docs,
+        **StateDocuments.write(filtered_docs, config),
         "question": question,
-        "web_search": web_search
+        "web_search": web_search,
+        "working_set": working_set
     }
\ No newline at end of file
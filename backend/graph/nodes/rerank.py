@@ -0,0 +1,36 @@
+"""
+Module for reranking candidate documents before relevance grading.
+Keeps only the most relevant and diverse candidates for the LLM grader.
+"""
+
+from typing import Any, Dict, Optional
+from langchain_core.runnables import RunnableConfig
+from backend.document_processor.service import document_service
+from backend.graph.content_store import StateDocuments
+from backend.graph.state import GraphState
+
+def rerank(state: GraphState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
+    """
+    Rerank candidate documents with their stored embeddings.
+    
+    Args:
+        state: Current graph state containing candidates and query embedding
+        config: Runnable config of the graph invocation
+        
+    Returns:
+        Updated state with the selected documents
+    """
+    print("---RERANK DOCUMENTS---")
+    
+    documents = StateDocuments.read(state, config)
+    query_embedding = StateDocuments.read_embedding(state, config)
+    retriever = document_service.get_retriever()
+    
+    if query_embedding is None or len(documents) <= retriever.k:
+        print("---NOTHING TO RERANK---")
+        return {}
+    
+    selected = retriever.rerank(query_embedding, documents)
+    print(f"---KEPT {len(selected)} OF {len(documents)} CANDIDATES---")
+    
+    return StateDocuments.write(selected, config)
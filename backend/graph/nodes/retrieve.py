@@ -3,64 +3,44 @@ Module for retrieving relevant documents from the vector store.
 Handles document retrieval and search operations.
 """
 
-from typing import Any, Dict, List
-from langchain.schema import Document
+from typing import Any, Dict, Optional
+from langchain_core.runnables import RunnableConfig
 from backend.document_processor.service import document_service
+from backend.graph.content_store import StateDocuments
 from backend.graph.state import GraphState
 
-class DocumentRetriever:
+def retrieve(state: GraphState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
     """
-    Handles document retrieval operations using vector store.
-    """
-
-    def __init__(self, k: int = 4):
-        """
-        Initialize the retriever with configuration.
-        
-        Args:
-            k: Number of documents to retrieve
-        """
-        self.k = k
-        self._setup_retriever()
-
-    def _setup_retriever(self) -> None:
-        """Set up the vector store retriever."""
-        self.vector_store = document_service.get_vector_store()
-        self.retriever = self.vector_store.get_retriever()
-        self.retriever.search_kwargs = {"k": self.k}
-
-    def search_documents(self, query: str) -> List[Document]:
-        """
-        Search for relevant documents using the query.
-        
-        Args:
-            query: Search query string
-            
-        Returns:
-            List of relevant documents
-        """
-        print(f"---SEARCHING FOR DOCUMENTS WITH QUERY: {query}---")
-        documents = self.retriever.invoke(query)
-        print(f"---FOUND {len(documents)} DOCUMENTS---")
-        return documents
-
-def retrieve(state: GraphState) -> Dict[str, Any]:
-    """
-    Retrieve relevant documents for a given question.
+    Retrieve scored candidate documents for a given question.
+    
+    Candidates below the configured score threshold are already dropped,
+    so an empty list means the store has nothing relevant.
     
     Args:
         state: Current graph state containing the question
+        config: Runnable config of the graph invocation
         
     Returns:
-        Updated state with retrieved documents
+        Updated state with candidate documents and the query embedding
     """
     print("---RETRIEVE DOCUMENTS---")
     
     question = state["question"]
-    retriever = DocumentRetriever()
-    documents = retriever.search_documents(question)
+    print(f"---SEARCHING FOR DOCUMENTS WITH QUERY: {question}---")
+    retriever = document_service.get_retriever()
+    # Follow-up questions are scored against the conversation's chunks first
+    conversation = ((config or {}).get("configurable") or {}).get("thread_id")
+    working_set = retriever.get_working_set(conversation, state.get("working_set"))
+    # The question is embedded once per request, repeated questions hit the cache
+    query_embedding = StateDocuments.read_embedding(state, config)
+    filters = state.get("filters")
+    if filters:
+        print(f"---FILTERING DOCUMENTS BY {filters}---")
+    documents, query_embedding = retriever.retrieve_with_scores(question, working_set, query_embedding, filters)
+    print(f"---FOUND {len(documents)} CANDIDATE DOCUMENTS---")
     
     return {
-        "documents": documents,
+        **StateDocuments.write(documents, config),
+        **StateDocuments.write_embedding(question, query_embedding, config),
         "question": question
-    }
\ No newline at end of file
+    }
@@ -3,31 +3,37 @@ Module for performing web searches and processing results.
 Handles web queries and document conversion using Tavily Search API.
 """
 
-from typing import Any, Dict, List
-from langchain.schema import Document
+from typing import Any, Dict, List, Optional
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
 from langchain_community.tools.tavily_search import TavilySearchResults
+from backend.graph.content_store import StateDocuments
 from backend.graph.state import GraphState
 from dotenv import load_dotenv
 
+# Key of a search tool replacing Tavily in `config["configurable"]`
+SEARCH_TOOL_KEY = "search_tool"
+
 class WebSearcher:
     """
     Handles web search operations using Tavily Search API.
     """
 
-    def __init__(self, max_results: int = 3):
+    def __init__(self, max_results: int = 3, search_tool: Optional[Any] = None):
         """
         Initialize the web searcher with configuration.
         
         Args:
             max_results: Maximum number of search results to retrieve
+            search_tool: Tool used instead of Tavily, e.g. during warmup
         """
         load_dotenv()
         self.max_results = max_results
-        self._setup_search_tool()
+        self._setup_search_tool(search_tool)
 
-    def _setup_search_tool(self) -> None:
+    def _setup_search_tool(self, search_tool: Optional[Any] = None) -> None:
         """Set up the Tavily search tool."""
-        self.search_tool = TavilySearchResults(max_results=self.max_results)
+        self.search_tool = search_tool or TavilySearchResults(max_results=self.max_results)
 
     def _process_results(self, results: List[Dict[str, str]]) -> Document:
         """
@@ -61,12 +67,13 @@ class WebSearcher:
         results = self.search_tool.invoke({"query": query})
         return self._process_results(results)
 
-def web_search(state: GraphState) -> Dict[str, Any]:
+def web_search(state: GraphState, config: Optional[RunnableConfig] = None) -> Dict[str, Any]:
     """
     Perform web search for a given question and update state.
     
     Args:
         state: Current graph state containing question and context
+        config: Runnable config of the graph invocation
         
     Returns:
         Updated state with web search results
@@ -75,16 +82,15 @@ def web_search(state: GraphState) -> Dict[str, Any]:
     
     # Get state variables
     question = state["question"]
-    documents = state.get("documents", [])
+    documents = StateDocuments.read(state, config)
     generation_attempts = state.get("generation_attempts", 0)
 
     # Perform web search
-    searcher = WebSearcher()
+    searcher = WebSearcher(search_tool=((config or {}).get("configurable") or {}).get(SEARCH_TOOL_KEY))
     web_results = searcher.search(question)
-    documents.append(web_results)
     
     return {
-        "documents": documents,
+        **StateDocuments.write(documents + [web_results], config),
         "question": question,
         "web_search": True,
         "generation_attempts": generation_attempts,
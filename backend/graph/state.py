@@ -1,5 +1,5 @@
-from typing import List, TypedDict, Optional, Dict
-from langchain.schema import Document
+from typing import Any, List, TypedDict, Optional, Dict
+from langchain_core.documents import Document
 from datetime import datetime
 
 class ChatMessage(TypedDict):
@@ -9,6 +9,11 @@ class ChatMessage(TypedDict):
     timestamp: str
     documents_used: Optional[List[str]]  # Lista de fuentes usadas
 
+class DocumentRef(TypedDict):
+    """References a document kept in the request's content store."""
+    id: str
+    score: Optional[float]  # Retrieval score, None for web results
+
 class GraphState(TypedDict, total=False):
     """
     Represents the state of our graph.
@@ -18,6 +23,10 @@ class GraphState(TypedDict, total=False):
         generation: LLM generation
         web_search: whether to add search
         documents: list of documents
+        document_refs: references to documents kept outside the state
+        query_embedding: embedding of the question used for retrieval
+        working_set: ids of chunks graded relevant in recent turns
+        filters: metadata filters restricting retrieval
         generation_attempts: counter for generation attempts
         chat_history: history of all interactions
     """
@@ -33,9 +42,46 @@ class GraphState(TypedDict, total=False):
     
     documents: Optional[List[Document]]
     """Documents retrieved from vector store."""
+
+    document_refs: Optional[List[DocumentRef]]
+    """Ids and scores of the documents when a content store is configured."""
+
+    query_embedding: Optional[List[float]]
+    """Embedding of the question, reused to rerank candidates."""
+
+    working_set: Optional[List[str]]
+    """Chunks graded relevant in recent turns, oldest first; kept across turns."""
+
+    filters: Optional[Dict[str, Any]]
+    """Metadata filters applied inside the vector search, e.g. {"source": "report.pdf"}."""
     
     generation_attempts: Optional[int]
     """Counter for generation attempts."""
     
     chat_history: List[ChatMessage]
-    """History of all interactions."""
\ No newline at end of file
+    """History of all interactions."""
+
+def new_turn(question: str, filters: Optional[Dict[str, Any]] = None) -> GraphState:
+    """
+    Build the input of a conversation turn.
+
+    With a checkpointer the state of the previous turn is restored, so the
+    per-turn fields are reset here while the chat history is kept.
+
+    Args:
+        question: Question of the turn
+        filters: Metadata filters of the turn
+
+    Returns:
+        Graph input for the turn
+    """
+    return GraphState(
+        question=question,
+        generation=None,
+        web_search=False,
+        documents=[],
+        document_refs=[],
+        query_embedding=None,
+        filters=filters,
+        generation_attempts=0
+    )
@@ -3,12 +3,29 @@ Module containing utility functions for graph state management and decisions.
 Handles state transitions and evaluation logic.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from langchain_core.runnables import RunnableConfig
+from backend.graph.content_store import StateDocuments
 from backend.graph.state import GraphState
 from backend.graph.chains.answer_grader import answer_grader
 from backend.graph.chains.hallucination_grader import hallucination_grader
 from backend.graph.chains.entry_classifier import entry_classifier
-from backend.graph.consts import RETRIEVE, GENERATE, WEBSEARCH
+from backend.graph.consts import RETRIEVE, RERANK, GENERATE, WEBSEARCH
+
+def decide_after_retrieval(state: GraphState) -> str:
+    """
+    Decide whether retrieved candidates are worth grading.
+    
+    Args:
+        state: Current graph state with candidate documents
+        
+    Returns:
+        Next node to execute in the graph
+    """
+    if not StateDocuments.has_documents(state):
+        print("---DECISION: ALL RETRIEVED DOCUMENTS SCORE LOW, GO TO WEB SEARCH---")
+        return WEBSEARCH
+    return RERANK
 
 def decide_next_step(state: GraphState) -> str:
     """
@@ -22,26 +39,30 @@ def decide_next_step(state: GraphState) -> str:
     """
     print("---ASSESS GRADED DOCUMENTS---")
     
-    if not state["documents"] or state["web_search"]:
+    if not StateDocuments.has_documents(state) or state["web_search"]:
         print("---DECISION: NO RELEVANT DOCUMENTS FOUND, GO TO WEB SEARCH---")
         return WEBSEARCH
     else:
         print("---DECISION: RELEVANT DOCUMENTS FOUND, GENERATE ANSWER---")
         return GENERATE
 
-def grade_generation_grounded_in_documents_and_question(state: GraphState) -> str:
+def grade_generation_grounded_in_documents_and_question(
+    state: GraphState,
+    config: Optional[RunnableConfig] = None
+) -> str:
     """
     Evaluate if generated response is grounded in documents and answers question.
     
     Args:
         state: Current graph state with generation and context
+        config: Runnable config of the graph invocation
         
     Returns:
         Decision on generation quality: 'useful', 'not useful', or 'not supported'
     """
     print("---CHECK GENERATION---")
     question = state["question"]
-    documents = state.get("documents", [])
+    documents = StateDocuments.read(state, config)
     generation = state["generation"]
 
     # Handle direct generation without documents
@@ -50,7 +71,7 @@ def grade_generation_grounded_in_documents_and_question(state: GraphState) -> st
         score = answer_grader.invoke({
             "question": question,
             "generation": generation
-        })
+        }, config=config)
         if score.binary_score:
             print("---DECISION: GENERATION ADDRESSES QUESTION---")
             return "useful"
@@ -71,7 +92,7 @@ def grade_generation_grounded_in_documents_and_question(state: GraphState) -> st
     score = hallucination_grader.invoke({
         "documents": documents,
         "generation": generation
-    })
+    }, config=config)
 
     if score.binary_score:
         print("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
@@ -79,7 +100,7 @@ def grade_generation_grounded_in_documents_and_question(state: GraphState) -> st
         score = answer_grader.invoke({
             "question": question,
             "generation": generation
-        })
+        }, config=config)
         if score.binary_score:
             print("---DECISION: GENERATION ADDRESSES QUESTION---")
             return "useful"
@@ -91,12 +112,13 @@ def grade_generation_grounded_in_documents_and_question(state: GraphState) -> st
               f"RE-TRY (Attempt {state['generation_attempts']}/3)---")
         return "not supported"
 
-def decide_entry_point(state: GraphState) -> str:
+def decide_entry_point(state: GraphState, config: Optional[RunnableConfig] = None) -> str:
     """
     Decide whether to search for information or generate directly.
     
     Args:
         state: Current graph state with question and chat history
+        config: Runnable config of the graph invocation
         
     Returns:
         Initial node to execute in the graph
@@ -109,7 +131,7 @@ def decide_entry_point(state: GraphState) -> str:
     decision = entry_classifier.invoke({
         "question": question,
         "chat_history": chat_history
-    })
+    }, config=config)
     
     if decision.needs_search:
         print("---DECISION: NEED TO SEARCH FOR INFORMATION---")
@@ -0,0 +1,250 @@
+"""
+Module warming up a process before it serves questions.
+Opens the document store, the model clients and the graphs, then runs a stubbed question through every node.
+
+Usage:
+    python -m backend.warmup --no-connect
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Optional
+
+# Run the warmup when the API server starts
+WARMUP_ON_START = os.getenv("WARMUP_ON_START", "true").lower() == "true"
+# Endpoint requested to open the pooled connections to the model provider
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+
+# Model name served by the stub chat model during the synthetic run
+WARMUP_MODEL = "warmup-stub"
+WARMUP_QUESTION = "What does the warmup question retrieve?"
+
+class Warmup:
+    """
+    Timed warmup of the expensive lazy state of a process.
+
+    Every step is timed and runs even when an earlier one failed, so the
+    report shows both what is slow and what is broken. The synthetic
+    question runs through the nodes with a stub chat model and search
+    tool selected through the runnable config, never through globals, so
+    it is safe while requests are being served and costs no API calls.
+    """
+
+    def __init__(self, connect: bool = True):
+        """
+        Initialize the warmup.
+
+        Args:
+            connect: Open connections to the model provider
+        """
+        self.connect = connect
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    def step(self, name: str, function: Callable[[], Any]) -> Any:
+        """
+        Run and time one step.
+
+        Args:
+            name: Name of the step in the report
+            function: Step to run
+
+        Returns:
+            Result of the step, None if it failed
+        """
+        start = time.perf_counter()
+        try:
+            return function()
+        except Exception as e:
+            # First line only, validation errors span several
+            self.errors[name] = f"{type(e).__name__}: {next(iter(str(e).splitlines()), '')}"
+            print(f"---WARMUP {name} FAILED: {self.errors[name]}---")
+            return None
+        finally:
+            self.timings[name] = time.perf_counter() - start
+            print(f"---WARMUP {name} {self.timings[name] * 1000:.1f}ms---")
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run every step.
+
+        Returns:
+            Report with the seconds of each step, the errors by step, the
+            total seconds and whether every step succeeded
+        """
+        start = time.perf_counter()
+        self.step("imports", self._import_modules)
+        self.step("vector_store", self._open_store)
+        embedding = self.step("index", self._touch_index)
+        if self.connect:
+            self.step("connections", self._open_connections)
+        self.step("models", self._create_models)
+        self.step("search_tool", self._create_search_tool)
+        self.step("graph", self._compile_graphs)
+        self._run_nodes(embedding)
+        return self.report(time.perf_counter() - start)
+
+    def report(self, total: float) -> Dict[str, Any]:
+        """Build the report of the steps run so far."""
+        return {
+            "ready": not self.errors,
+            "total": total,
+            "timings": dict(self.timings),
+            "errors": dict(self.errors),
+        }
+
+    @staticmethod
+    def _import_modules() -> None:
+        import backend.graph.graph  # noqa: F401
+        import backend.document_processor.service  # noqa: F401
+
+    @staticmethod
+    def _open_store() -> None:
+        from backend.document_processor.service import document_service
+
+        document_service.get_retriever()
+
+    @staticmethod
+    def _touch_index() -> Optional[Any]:
+        """Search the store with a stored embedding, None if it is empty."""
+        from backend.document_processor.service import document_service
+
+        vector_store = document_service.get_vector_store()
+        for _, embeddings in vector_store.iter_records(1):
+            if len(embeddings):
+                vector_store.search_by_vector(embeddings[0], k=document_service.get_retriever().k)
+                return embeddings[0].tolist()
+        print("---WARMUP: DOCUMENT STORE IS EMPTY---")
+        return None
+
+    @staticmethod
+    def _open_connections() -> None:
+        """Open a keep-alive connection of the shared sync client."""
+        from backend.graph.chains.llm import _get_http_clients
+
+        http_client, _ = _get_http_clients()
+        # Any status will do, the connection stays in the pool
+        http_client.get(f"{OPENAI_BASE_URL.rstrip('/')}/models")
+
+    @staticmethod
+    def _create_models() -> None:
+        """Create the default model client and build every chain on it."""
+        from backend.graph.chains.answer_grader import answer_grader
+        from backend.graph.chains.entry_classifier import entry_classifier
+        from backend.graph.chains.generation import generation_chain
+        from backend.graph.chains.hallucination_grader import hallucination_grader
+        from backend.graph.chains.llm import DEFAULT_MODEL
+        from backend.graph.chains.retrieval_grader import retrieval_grader
+
+        for chain in (entry_classifier, retrieval_grader, generation_chain, hallucination_grader, answer_grader):
+            chain.chains.get(DEFAULT_MODEL)
+
+    @staticmethod
+    def _create_search_tool() -> None:
+        from backend.graph.nodes.web_search import WebSearcher
+
+        WebSearcher()
+
+    @staticmethod
+    def _compile_graphs() -> None:
+        from backend.graph.graph import PROFILES, get_app, get_conversation_app
+
+        for profile in PROFILES:
+            get_app(profile)
+            get_conversation_app(profile)
+
+    def _run_nodes(self, embedding: Optional[Any]) -> None:
+        """
+        Run a synthetic question through every node and router.
+
+        Args:
+            embedding: Query embedding matching the store, None to skip
+                retrieval since embedding the question would call the provider
+        """
+        from langchain_core.documents import Document
+
+        from backend.fakes import FakeChatModel, FakeSearchTool
+        from backend.graph.chains.llm import model_registry
+        from backend.graph.nodes import generate, grade_documents, rerank, retrieve, web_search
+        from backend.graph.nodes.web_search import SEARCH_TOOL_KEY
+        from backend.graph.utils import (
+            decide_entry_point,
+            decide_next_step,
+            grade_generation_grounded_in_documents_and_question,
+        )
+
+        config = {"configurable": {"model": WARMUP_MODEL, SEARCH_TOOL_KEY: FakeSearchTool()}}
+        state: Dict[str, Any] = {
+            "question": WARMUP_QUESTION,
+            "documents": [],
+            "query_embedding": embedding,
+            "chat_history": [],
+            "generation_attempts": 0,
+            "web_search": False,
+        }
+
+        def node(name: str, function: Callable[..., Dict[str, Any]]) -> None:
+            update = self.step(f"node.{name}", lambda: function(state, config))
+            state.update(update or {})
+
+        model_registry.register(WARMUP_MODEL, FakeChatModel())
+        try:
+            self.step("router.decide_entry_point", lambda: decide_entry_point(state, config))
+            if embedding is not None:
+                node("retrieve", retrieve)
+                node("rerank", rerank)
+            if not state["documents"]:
+                state["documents"] = [Document(page_content=WARMUP_QUESTION, metadata={"source": "warmup"})]
+            node("grade_documents", grade_documents)
+            self.step("router.decide_next_step", lambda: decide_next_step(state))
+            node("generate", generate)
+            self.step(
+                "router.grade_generation",
+                lambda: grade_generation_grounded_in_documents_and_question(state, config)
+            )
+            node("web_search", web_search)
+        finally:
+            model_registry.unregister(WARMUP_MODEL)
+
+def run_warmup(connect: bool = True) -> Dict[str, Any]:
+    """
+    Warm up the process.
+
+    Args:
+        connect: Open connections to the model provider
+
+    Returns:
+        Warmup report, see `Warmup.run`
+    """
+    print("---WARMUP---")
+    report = Warmup(connect).run()
+    print(f"---WARMUP {'DONE' if report['ready'] else 'FAILED'} IN {report['total']:.2f}s---")
+    return report
+
+async def open_async_connections() -> None:
+    """
+    Open a keep-alive connection of the shared async client.
+
+    Must run on the event loop serving requests, since async
+    connections belong to the loop that opened them.
+    """
+    from backend.graph.chains.llm import _get_http_clients
+
+    _, http_async_client = _get_http_clients()
+    await http_async_client.get(f"{OPENAI_BASE_URL.rstrip('/')}/models")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Warm up the RAG process and report the timings")
+    parser.add_argument("--no-connect", action="store_true", help="Do not open connections to the model provider")
+    args = parser.parse_args()
+
+    report = run_warmup(connect=not args.no_connect)
+    for name, seconds in report["timings"].items():
+        status = f"FAILED: {report['errors'][name]}" if name in report["errors"] else "ok"
+        print(f"{name:32s} {seconds * 1000:10.1f}ms  {status}")
+    sys.exit(0 if report["ready"] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Offline benchmark suites for the RAG pipeline.
+All suites run against deterministic fakes and write their results as JSON.
+"""
@@ -0,0 +1,394 @@
+"""
+Record/replay cassettes for LLM, embedding and web search calls.
+In record mode real provider calls are captured with their timings; in replay
+mode they are served back deterministically from disk, optionally with the
+recorded latency.
+
+Usage:
+    python -m benchmarks.cassette record --cassette run.jsonl \\
+        --documents docs/report.pdf --questions questions.txt
+    python -m benchmarks.cassette replay --cassette run.jsonl \\
+        --documents docs/report.pdf --questions questions.txt --latency-scale 1.0
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from benchmarks.harness import (
+    BenchmarkResults,
+    patched_chains,
+    patched_search,
+    patched_vector_store,
+    summarize,
+)
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Chat history entries carry wall-clock timestamps that end up in prompts
+_TIMESTAMP_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?")
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when a request was never recorded."""
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, type) and issubclass(value, BaseModel):
+        return value.model_json_schema()
+    return str(value)
+
+def _to_json(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=_json_default))
+
+class Cassette:
+    """
+    Stores request/response pairs in a JSON lines file.
+
+    Requests are matched on a hash of their normalised content. When the
+    same request was recorded several times, replay serves the recordings
+    in order and then keeps returning the last one.
+    """
+
+    def __init__(self, path: str, mode: str = REPLAY, latency_scale: float = 0.0):
+        """
+        Initialize cassette.
+
+        Args:
+            path: JSON lines file holding the recordings
+            mode: 'record' to call providers and save, 'replay' to serve from disk
+            latency_scale: Fraction of the recorded latency to simulate on replay
+
+        Raises:
+            ValueError: If the mode is unknown
+            FileNotFoundError: If replaying a cassette that does not exist
+        """
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = {}
+        self.hits = 0
+        self.recorded = 0
+
+        if mode == REPLAY:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["key"], []).append(entry)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    @staticmethod
+    def key(kind: str, request: Any) -> str:
+        """
+        Compute the lookup key of a request.
+
+        Args:
+            kind: Type of call ('chat', 'embed_documents', 'embed_query', 'search')
+            request: JSON-serialisable request payload
+
+        Returns:
+            Hex digest identifying the request
+        """
+        canonical = json.dumps(request, sort_keys=True, default=_json_default)
+        canonical = _TIMESTAMP_PATTERN.sub("<timestamp>", canonical)
+        return hashlib.sha256(f"{kind}:{canonical}".encode("utf-8")).hexdigest()
+
+    def play(self, kind: str, request: Any, call: Callable[[], Any]) -> Any:
+        """
+        Serve a request from the cassette or record it.
+
+        Args:
+            kind: Type of call
+            request: Request payload used for matching
+            call: Performs the real call and returns a JSON-serialisable response
+
+        Returns:
+            Recorded or fresh response
+
+        Raises:
+            CassetteMiss: If replaying a request that was never recorded
+        """
+        key = self.key(kind, request)
+        if self.mode == RECORD:
+            start = time.perf_counter()
+            response = call()
+            entry = {
+                "key": key,
+                "kind": kind,
+                "request": _to_json(request),
+                "response": _to_json(response),
+                "elapsed": time.perf_counter() - start,
+            }
+            with self._lock:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+                self.recorded += 1
+            return entry["response"]
+
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(f"No recording for {kind} request {key[:12]}")
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            entry = entries[min(position, len(entries) - 1)]
+            self.hits += 1
+        if self.latency_scale:
+            time.sleep(entry["elapsed"] * self.latency_scale)
+        return entry["response"]
+
+class CassetteChatOpenAI(ChatOpenAI):
+    """
+    ChatOpenAI that records to or replays from a cassette.
+
+    Requests are matched on the exact payload that would be sent to the
+    API, so prompts, model, temperature and structured output schemas all
+    take part in the match.
+    """
+
+    cassette: Any = None
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        request = self._get_request_payload(messages, stop=stop, **kwargs)
+
+        def call() -> Dict[str, Any]:
+            result = super(CassetteChatOpenAI, self)._generate(
+                messages, stop=stop, run_manager=run_manager, **kwargs
+            )
+            return {
+                "generations": [
+                    {
+                        "message": message_to_dict(generation.message),
+                        "generation_info": generation.generation_info,
+                    }
+                    for generation in result.generations
+                ],
+                "llm_output": result.llm_output,
+            }
+
+        response = self.cassette.play("chat", request, call)
+        generations = [
+            ChatGeneration(
+                message=messages_from_dict([generation["message"]])[0],
+                generation_info=generation["generation_info"],
+            )
+            for generation in response["generations"]
+        ]
+        return ChatResult(generations=generations, llm_output=response["llm_output"])
+
+class CassetteEmbeddings(Embeddings):
+    """
+    Embeddings that record to or replay from a cassette.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        embeddings: Optional[Embeddings] = None,
+        model: Optional[str] = None
+    ):
+        """
+        Initialize cassette embeddings.
+
+        Args:
+            cassette: Cassette to record to or replay from
+            embeddings: Real embeddings, required in record mode
+            model: Embedding model name, part of the request match
+        """
+        self.cassette = cassette
+        self.embeddings = embeddings
+        self.model = model or getattr(embeddings, "model", None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of documents."""
+        return self.cassette.play(
+            "embed_documents",
+            {"model": self.model, "texts": texts},
+            lambda: self.embeddings.embed_documents(texts),
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query."""
+        return self.cassette.play(
+            "embed_query",
+            {"model": self.model, "text": text},
+            lambda: self.embeddings.embed_query(text),
+        )
+
+class CassetteSearchTool:
+    """
+    Web search tool that records to or replays from a cassette.
+    """
+
+    def __init__(self, cassette: Cassette, tool: Any = None, max_results: int = 3, **kwargs: Any):
+        """
+        Initialize cassette search tool.
+
+        Args:
+            cassette: Cassette to record to or replay from
+            tool: Real search tool, required in record mode
+            max_results: Number of results requested per query
+        """
+        self.cassette = cassette
+        self.tool = tool
+        self.max_results = max_results
+
+    def invoke(self, inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Run a search for `inputs['query']`."""
+        return self.cassette.play(
+            "search",
+            {"max_results": self.max_results, **inputs},
+            lambda: self.tool.invoke(inputs),
+        )
+
+@contextmanager
+def use_cassette(
+    cassette: Cassette,
+    vector_store_directory: str,
+    model: str = "gpt-4o-mini",
+    embedding_model: str = "text-embedding-ada-002"
+) -> Iterator[Any]:
+    """
+    Route every LLM, embedding and search call of the graph through a cassette.
+
+    Args:
+        cassette: Cassette to record to or replay from
+        vector_store_directory: Directory for a fresh vector store
+        model: Chat model used by all chains
+        embedding_model: Embedding model used by the vector store
+
+    Yields:
+        Vector store whose embeddings go through the cassette
+    """
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    from langchain_openai import OpenAIEmbeddings
+
+    from backend.document_processor import ChromaVectorStore
+
+    recording = cassette.mode == RECORD
+    llm = CassetteChatOpenAI(
+        model=model,
+        temperature=0,
+        cassette=cassette,
+        api_key=None if recording else "replay",
+    )
+    embeddings = CassetteEmbeddings(
+        cassette,
+        OpenAIEmbeddings(model=embedding_model) if recording else None,
+        model=embedding_model,
+    )
+    store = ChromaVectorStore(
+        collection_name="cassette",
+        persist_directory=vector_store_directory,
+        embedding_function=embeddings,
+    )
+
+    def search_factory(**kwargs: Any) -> CassetteSearchTool:
+        return CassetteSearchTool(cassette, TavilySearchResults(**kwargs) if recording else None, **kwargs)
+
+    with patched_chains(llm), patched_search(search_factory), patched_vector_store(store):
+        yield store
+
+def run(args: argparse.Namespace) -> BenchmarkResults:
+    """
+    Ingest documents and answer questions through the cassette.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Per-question latencies and node time shares
+    """
+    from backend.document_processor import get_document_loader
+    from backend.document_processor.service import document_service
+    from backend.graph.graph import get_app
+    from benchmarks.load import NodeTimer
+
+    if args.mode == REPLAY:
+        os.environ.setdefault("OPENAI_API_KEY", "replay")
+        os.environ.setdefault("TAVILY_API_KEY", "replay")
+    elif os.path.exists(args.cassette):
+        os.remove(args.cassette)
+
+    with open(args.questions, encoding="utf-8") as f:
+        questions = [line.strip() for line in f if line.strip()]
+
+    cassette = Cassette(args.cassette, mode=args.mode, latency_scale=args.latency_scale)
+    results = BenchmarkResults(f"cassette-{args.mode}")
+    workdir = tempfile.mkdtemp(prefix="rag-cassette-")
+    try:
+        app = get_app()
+        with use_cassette(cassette, os.path.join(workdir, "chroma"), args.model):
+            if args.documents:
+                # The service's own splitter and deduplicator, on the cassette store
+                ingester = document_service.get_ingester()
+                start = time.perf_counter()
+                ingester.process_documents(get_document_loader(args.documents))
+                results.add("ingest", {"seconds": time.perf_counter() - start})
+
+            timer = NodeTimer()
+            latencies = []
+            for index, question in enumerate(questions):
+                start = time.perf_counter()
+                app.invoke(input={"question": question, "chat_history": []}, config={"callbacks": [timer]})
+                latencies.append(time.perf_counter() - start)
+                results.add(f"question.{index}", {"seconds": latencies[-1]}, question=question)
+
+            total_time = sum(timer.totals.values()) or 1.0
+            results.add(
+                "questions",
+                summarize(latencies),
+                node_share={name: total / total_time for name, total in timer.totals.items()},
+                node_calls=dict(timer.counts),
+                cassette_hits=cassette.hits,
+                cassette_recorded=cassette.recorded,
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    results.write(args.output)
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Record or replay provider calls of the RAG graph")
+    parser.add_argument("mode", choices=[RECORD, REPLAY], help="Record real calls or replay them")
+    parser.add_argument("--cassette", required=True, help="JSON lines cassette file")
+    parser.add_argument("--questions", required=True, help="Text file with one question per line")
+    parser.add_argument("--documents", nargs="*", default=[], help="Documents to ingest first")
+    parser.add_argument("--model", default="gpt-4o-mini", help="Chat model used by the chains")
+    parser.add_argument(
+        "--latency-scale", type=float, default=0.0,
+        help="Fraction of the recorded latency simulated on replay"
+    )
+    parser.add_argument("--output", default="bench_results_cassette.json", help="JSON result file")
+    run(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare two benchmark result files and report regressions.
+
+Usage:
+    python -m benchmarks.compare baseline.json current.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    metric: str = "p50",
+    threshold: float = 0.10
+) -> List[Tuple[str, float, float, float]]:
+    """
+    Compare a latency metric between two result sets.
+
+    Args:
+        baseline: Parsed baseline result file
+        current: Parsed current result file
+        metric: Latency metric to compare
+        threshold: Relative slowdown reported as a regression
+
+    Returns:
+        List of (name, baseline value, current value, relative change)
+        for every benchmark slower than the threshold
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name, {}).get(metric)
+        after = result.get(metric)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        print(f"{name:<55} {before:>12.6f} {after:>12.6f} {change:>+8.1%}")
+        if change > threshold:
+            regressions.append((name, before, after, change))
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare benchmark results")
+    parser.add_argument("baseline", help="Baseline JSON result file")
+    parser.add_argument("current", help="Current JSON result file")
+    parser.add_argument("--metric", default="p50", help="Metric to compare")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10,
+        help="Relative slowdown reported as a regression"
+    )
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    print(f"Comparing {baseline.get('commit')} -> {current.get('commit')} ({args.metric})")
+    regressions = compare(baseline, current, args.metric, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}:")
+        for name, _, _, change in regressions:
+            print(f"  {name}: {change:+.1%}")
+        sys.exit(1)
+    print("\nNo regressions found.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+"""
+Component micro-benchmarks for the RAG pipeline.
+Measures loaders, splitting, vector storage, context formatting and graph nodes
+in isolation, fully offline.
+
+Usage:
+    python -m benchmarks.components --output bench_results.json
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import Callable, Dict, List
+
+import docx
+from langchain_core.documents import Document
+
+from benchmarks.harness import (
+    BenchmarkResults,
+    make_corpus,
+    measure,
+    patched_chains,
+    patched_search,
+    patched_vector_store,
+    write_pdf,
+)
+from backend.fakes import FakeChatModel, FakeEmbeddings, FakeSearchTool, fake_encoding
+
+def _write_docx(path: str, paragraphs: List[str]) -> None:
+    """Write a DOCX file with the given paragraphs."""
+    document = docx.Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    document.save(path)
+
+def _create_sample_files(directory: str, scale: int) -> Dict[str, str]:
+    """
+    Create one sample file per supported format.
+
+    Args:
+        directory: Directory to write the files to
+        scale: Multiplier for file sizes
+
+    Returns:
+        Mapping of format extension to file path
+    """
+    texts = make_corpus(20 * scale, words_per_doc=400, seed=1)
+    paths = {
+        "txt": os.path.join(directory, "sample.txt"),
+        "docx": os.path.join(directory, "sample.docx"),
+        "pdf": os.path.join(directory, "sample.pdf"),
+    }
+    with open(paths["txt"], "w", encoding="utf-8") as f:
+        f.write("\n\n".join(texts))
+    _write_docx(paths["docx"], [p for text in texts for p in text.split("\n\n")])
+    write_pdf(paths["pdf"], texts)
+    return paths
+
+def bench_loaders(results: BenchmarkResults, workdir: str, scale: int, repeat: int) -> None:
+    """Benchmark every document loader on a sample file of its format."""
+    from backend.document_processor import PDFLoader, get_document_loader
+
+    paths = _create_sample_files(workdir, scale)
+    loaders = {extension: get_document_loader([path]) for extension, path in paths.items()}
+    # Parse every repetition, then measure re-ingesting from the page cache
+    loaders["pdf"] = PDFLoader([paths["pdf"]], cache_directory=None)
+    loaders["pdf_cached"] = PDFLoader([paths["pdf"]], cache_directory=os.path.join(workdir, "pdf_cache"))
+    paths["pdf_cached"] = paths["pdf"]
+    for extension, loader in loaders.items():
+        size_mb = os.path.getsize(paths[extension]) / 1e6
+        stats = measure(loader.load, repeat=repeat)
+        results.add(
+            f"loader.{extension}",
+            stats,
+            file_mb=size_mb,
+            mb_per_s=size_mb / stats["p50"],
+        )
+
+def bench_docx_extraction(results: BenchmarkResults, workdir: str, scale: int, repeat: int) -> None:
+    """Benchmark streaming DOCX extraction against the python-docx object model."""
+    from backend.document_processor import DocxLoader
+
+    document = docx.Document()
+    for text in make_corpus(400 * scale, words_per_doc=400, seed=3):
+        for paragraph in text.split("\n\n"):
+            document.add_paragraph(paragraph)
+    table = document.add_table(rows=0, cols=3)
+    for index in range(1000 * scale):
+        cells = table.add_row().cells
+        for column in range(3):
+            cells[column].text = f"row {index} column {column} " * 5
+    path = os.path.join(workdir, "large.docx")
+    document.save(path)
+    xml_mb = zipfile.ZipFile(path).getinfo("word/document.xml").file_size / 1e6
+
+    def object_model() -> str:
+        return "\n".join(paragraph.text for paragraph in docx.Document(path).paragraphs)
+
+    for name, extract in [
+        ("docx.python_docx", object_model),
+        ("docx.streaming", lambda: "\n".join(DocxLoader.iter_blocks(path))),
+    ]:
+        stats = measure(extract, repeat=repeat)
+        results.add(name, stats, xml_mb=xml_mb, mb_per_s=xml_mb / stats["p50"], chars=len(extract()))
+
+def bench_splitter(results: BenchmarkResults, scale: int, repeat: int) -> None:
+    """Benchmark RecursiveTextSplitter throughput."""
+    from backend.document_processor import RecursiveTextSplitter
+
+    documents = [
+        Document(page_content=text, metadata={"source": f"doc-{i}"})
+        for i, text in enumerate(make_corpus(200 * scale, words_per_doc=1000, seed=2))
+    ]
+    total_mb = sum(len(doc.page_content) for doc in documents) / 1e6
+    splitter = RecursiveTextSplitter(chunk_size=1000, chunk_overlap=100)
+    stats = measure(lambda: splitter.split_documents(documents), repeat=repeat)
+    results.add(
+        "splitter.recursive",
+        stats,
+        input_mb=total_mb,
+        mb_per_s=total_mb / stats["p50"],
+        chunks=len(splitter.split_documents(documents)),
+    )
+
+def bench_token_splitter(results: BenchmarkResults, scale: int, repeat: int) -> None:
+    """Benchmark TikTokenTextSplitter throughput."""
+    from backend.document_processor import TikTokenTextSplitter
+
+    documents = [
+        Document(page_content=text, metadata={"source": f"doc-{i}"})
+        for i, text in enumerate(make_corpus(200 * scale, words_per_doc=1000, seed=2))
+    ]
+    total_mb = sum(len(doc.page_content) for doc in documents) / 1e6
+    # Offline encoding, the real ones have to be downloaded
+    encoding = fake_encoding([doc.page_content for doc in documents])
+    splitter = TikTokenTextSplitter(chunk_size=250, chunk_overlap=25, encoding=encoding)
+    stats = measure(lambda: splitter.split_documents(documents), repeat=repeat)
+    results.add(
+        "splitter.token",
+        stats,
+        input_mb=total_mb,
+        mb_per_s=total_mb / stats["p50"],
+        chunks=len(splitter.split_documents(documents)),
+    )
+
+def bench_dedup(results: BenchmarkResults, scale: int, repeat: int) -> None:
+    """Benchmark near-duplicate collapsing on a corpus of revised documents."""
+    from backend.document_processor import NearDuplicateFilter
+
+    chunks = _make_chunks(1000 * scale, seed=4)
+    # Every third chunk reappears in a later revision with one word changed
+    revisions = [
+        Document(
+            page_content=doc.page_content.replace(" ", " revised ", 1),
+            metadata={"source": doc.metadata["source"].replace(".txt", "-v2.txt")},
+        )
+        for doc in chunks[::3]
+    ]
+    documents = chunks + revisions
+    dedup = NearDuplicateFilter()
+    stats = measure(lambda: dedup.deduplicate(documents), repeat=repeat)
+    _, report = dedup.deduplicate(documents)
+    results.add(
+        "ingest.dedup",
+        stats,
+        chunks_per_s=len(documents) / stats["p50"],
+        revised_chunks=len(revisions),
+        **report,
+    )
+
+def _make_store(workdir: str, name: str):
+    from backend.document_processor import ChromaVectorStore
+
+    return ChromaVectorStore(
+        collection_name=name,
+        persist_directory=os.path.join(workdir, name),
+        embedding_function=FakeEmbeddings(),
+    )
+
+def _make_chunks(n_chunks: int, seed: int = 3) -> List[Document]:
+    return [
+        Document(page_content=text, metadata={"source": f"doc-{i // 10}.txt"})
+        for i, text in enumerate(make_corpus(n_chunks, words_per_doc=150, seed=seed))
+    ]
+
+def bench_vector_store(
+    results: BenchmarkResults,
+    workdir: str,
+    sizes: List[int],
+    repeat: int
+) -> None:
+    """Benchmark store_documents and retrieval latency against corpus size."""
+    queries = make_corpus(20, words_per_doc=8, seed=4)
+    for size in sizes:
+        chunks = _make_chunks(size)
+        store = _make_store(workdir, f"bench-store-{size}")
+        stats = measure(lambda: store.store_documents(chunks), repeat=1, warmup=0)
+        results.add(
+            f"vector_store.store_documents.{size}",
+            stats,
+            chunks_per_s=size / stats["p50"],
+        )
+
+        retriever = store.get_retriever()
+        query_iter = iter(queries * (repeat * 10 + 10))
+        stats = measure(lambda: retriever.invoke(next(query_iter)), repeat=repeat * 10)
+        results.add(f"vector_store.retrieve.{size}", stats)
+
+def bench_quantized_store(
+    results: BenchmarkResults,
+    workdir: str,
+    sizes: List[int],
+    repeat: int
+) -> None:
+    """Benchmark quantized search latency, recall@10 and code memory."""
+    from backend.document_processor import QuantizedVectorStore
+
+    embeddings = FakeEmbeddings()
+    queries = [embeddings.embed_query(text) for text in make_corpus(20, words_per_doc=8, seed=4)]
+    for size in sizes:
+        chunks = _make_chunks(size)
+        for quantization in ("int8", "binary"):
+            store = QuantizedVectorStore(
+                persist_directory=os.path.join(workdir, f"bench-{quantization}-{size}"),
+                quantization=quantization,
+                embedding_function=embeddings,
+            )
+            store.store_documents(chunks)
+            query_iter = iter(queries * (repeat * 10 + 10))
+            stats = measure(lambda: store.search_by_vector(next(query_iter), k=20), repeat=repeat * 10)
+            results.add(
+                f"vector_store.quantized.{quantization}.{size}",
+                stats,
+                recall_at_10=store.recall_at_k(queries, k=10),
+                bytes_per_vector=store.memory_bytes() / size,
+            )
+
+def bench_context_formatting(results: BenchmarkResults, repeat: int) -> None:
+    """Benchmark formatting of retrieved documents into prompt context."""
+    from backend.graph.chains.hallucination_grader import hallucination_grader
+    from backend.graph.nodes.generate import ResponseGenerator
+
+    for n_docs in (4, 32):
+        documents = _make_chunks(n_docs, seed=5)
+        stats = measure(lambda: ResponseGenerator._format_context(documents), repeat=repeat * 20)
+        results.add(f"context.generate.{n_docs}", stats)
+        stats = measure(
+            lambda: hallucination_grader._format_documents(documents),
+            repeat=repeat * 20
+        )
+        results.add(f"context.hallucination.{n_docs}", stats)
+
+def _bench_node(
+    results: BenchmarkResults,
+    name: str,
+    node: Callable,
+    make_state: Callable[[], dict],
+    repeat: int
+) -> None:
+    stats = measure(lambda: node(make_state()), repeat=repeat)
+    results.add(f"node.{name}", stats)
+
+def bench_nodes(results: BenchmarkResults, workdir: str, repeat: int) -> None:
+    """Benchmark every graph node and router with stubbed chains."""
+    from backend.document_processor.service import document_service
+    from backend.graph.nodes import generate, grade_documents, rerank, retrieve, web_search
+    from backend.graph.utils import (
+        decide_entry_point,
+        decide_next_step,
+        grade_generation_grounded_in_documents_and_question,
+    )
+
+    store = _make_store(workdir, "bench-nodes")
+    store.store_documents(_make_chunks(1000, seed=6))
+    documents = _make_chunks(4, seed=7)
+    question = "how does agent memory work with vector retrieval"
+    history = [
+        {"role": "user", "content": "hello", "timestamp": "", "documents_used": None},
+        {"role": "assistant", "content": "hi", "timestamp": "", "documents_used": None},
+    ]
+
+    def state(**extra) -> dict:
+        return {
+            "question": question,
+            "documents": list(documents),
+            "chat_history": list(history),
+            "generation": "Agents store memories in a vector store.",
+            "generation_attempts": 1,
+            "web_search": False,
+            **extra,
+        }
+
+    with patched_chains(FakeChatModel()), \
+            patched_search(FakeSearchTool), \
+            patched_vector_store(store):
+        _bench_node(results, "retrieve", retrieve, state, repeat * 5)
+        # The fake embeddings score below the retriever's threshold, so take
+        # the store's top fetch_k directly, enough candidates for MMR to run
+        retriever = document_service.get_retriever()
+        retriever.search_type = "mmr"
+        query_embedding = store.embed_query(question)
+        candidates = store.search_by_vector(query_embedding, k=retriever.fetch_k)
+        if len(candidates) <= retriever.k:
+            raise ValueError(f"Rerank needs more than {retriever.k} candidates, got {len(candidates)}")
+        _bench_node(
+            results,
+            "rerank",
+            rerank,
+            lambda: state(documents=list(candidates), query_embedding=query_embedding),
+            repeat * 5
+        )
+        _bench_node(results, "grade_documents", grade_documents, state, repeat * 5)
+        _bench_node(results, "generate", generate, state, repeat * 5)
+        _bench_node(results, "web_search", web_search, state, repeat * 5)
+        _bench_node(results, "router.decide_entry_point", decide_entry_point, state, repeat * 5)
+        _bench_node(results, "router.decide_next_step", decide_next_step, state, repeat * 5)
+        _bench_node(
+            results,
+            "router.grade_generation",
+            grade_generation_grounded_in_documents_and_question,
+            state,
+            repeat * 5
+        )
+
+def run(output: str, sizes: List[int], scale: int, repeat: int) -> BenchmarkResults:
+    """
+    Run the full component suite.
+
+    Args:
+        output: Path of the JSON result file
+        sizes: Corpus sizes (in chunks) for vector store benchmarks
+        scale: Multiplier for loader and splitter input sizes
+        repeat: Base number of timed repetitions
+
+    Returns:
+        Collected benchmark results
+    """
+    results = BenchmarkResults("components")
+    workdir = tempfile.mkdtemp(prefix="rag-bench-")
+    try:
+        bench_loaders(results, workdir, scale, repeat)
+        bench_docx_extraction(results, workdir, scale, repeat)
+        bench_splitter(results, scale, repeat)
+        bench_token_splitter(results, scale, repeat)
+        bench_dedup(results, scale, repeat)
+        bench_vector_store(results, workdir, sizes, repeat)
+        bench_quantized_store(results, workdir, sizes, repeat)
+        bench_context_formatting(results, repeat)
+        bench_nodes(results, workdir, repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    results.write(output)
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline component micro-benchmarks")
+    parser.add_argument("--output", default="bench_results.json", help="JSON result file")
+    parser.add_argument(
+        "--sizes", default="100,1000,5000",
+        help="Comma separated corpus sizes (chunks) for vector store benchmarks"
+    )
+    parser.add_argument("--scale", type=int, default=1, help="Input size multiplier")
+    parser.add_argument("--repeat", type=int, default=5, help="Base number of repetitions")
+    args = parser.parse_args()
+    run(
+        output=args.output,
+        sizes=[int(size) for size in args.sizes.split(",")],
+        scale=args.scale,
+        repeat=args.repeat,
+    )
+
+if __name__ == "__main__":
+    main()
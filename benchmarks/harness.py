@@ -0,0 +1,264 @@
+"""
+Module with shared helpers for benchmark suites.
+Handles timing, result collection, sample files, offline patching and JSON output.
+"""
+
+import importlib
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from unittest import mock
+
+_VOCABULARY = (
+    "agent memory planning tool retrieval vector embedding graph node state "
+    "question answer document chunk context model prompt search index score "
+    "latency throughput cache batch token pizza dough oven cheese tomato "
+    "river mountain city history economy language science music art"
+).split()
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Compute a percentile using linear interpolation.
+
+    Args:
+        values: Samples
+        pct: Percentile between 0 and 100
+
+    Returns:
+        Interpolated percentile value
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """
+    Summarize latency samples in seconds.
+
+    Args:
+        samples: Latency samples
+
+    Returns:
+        Dictionary with count, min, mean, p50, p95, p99 and max
+    """
+    return {
+        "count": len(samples),
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples),
+    }
+
+def measure(
+    func: Callable[[], Any],
+    repeat: int = 5,
+    warmup: int = 1
+) -> Dict[str, float]:
+    """
+    Time repeated calls of a function.
+
+    Args:
+        func: Zero-argument callable to time
+        repeat: Number of timed calls
+        warmup: Number of untimed calls made first
+
+    Returns:
+        Latency summary as returned by `summarize`
+    """
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+def make_corpus(n_docs: int, words_per_doc: int = 300, seed: int = 0) -> List[str]:
+    """
+    Generate a deterministic synthetic corpus.
+
+    Args:
+        n_docs: Number of texts to produce
+        words_per_doc: Approximate number of words per text
+        seed: Random seed
+
+    Returns:
+        List of texts made of sentences and paragraphs
+    """
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n_docs):
+        words = []
+        for position in range(words_per_doc):
+            words.append(rng.choice(_VOCABULARY))
+            if position % 12 == 11:
+                words[-1] += "."
+            if position % 60 == 59:
+                words[-1] += "\n\n"
+        texts.append(" ".join(words))
+    return texts
+
+def write_pdf(path: str, pages: List[str]) -> None:
+    """
+    Write a minimal PDF with one text page per entry.
+
+    Args:
+        path: Output file path
+        pages: Text of each page
+    """
+    objects = [b"<</Type/Catalog/Pages 2 0 R>>", b""]
+    font_id = 3
+    objects.append(b"<</Type/Font/Subtype/Type1/BaseFont/Helvetica>>")
+    kids = []
+    for text in pages:
+        lines = [text[i:i + 90] for i in range(0, len(text), 90)][:60]
+        stream = b"BT /F1 10 Tf 40 760 Td 12 TL " + b"".join(
+            b"(" + line.encode("latin-1", "replace").replace(b"\\", b"").replace(b"(", b"").replace(b")", b"") + b") Tj T* "
+            for line in lines
+        ) + b"ET"
+        objects.append(b"<</Length %d>>stream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]"
+            b"/Resources<</Font<</F1 %d 0 R>>>>/Contents %d 0 R>>" % (font_id, content_id)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<</Type/Pages/Kids[%s]/Count %d>>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids)
+    )
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj" % number + body + b"endobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer<</Size %d/Root 1 0 R>>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(output)
+
+def git_commit() -> Optional[str]:
+    """Return the current git commit hash, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class BenchmarkResults:
+    """
+    Collects benchmark results and writes them to JSON.
+    """
+
+    def __init__(self, suite: str):
+        """
+        Initialize an empty result set.
+
+        Args:
+            suite: Name of the benchmark suite
+        """
+        self.suite = suite
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, name: str, stats: Dict[str, Any], **extra: Any) -> None:
+        """
+        Record the result of one benchmark.
+
+        Args:
+            name: Unique benchmark name
+            stats: Latency summary or other measurements
+            extra: Additional values such as throughput or sizes
+        """
+        self.results[name] = {**stats, **extra}
+        print(f"{name:<55} {json.dumps({k: _round(v) for k, v in self.results[name].items()})}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return results together with environment information."""
+        return {
+            "suite": self.suite,
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": self.results,
+        }
+
+    def write(self, path: str) -> None:
+        """Write results to a JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        print(f"Results written to {path}")
+
+def _round(value: Any) -> Any:
+    return round(value, 6) if isinstance(value, float) else value
+
+@contextmanager
+def patched_chains(llm: Any) -> Iterator[None]:
+    """
+    Serve every chain from `llm` through the model registry.
+
+    The chains keep their real prompts and output parsing, only the model
+    client is swapped, whatever model a request selects. The original
+    client factory is restored on exit.
+
+    Args:
+        llm: Chat model to use instead of ChatOpenAI
+    """
+    from backend.graph.chains.llm import model_registry
+
+    original_factory = model_registry.factory
+    model_registry.set_factory(lambda *args, **kwargs: llm)
+    try:
+        yield
+    finally:
+        model_registry.set_factory(original_factory)
+
+@contextmanager
+def patched_search(tool_factory: Callable[..., Any]) -> Iterator[None]:
+    """
+    Replace the Tavily search tool used by the web search node.
+
+    Args:
+        tool_factory: Callable accepting `max_results` and returning a tool
+    """
+    # The nodes package re-exports the node function under the module's name
+    web_search = importlib.import_module("backend.graph.nodes.web_search")
+
+    with mock.patch.object(web_search, "TavilySearchResults", tool_factory):
+        yield
+
+@contextmanager
+def patched_vector_store(vector_store: Any) -> Iterator[None]:
+    """
+    Point the shared document service at `vector_store`.
+
+    Args:
+        vector_store: Vector store to use for retrieval and ingestion
+    """
+    from backend.document_processor.service import document_service
+
+    saved = (document_service._vector_store, document_service._retriever, document_service._ingester)
+    document_service._vector_store = vector_store
+    document_service._retriever = None
+    document_service._ingester = None
+    try:
+        yield
+    finally:
+        document_service._vector_store, document_service._retriever, document_service._ingester = saved
@@ -0,0 +1,302 @@
+"""
+Concurrent load generator for the compiled RAG graph.
+Drives many simulated conversations against fake LLM, embedding and search
+backends with configurable latency and sweeps the graph profile and the
+concurrency level.
+
+Usage:
+    python -m benchmarks.load --concurrency 1,8,32,128 --sessions 128 \\
+        --llm-latency lognormal:0.8:0.4 --grader-latency lognormal:0.3:0.3 \\
+        --profiles fast,balanced,thorough
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.documents import Document
+
+from benchmarks.harness import (
+    BenchmarkResults,
+    make_corpus,
+    patched_chains,
+    patched_search,
+    patched_vector_store,
+    summarize,
+)
+from backend.graph.graph import PROFILES, get_app
+from backend.fakes import (
+    FakeChatModel,
+    FakeEmbeddings,
+    FakeSearchTool,
+    LatencyDistribution,
+)
+
+ROUTERS = {
+    "decide_entry_point",
+    "decide_after_retrieval",
+    "decide_next_step",
+    "grade_generation_grounded_in_documents_and_question",
+}
+
+class NodeTimer(BaseCallbackHandler):
+    """
+    Callback handler accumulating wall time per graph node and router.
+
+    Node time excludes the routers evaluated inside the node's run, so the
+    shares of nodes and routers add up to the total graph time.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: Dict[UUID, List[Any]] = {}
+        self._parents: Dict[UUID, Optional[UUID]] = {}
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        tags: Optional[List[str]] = None,
+        name: Optional[str] = None,
+        **kwargs: Any
+    ) -> None:
+        is_node = any(tag.startswith("graph:step:") for tag in tags or [])
+        with self._lock:
+            self._parents[run_id] = parent_run_id
+            if is_node and name and not name.startswith("__"):
+                kind = "node"
+            elif name in ROUTERS:
+                kind = "router"
+            else:
+                return
+            # [name, kind, start, time spent in nested routers]
+            self._active[run_id] = [name, kind, time.perf_counter(), 0.0]
+
+    def _finish(self, run_id: UUID) -> None:
+        end = time.perf_counter()
+        with self._lock:
+            parent_run_id = self._parents.pop(run_id, None)
+            entry = self._active.pop(run_id, None)
+            if entry is None:
+                return
+            name, kind, start, nested = entry
+            duration = end - start
+            if kind == "router":
+                # Routers run inside the sequence of the node they follow
+                while parent_run_id is not None:
+                    parent = self._active.get(parent_run_id)
+                    if parent is not None and parent[1] == "node":
+                        parent[3] += duration
+                        break
+                    parent_run_id = self._parents.get(parent_run_id)
+            key = f"{kind}.{name}"
+            self.totals[key] = self.totals.get(key, 0.0) + duration - nested
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+def run_session(app: Any, session_id: int, turns: int, timer: NodeTimer) -> List[Dict[str, Any]]:
+    """
+    Run one simulated conversation.
+
+    Args:
+        app: Compiled graph
+        session_id: Identifier used to derive the questions
+        turns: Number of questions asked in the conversation
+        timer: Callback collecting node timings
+
+    Returns:
+        One record per turn with its latency and error, if any
+    """
+    questions = make_corpus(turns, words_per_doc=8, seed=1000 + session_id)
+    history: List[Dict[str, Any]] = []
+    records = []
+    for question in questions:
+        start = time.perf_counter()
+        error = None
+        try:
+            response = app.invoke(
+                input={"question": question, "chat_history": list(history)},
+                config={"callbacks": [timer]},
+            )
+            answer = response.get("generation", "")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            answer = ""
+        records.append({"latency": time.perf_counter() - start, "error": error})
+        now = datetime.now().isoformat()
+        history.append({"role": "user", "content": question, "timestamp": now, "documents_used": None})
+        history.append({"role": "assistant", "content": answer, "timestamp": now, "documents_used": None})
+    return records
+
+def run_level(app: Any, concurrency: int, sessions: int, turns: int) -> Dict[str, Any]:
+    """
+    Run `sessions` conversations with `concurrency` of them in flight.
+
+    Args:
+        app: Compiled graph
+        concurrency: Number of concurrent conversations
+        sessions: Total number of conversations
+        turns: Questions per conversation
+
+    Returns:
+        Throughput, latency percentiles, errors and node time shares
+    """
+    timer = NodeTimer()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(run_session, app, session_id, turns, timer)
+            for session_id in range(sessions)
+        ]
+        records = [record for future in futures for record in future.result()]
+    elapsed = time.perf_counter() - start
+
+    latencies = [record["latency"] for record in records if record["error"] is None]
+    errors = [record["error"] for record in records if record["error"] is not None]
+    total_time = sum(timer.totals.values()) or 1.0
+    return {
+        **(summarize(latencies) if latencies else {"count": 0}),
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "turns": len(records),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "wall_time": elapsed,
+        "throughput_rps": len(latencies) / elapsed,
+        "node_share": {
+            name: total / total_time
+            for name, total in sorted(timer.totals.items(), key=lambda item: -item[1])
+        },
+        "node_calls": dict(timer.counts),
+    }
+
+def _build_store(workdir: str, corpus_size: int, embeddings: FakeEmbeddings):
+    from backend.document_processor import ChromaVectorStore
+
+    store = ChromaVectorStore(
+        collection_name="load-test",
+        persist_directory=os.path.join(workdir, "chroma"),
+        embedding_function=embeddings,
+    )
+    store.store_documents([
+        Document(page_content=text, metadata={"source": f"doc-{i // 10}.txt"})
+        for i, text in enumerate(make_corpus(corpus_size, words_per_doc=150, seed=7))
+    ])
+    return store
+
+def run(args: argparse.Namespace) -> BenchmarkResults:
+    """
+    Sweep the concurrency levels and collect results.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Collected benchmark results
+    """
+    llm = FakeChatModel(
+        latency=LatencyDistribution(args.llm_latency, seed=args.seed),
+        structured_latency=LatencyDistribution(args.grader_latency, seed=args.seed + 1),
+        verdicts={
+            "EntryClassification": args.p_search,
+            "DocumentRelevanceGrade": args.p_relevant,
+            "HallucinationGrade": args.p_grounded,
+            "AnswerGrade": args.p_useful,
+        },
+        seed=args.seed,
+    )
+    search_latency = LatencyDistribution(args.search_latency, seed=args.seed + 2)
+    searches: List[FakeSearchTool] = []
+    embeddings = FakeEmbeddings()
+
+    def search_factory(**kwargs: Any) -> FakeSearchTool:
+        tool = FakeSearchTool(latency=search_latency, **kwargs)
+        searches.append(tool)
+        return tool
+
+    results = BenchmarkResults("load")
+    workdir = tempfile.mkdtemp(prefix="rag-load-")
+    try:
+        store = _build_store(workdir, args.corpus_size, embeddings)
+        embeddings.latency = LatencyDistribution(args.embedding_latency, seed=args.seed + 3)
+        with patched_chains(llm), patched_search(search_factory), patched_vector_store(store):
+            for profile in args.profiles:
+                app = get_app(profile)
+                for concurrency in args.concurrency:
+                    sessions = max(args.sessions, concurrency)
+                    llm.reset_calls()
+                    searches.clear()
+                    level = run_level(app, concurrency, sessions, args.turns)
+                    llm_calls = llm.calls
+                    search_calls = sum(tool.calls for tool in searches)
+                    results.add(
+                        f"load.{profile}.concurrency.{concurrency}",
+                        level,
+                        profile=profile,
+                        llm_calls=llm_calls,
+                        search_calls=search_calls,
+                        calls_per_turn=(sum(llm_calls.values()) + search_calls) / max(level["turns"], 1),
+                    )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(
+        f"\n{'profile':>9} {'concurrency':>11} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} "
+        f"{'calls/turn':>10} {'errors':>7}"
+    )
+    for result in results.results.values():
+        print(
+            f"{result['profile']:>9} {result['concurrency']:>11} {result['throughput_rps']:>8.2f} "
+            f"{result.get('p50', 0):>8.3f} {result.get('p95', 0):>8.3f} "
+            f"{result.get('p99', 0):>8.3f} {result['calls_per_turn']:>10.2f} {result['errors']:>7}"
+        )
+    results.write(args.output)
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent load generator for the RAG graph")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Comma separated concurrency levels")
+    parser.add_argument("--sessions", type=int, default=64, help="Conversations per level (at least the concurrency)")
+    parser.add_argument("--turns", type=int, default=3, help="Questions per conversation")
+    parser.add_argument("--corpus-size", type=int, default=2000, help="Chunks in the vector store")
+    parser.add_argument("--llm-latency", default="lognormal:0.5:0.4", help="Generation latency spec")
+    parser.add_argument("--grader-latency", default="lognormal:0.2:0.3", help="Structured call latency spec")
+    parser.add_argument("--embedding-latency", default="lognormal:0.05:0.3", help="Embedding latency spec")
+    parser.add_argument("--search-latency", default="lognormal:0.6:0.4", help="Web search latency spec")
+    parser.add_argument("--p-search", type=float, default=0.9, help="Probability a question needs search")
+    parser.add_argument("--p-relevant", type=float, default=0.7, help="Probability a document is relevant")
+    parser.add_argument("--p-grounded", type=float, default=0.9, help="Probability a generation is grounded")
+    parser.add_argument("--p-useful", type=float, default=0.9, help="Probability an answer is useful")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Comma separated graph profiles")
+    parser.add_argument("--output", default="bench_results_load.json", help="JSON result file")
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+    args.profiles = args.profiles.split(",")
+    unknown = set(args.profiles) - set(PROFILES)
+    if unknown:
+        parser.error(f"unknown profile(s) {sorted(unknown)}, use {PROFILES}")
+    run(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
-import os
 from typing import Optional, Union
 
 from backend.document_processor import (
     DocumentIngester,
+    InMemoryFile,
     get_document_loader,
     ChromaVectorStore
 )
@@ -36,46 +36,30 @@ def render_document_uploader(
     vector_store = document_service.get_vector_store()
     ingester = document_service.get_ingester()
     
-    # Create a temporary directory for storing documents if it doesn't exist
-    temp_dir = "temp_docs"
-    if not os.path.exists(temp_dir):
-        os.makedirs(temp_dir)
-    
     # Button to process and ingest the documents
     if ui.button("Ingest Documents"):
         if uploaded_files:
+            # Uploaded files are parsed in memory, without saving them first
+            in_memory_files = [
+                InMemoryFile(uploaded_file.name, uploaded_file)
+                for uploaded_file in uploaded_files
+            ]
             try:
-                # Save uploaded files to temporary directory
-                saved_files = []
-                for uploaded_file in uploaded_files:
-                    # Create temporary file path
-                    temp_file_path = os.path.join(temp_dir, uploaded_file.name)
-                    saved_files.append(temp_file_path)
-                    
-                    # Save uploaded file
-                    with open(temp_file_path, "wb") as f:
-                        f.write(uploaded_file.getvalue())
-                
                 # Process and ingest the documents
                 with ui.spinner("Processing documents..."):
                     # Get appropriate loader based on file types
-                    document_loader = get_document_loader(saved_files)
+                    document_loader = get_document_loader(in_memory_files)
                     # Process the documents
                     ingester.process_documents(document_loader)
                 
-                ui.success(f"{len(saved_files)} document(s) successfully ingested!")
-                
-                # Clean up
-                for file_path in saved_files:
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
+                ui.success(f"{len(in_memory_files)} document(s) successfully ingested!")
             
             except Exception as e:
                 ui.error(f"Error processing documents: {str(e)}")
-                # Clean up on error
-                for file_path in saved_files:
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
+            finally:
+                # Remove files spilled to disk
+                for in_memory_file in in_memory_files:
+                    in_memory_file.close()
         else:
             ui.warning("Please upload documents before ingesting.")
 
@@ -1,13 +1,17 @@
 from typing import Optional
-from datetime import datetime
+from uuid import uuid4
 
-from backend.graph.graph import app
+from langchain_core.runnables import RunnableConfig
+
+from backend.graph.content_store import CONTENT_STORE_KEY, ContentStore, StateDocuments
+from backend.graph.graph import get_conversation_app
+from backend.graph.state import new_turn
 from frontend.ui.factory import UIFactory
 from frontend.ui.interfaces.base import MessagingInterface
 from frontend.ui.interfaces.state import StateInterface
 from frontend.ui.interfaces.markup import MarkupInterface
 
-def format_response(response: dict) -> str:
+def format_response(response: dict, config: Optional[RunnableConfig] = None) -> str:
     """Format the graph response into a readable string"""
     if not isinstance(response, dict):
         return str(response)
@@ -16,7 +20,7 @@ def format_response(response: dict) -> str:
     generation = response.get('generation', '')
     
     # Format source documents if present
-    documents = response.get('documents', [])
+    documents = StateDocuments.read(response, config)
     sources_text = ""
     if documents:
         sources_text = "\n\n**Sources:**\n"
@@ -38,8 +42,10 @@ def render_rag_chat(
     state = state or UIFactory.create_state()
     markup = markup or UIFactory.create_markup()
 
-    # Initialize chat history in session state
+    # Initialize chat history in session state; the graph keeps its own
+    # copy of the conversation in the checkpoint of this thread
     state.init_default("messages", [])
+    state.init_default("thread_id", uuid4().hex)
     messages = state.get("messages")
 
     markup.markdown("### Chat")
@@ -63,24 +69,15 @@ def render_rag_chat(
         with ui.chat_message("assistant"):
             with ui.spinner("Thinking..."):
                 try:
-                    # Convert messages to ChatMessage format
-                    chat_history = [
-                        {
-                            "role": msg["role"],
-                            "content": msg["content"],
-                            "timestamp": datetime.now().isoformat(),
-                            "documents_used": None
-                        }
-                        for msg in messages[:-1]  # Exclude the last message as it will be added by generate
-                    ]
-                    
-                    # Pass chat history to the graph
-                    response = app.invoke(input={
-                        "question": prompt,
-                        "chat_history": chat_history
-                    })
+                    # Only the question is sent, earlier turns come from the checkpoint
+                    config = {"configurable": {
+                        "model": state.get("selected_model"),
+                        "thread_id": state.get("thread_id"),
+                        CONTENT_STORE_KEY: ContentStore()
+                    }}
+                    response = get_conversation_app().invoke(input=new_turn(prompt), config=config)
                     
-                    formatted_response = format_response(response)
+                    formatted_response = format_response(response, config)
                     markup.markdown(formatted_response)
                     # Add assistant response to chat history
                     messages.append(
@@ -98,4 +95,5 @@ def render_rag_chat(
     # Add a button to clear chat history
     if ui.button("Clear Chat History"):
         state.set("messages", [])
+        state.set("thread_id", uuid4().hex)
         ui.rerun() 
\ No newline at end of file
@@ -2,9 +2,10 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-from backend.graph.graph import app
+from backend.graph.graph import get_app
 
 if __name__ == "__main__":
     print("Hello Advanced RAG")
     #print(app.invoke(input={"question": "what is agent memory?"}))
+    app = get_app()
     print(app.invoke(input={"question": "what is a good way to make pizza?"}))
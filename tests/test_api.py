@@ -0,0 +1,119 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.api import create_app
+from backend.fakes import FakeChatModel
+from backend.graph.chains.llm import model_registry
+
+ANSWER = "Paris is the capital of France."
+
+@pytest.fixture
+def client():
+    """API client whose chains answer directly without retrieval"""
+    llm = FakeChatModel(response=ANSWER, verdicts={"EntryClassification": 0.0})
+    original_factory = model_registry.factory
+    model_registry.set_factory(lambda *args, **kwargs: llm)
+    with TestClient(create_app(warmup=False)) as test_client:
+        yield test_client
+    model_registry.set_factory(original_factory)
+
+def _events(body: str):
+    """Parse a server-sent event stream into (event, data) pairs"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+def test_chat_returns_answer_with_request_id(client):
+    """The request id of the caller is echoed in the header and body"""
+    response = client.post(
+        "/v1/chat",
+        json={"question": "What is the capital of France?", "model": "gpt-4o"},
+        headers={"X-Request-ID": "req-1"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["X-Request-ID"] == "req-1"
+    assert response.json() == {
+        "request_id": "req-1",
+        "generation": ANSWER,
+        "sources": [],
+        "web_search": False,
+    }
+
+def test_chat_rejects_unknown_profile(client):
+    """Only the known graph profiles can be selected"""
+    response = client.post("/v1/chat", json={"question": "Capital of France?", "profile": "turbo"})
+
+    assert response.status_code == 422
+
+@pytest.mark.parametrize("filters,error", [
+    ({"page": {"between": [1, 2]}}, "Unknown filter operator"),
+    ({"source": []}, "Empty value list"),
+    ({"page": {"lte": None}}, "Invalid filters"),
+])
+def test_chat_rejects_malformed_filters(client, filters, error):
+    """Filters are validated with the request, not inside the graph"""
+    response = client.post("/v1/chat", json={"question": "Capital of France?", "filters": filters})
+
+    assert response.status_code == 422
+    assert error in response.text
+
+def test_request_id_is_generated(client):
+    """Requests without an id get a fresh one"""
+    first = client.get("/health").headers["X-Request-ID"]
+    second = client.get("/health").headers["X-Request-ID"]
+
+    assert first and second and first != second
+
+def test_chat_stream_emits_tokens_and_answer(client):
+    """Answer tokens are streamed before the final answer event"""
+    with client.stream("POST", "/v1/chat/stream", json={"question": "Capital of France?"}) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _events(response.read().decode())
+
+    names = [name for name, _ in events]
+    assert names[0] == "start" and names[-2:] == ["answer", "done"]
+    assert "".join(data["text"] for name, data in events if name == "token") == ANSWER
+    assert {"node": "generate"} in [data for name, data in events if name == "node"]
+    assert events[-2][1]["generation"] == ANSWER
+
+def test_ingest_rejects_unsupported_files(client):
+    """Only PDF, DOCX and TXT uploads are accepted"""
+    response = client.post("/v1/documents", files=[("files", ("image.png", b"data", "image/png"))])
+
+    assert response.status_code == 400
+    assert "image.png" in response.json()["detail"]
+
+def test_ingest_rejects_duplicate_file_names(client, monkeypatch):
+    """Two uploads with the same name would overwrite each other, so both are refused"""
+    from backend.api import server
+
+    ingested = []
+    monkeypatch.setattr(server, "_ingest_files", lambda uploads, tenant=None: ingested.append(uploads) or {})
+    response = client.post("/v1/documents", files=[
+        ("files", ("notes.txt", b"first", "text/plain")),
+        ("files", ("dir/notes.txt", b"second", "text/plain")),
+    ])
+
+    assert response.status_code == 400
+    assert "notes.txt" in response.json()["detail"]
+    assert not ingested
+
+def test_threaded_chat_keeps_history_server_side(client, tmp_path, monkeypatch):
+    """Turns of a thread only send the question"""
+    from backend.graph import graph
+    from backend.graph.checkpointer import create_checkpointer
+
+    app = graph.build_workflow().compile(checkpointer=create_checkpointer(str(tmp_path / "db.sqlite")))
+    monkeypatch.setitem(graph._conversation_apps, graph.DEFAULT_PROFILE, app)
+
+    for question in ("Capital of France?", "And its population?"):
+        response = client.post("/v1/chat", json={"question": question, "thread_id": "t1"})
+        assert response.status_code == 200
+
+    history = app.get_state({"configurable": {"thread_id": "t1"}}).values["chat_history"]
+    assert [message["role"] for message in history] == ["user", "assistant"] * 2
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from backend.graph.chains.batching import MicroBatcher
+
+class RecordingChain(RunnableLambda):
+    """Doubles its input and records the size of every batch it runs"""
+
+    def __init__(self):
+        super().__init__(self._double)
+        self.batch_sizes = []
+
+    @staticmethod
+    def _double(value):
+        if value < 0:
+            raise ValueError("negative")
+        return value * 2
+
+    def batch(self, inputs, config=None, **kwargs):
+        self.batch_sizes.append(len(inputs))
+        return super().batch(inputs, config, **kwargs)
+
+def test_concurrent_calls_share_a_batch():
+    """Calls arriving within the window are dispatched together"""
+    batcher = MicroBatcher(window_ms=50, max_batch_size=100)
+    chain = RecordingChain()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda i: batcher.submit(chain, i).result(), range(8)))
+
+    assert results == [i * 2 for i in range(8)]
+    assert chain.batch_sizes == [8]
+
+def test_full_batch_is_dispatched_without_waiting():
+    """A batch reaching the size limit does not wait for the window"""
+    batcher = MicroBatcher(window_ms=60_000, max_batch_size=3)
+    chain = RecordingChain()
+
+    futures = [batcher.submit(chain, i) for i in range(3)]
+
+    assert [future.result(timeout=5) for future in futures] == [0, 2, 4]
+    assert chain.batch_sizes == [3]
+
+def test_errors_only_reach_their_caller():
+    """A failing call does not fail the other calls of its batch"""
+    batcher = MicroBatcher(window_ms=60_000, max_batch_size=2)
+    chain = RecordingChain()
+
+    ok, failing = batcher.submit(chain, 1), batcher.submit(chain, -1)
+
+    assert ok.result(timeout=5) == 2
+    with pytest.raises(ValueError):
+        failing.result(timeout=5)
+
+def test_zero_window_disables_batching():
+    """With a zero window every call runs on its own, still concurrently"""
+    batcher = MicroBatcher(window_ms=0)
+    chain = RecordingChain()
+
+    futures = [batcher.submit(chain, i) for i in range(4)]
+
+    assert [future.result(timeout=5) for future in futures] == [0, 2, 4, 6]
+    assert chain.batch_sizes == [1, 1, 1, 1]
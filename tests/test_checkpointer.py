@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from backend.fakes import FakeChatModel, FakeSearchTool
+from backend.graph.chains.llm import model_registry
+from backend.graph.checkpointer import create_checkpointer
+from backend.graph.graph import build_workflow
+from backend.graph.state import new_turn
+from benchmarks.harness import patched_search
+
+ANSWER = "Paris is the capital of France."
+
+@pytest.fixture
+def llm():
+    """Chat model answering directly without retrieval"""
+    llm = FakeChatModel(response=ANSWER, verdicts={"EntryClassification": 0.0})
+    original_factory = model_registry.factory
+    model_registry.set_factory(lambda *args, **kwargs: llm)
+    yield llm
+    model_registry.set_factory(original_factory)
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "checkpoints.sqlite")
+
+def _config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+def test_turns_only_send_the_question(llm, db_path):
+    """The chat history of earlier turns is restored from the checkpoint"""
+    app = build_workflow().compile(checkpointer=create_checkpointer(db_path))
+
+    app.invoke(new_turn("What is the capital of France?"), _config("t1"))
+    state = app.invoke(new_turn("And its population?"), _config("t1"))
+
+    assert [message["content"] for message in state["chat_history"]] == [
+        "What is the capital of France?", ANSWER, "And its population?", ANSWER
+    ]
+    assert state["generation_attempts"] == 1
+    assert app.get_state(_config("t2")).values == {}
+
+def test_rejected_drafts_are_not_kept(llm, db_path):
+    """Regenerating replaces the turn's draft in the chat history"""
+    llm.verdicts = {"EntryClassification": 0.0, "AnswerGrade": 0.0}
+    app = build_workflow().compile(checkpointer=create_checkpointer(db_path))
+
+    with patched_search(FakeSearchTool):
+        state = app.invoke(new_turn("What is the capital of France?"), _config("t1"))
+
+    assert state["generation_attempts"] > 1
+    assert [message["role"] for message in state["chat_history"]] == ["user", "assistant"]
+    assert app.get_state(_config("t1")).values["chat_history"] == state["chat_history"]
+
+def test_conversation_moves_between_processes(llm, db_path):
+    """A separately opened checkpointer continues the same thread"""
+    build_workflow().compile(checkpointer=create_checkpointer(db_path)).invoke(
+        new_turn("What is the capital of France?"), _config("t1")
+    )
+
+    other_worker = build_workflow().compile(checkpointer=create_checkpointer(db_path))
+    state = other_worker.invoke(new_turn("And its population?"), _config("t1"))
+
+    assert len(state["chat_history"]) == 4
+
+def test_async_runs_use_the_checkpointer(llm, db_path):
+    """Async graph runs read and write the same checkpoints"""
+    app = build_workflow().compile(checkpointer=create_checkpointer(db_path))
+
+    async def conversation():
+        await app.ainvoke(new_turn("What is the capital of France?"), _config("t1"))
+        return await app.ainvoke(new_turn("And its population?"), _config("t1"))
+
+    assert len(asyncio.run(conversation())["chat_history"]) == 4
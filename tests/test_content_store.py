@@ -0,0 +1,95 @@
+import importlib
+import pickle
+from unittest import mock
+
+import pytest
+from langchain_core.documents import Document
+
+from backend.document_processor import ChromaVectorStore
+from backend.document_processor.retriever import RetrieverService
+from backend.document_processor.service import document_service
+from backend.fakes import FakeChatModel, FakeEmbeddings, FakeSearchTool
+from backend.graph.chains.llm import model_registry
+from backend.graph.checkpointer import create_checkpointer
+from backend.graph.content_store import CONTENT_STORE_KEY, ContentStore, StateDocuments
+from backend.graph.graph import build_workflow
+from backend.graph.state import new_turn
+
+# The nodes package re-exports the node function under the module's name
+web_search_module = importlib.import_module("backend.graph.nodes.web_search")
+
+TEXTS = [
+    "agents store long term memory in a vector database",
+    "vector databases index embeddings for similarity search",
+    "memory of an agent is retrieved by similarity search",
+]
+
+@pytest.fixture
+def store(tmp_path):
+    """Vector store installed in the document service"""
+    store = ChromaVectorStore(
+        collection_name="refs",
+        persist_directory=str(tmp_path / "chroma"),
+        embedding_function=FakeEmbeddings(),
+    )
+    store.store_documents([Document(page_content=text, metadata={"source": "notes.txt"}) for text in TEXTS])
+    saved = document_service._retriever
+    document_service._retriever = RetrieverService(store, search_type="similarity", k=2, score_threshold=0.0)
+    yield store
+    document_service._retriever = saved
+
+@pytest.fixture
+def llm():
+    """Chat model searching and accepting every document and answer"""
+    llm = FakeChatModel()
+    original_factory = model_registry.factory
+    model_registry.set_factory(lambda *args, **kwargs: llm)
+    yield llm
+    model_registry.set_factory(original_factory)
+
+def _config(thread_id, content_store=None):
+    configurable = {"thread_id": thread_id}
+    if content_store is not None:
+        configurable[CONTENT_STORE_KEY] = content_store
+    return {"configurable": configurable}
+
+def test_state_carries_references(store, llm, tmp_path):
+    """Checkpoints hold ids and scores, documents resolve from the store"""
+    app = build_workflow().compile(checkpointer=create_checkpointer(str(tmp_path / "refs.sqlite")))
+    content_store = ContentStore()
+    config = _config("refs", content_store)
+
+    state = app.invoke(new_turn(TEXTS[0]), config)
+
+    assert state["documents"] == [] and state["query_embedding"] is None
+    assert [ref["id"] for ref in state["document_refs"]] == [doc.id for doc in StateDocuments.read(state, config)]
+    assert StateDocuments.read(state, config)[0].page_content == TEXTS[0]
+    saved = app.get_state(_config("refs")).values
+    assert "page_content" not in str(saved) and saved["document_refs"] == state["document_refs"]
+
+    # Another request resolves the checkpointed references from the vector store
+    other = _config("refs", ContentStore())
+    documents = StateDocuments.read(saved, other)
+    assert [doc.page_content for doc in documents] == [doc.page_content for doc in StateDocuments.read(state, config)]
+    assert documents[0].metadata["score"] == state["document_refs"][0]["score"]
+
+def test_references_shrink_state(store, llm, tmp_path):
+    """The same turn checkpoints far less state with references"""
+    app = build_workflow().compile(checkpointer=create_checkpointer(str(tmp_path / "size.sqlite")))
+
+    app.invoke(new_turn(TEXTS[1]), _config("full"))
+    app.invoke(new_turn(TEXTS[1]), _config("refs", ContentStore()))
+
+    full = app.get_state(_config("full")).values
+    refs = app.get_state(_config("refs")).values
+    assert len(pickle.dumps(refs)) < len(pickle.dumps(full)) / 2
+
+def test_web_search_does_not_mutate_previous_state():
+    """Web results extend a copy of the documents list"""
+    retrieved = [Document(page_content=TEXTS[0], metadata={"source": "notes.txt"})]
+    with mock.patch.object(web_search_module, "TavilySearchResults", FakeSearchTool):
+        update = web_search_module.web_search({"question": "agent memory", "documents": retrieved})
+
+    assert update["documents"][:1] == retrieved
+    assert update["documents"][1].metadata["source"] == "web_search"
+    assert len(retrieved) == 1
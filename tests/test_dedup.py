@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from backend.document_processor import (
+    ChromaVectorStore,
+    DocumentIngester,
+    MappedVectorStore,
+    NearDuplicateFilter,
+    ShardedVectorStore,
+)
+from backend.document_processor.interfaces import DocumentLoader
+from backend.document_processor.retriever import RetrieverService
+from backend.fakes import FakeEmbeddings
+
+POLICY = (
+    "Employees may work remotely up to three days per week. Requests are approved by "
+    "the team lead and recorded in the HR portal. Equipment is provided by the company "
+    "and must be returned when the employment ends. Travel costs to the office are not "
+    "reimbursed for remote days, and meetings on Tuesdays require attendance on site."
+)
+REVISION = POLICY.replace("HR portal", "HR portal.") + " Updated in March."
+OTHER = "The cafeteria serves breakfast from seven to ten and lunch from noon to two."
+
+class ListLoader(DocumentLoader):
+    def __init__(self, documents):
+        self.documents = documents
+
+    def load(self):
+        return self.documents
+
+class ListSplitter:
+    def split_documents(self, documents):
+        return documents
+
+class RecordingStore:
+    def store_documents(self, documents):
+        self.documents = documents
+        return documents
+
+def test_near_duplicates_are_collapsed_with_their_sources():
+    """Revisions of a chunk are embedded once, with a copy per source"""
+    documents = [
+        Document(page_content=POLICY, metadata={"source": "policy-v1.pdf", "page": 2}),
+        Document(page_content=OTHER, metadata={"source": "policy-v1.pdf", "page": 3}),
+        Document(page_content=REVISION, metadata={"source": "policy-v2.pdf", "page": 2}),
+        Document(page_content=POLICY, metadata={"source": "policy-v1.pdf", "page": 9}),
+    ]
+
+    stored, report = NearDuplicateFilter(threshold=0.8).deduplicate(documents)
+
+    assert [doc.page_content for doc in stored] == [POLICY, REVISION, OTHER]
+    assert stored[0].metadata == {
+        "source": "policy-v1.pdf", "page": 2, "sources": "policy-v1.pdf; policy-v2.pdf", "duplicates": 2
+    }
+    assert stored[1].metadata == {
+        "source": "policy-v2.pdf", "page": 2, "sources": "policy-v1.pdf; policy-v2.pdf", "duplicate_of": stored[0].id
+    }
+    assert stored[2].metadata == {"source": "policy-v1.pdf", "page": 3}
+    assert report == {"chunks": 4, "stored": 3, "embeddings_saved": 2}
+
+def test_signature_estimates_jaccard_similarity():
+    """Equal signature values track the shingle overlap"""
+    dedup = NearDuplicateFilter()
+    first, second = set(dedup.shingles(POLICY)), set(dedup.shingles(REVISION))
+    jaccard = len(first & second) / len(first | second)
+
+    estimate = (dedup.signature(POLICY) == dedup.signature(REVISION)).mean()
+
+    assert abs(estimate - jaccard) < 0.1
+    assert (dedup.signature(POLICY) == dedup.signature(OTHER)).mean() < 0.1
+
+def test_ingester_reports_saved_embeddings():
+    """The ingester stores the collapsed chunks and keeps the report"""
+    store = RecordingStore()
+    ingester = DocumentIngester(ListSplitter(), store, deduplicator=NearDuplicateFilter())
+
+    ingester.process_documents(ListLoader([Document(page_content=POLICY)] * 3))
+
+    assert len(store.documents) == 1
+    assert ingester.last_report["embeddings_saved"] == 2
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return super().embed_documents(texts)
+
+STORES = {
+    "chroma": lambda path, embeddings: ChromaVectorStore("dedup", str(path), embeddings),
+    "mapped": lambda path, embeddings: MappedVectorStore(str(path), embeddings),
+    "sharded": lambda path, embeddings: ShardedVectorStore(
+        str(path), lambda shard, shard_embeddings: MappedVectorStore(shard, shard_embeddings),
+        num_shards=4, shard_by="source", embedding_function=embeddings
+    ),
+}
+
+@pytest.mark.parametrize("kind", sorted(STORES))
+def test_collapsed_chunks_match_every_source_filter(kind, tmp_path):
+    """A source filter finds a collapsed chunk in every file it came from"""
+    embeddings = CountingEmbeddings()
+    store = STORES[kind](tmp_path / kind, embeddings)
+    ingester = DocumentIngester(ListSplitter(), store, deduplicator=NearDuplicateFilter(threshold=0.8))
+
+    ingester.process_documents(ListLoader([
+        Document(page_content=POLICY, metadata={"source": "policy-v1.pdf"}),
+        Document(page_content=OTHER, metadata={"source": "policy-v1.pdf"}),
+        Document(page_content=REVISION, metadata={"source": "policy-v2.pdf"}),
+    ]))
+
+    assert sorted(embeddings.texts) == sorted([POLICY, OTHER])
+    query = store.embed_query(POLICY)
+    for source, text in (("policy-v1.pdf", POLICY), ("policy-v2.pdf", REVISION)):
+        documents = store.search_by_vector(query, k=1, filters={"source": source})
+        assert [doc.page_content for doc in documents] == [text]
+    copy = store.search_by_vector(query, k=1, filters={"source": "policy-v2.pdf"})[0]
+    assert np.allclose(store.get_embeddings([copy.id]), store.get_embeddings([copy.metadata["duplicate_of"]]))
+
+    # Without a source filter the group is retrieved, and graded, once
+    retriever = RetrieverService(store, search_type="similarity", k=3, score_threshold=None)
+    documents, _ = retriever.retrieve_with_scores(POLICY)
+    assert sorted(doc.page_content for doc in documents) == sorted([POLICY, OTHER])
+    assert documents[0].metadata["sources"] == "policy-v1.pdf; policy-v2.pdf"
@@ -0,0 +1,67 @@
+import tracemalloc
+
+import docx
+import pytest
+
+from backend.document_processor import DocxLoader
+
+@pytest.fixture
+def report(tmp_path):
+    """DOCX file mixing paragraphs, breaks, tab stops and tables"""
+    document = docx.Document()
+    document.add_paragraph("Quarterly report")
+    paragraph = document.add_paragraph("Revenue\tgrew")
+    paragraph.paragraph_format.tab_stops.add_tab_stop(docx.shared.Inches(1))
+    paragraph.add_run().add_break()
+    paragraph.add_run("in every region")
+    table = document.add_table(rows=2, cols=2)
+    for row, values in enumerate([("Region", "Revenue"), ("North", "12")]):
+        for column, value in enumerate(values):
+            table.cell(row, column).text = value
+    table.cell(1, 1).add_paragraph("up 3%")
+    document.add_paragraph("")
+    document.add_paragraph("End of report")
+    path = tmp_path / "report.docx"
+    document.save(path)
+    return str(path)
+
+def test_text_and_tables_in_document_order(report):
+    """Paragraphs match python-docx, table rows are kept in place"""
+    blocks = list(DocxLoader.iter_blocks(report))
+
+    assert blocks == [
+        "Quarterly report",
+        "Revenue\tgrew\nin every region",
+        "Region | Revenue",
+        "North | 12 up 3%",
+        "",
+        "End of report",
+    ]
+    paragraphs = [paragraph.text for paragraph in docx.Document(report).paragraphs]
+    assert [block for block in blocks if " | " not in block] == paragraphs
+
+def test_load_sets_source(report):
+    """Documents carry the joined text and their file path"""
+    [document] = DocxLoader([report, report + ".missing"]).load()
+
+    assert document.page_content.startswith("Quarterly report\nRevenue")
+    assert document.metadata == {"source": report}
+
+def test_memory_does_not_grow_with_document(tmp_path):
+    """Peak memory stays bounded while streaming a large table"""
+    document = docx.Document()
+    table = document.add_table(rows=0, cols=3)
+    for index in range(3000):
+        cells = table.add_row().cells
+        for column in range(3):
+            cells[column].text = f"row {index} column {column} " * 5
+    path = str(tmp_path / "large.docx")
+    document.save(path)
+
+    tracemalloc.start()
+    rows = sum(1 for _ in DocxLoader.iter_blocks(path))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert rows == 3000
+    assert peak < 2_000_000
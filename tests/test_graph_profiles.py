@@ -0,0 +1,48 @@
+import pytest
+from langchain_core.documents import Document
+
+from backend.document_processor import QuantizedVectorStore
+from backend.fakes import FakeChatModel, FakeEmbeddings, FakeSearchTool
+from backend.graph.graph import PROFILES, build_workflow, get_app
+from benchmarks.harness import make_corpus, patched_chains, patched_search, patched_vector_store
+
+GRADERS = {"DocumentRelevanceGrade", "HallucinationGrade", "AnswerGrade"}
+
+@pytest.fixture
+def store(tmp_path):
+    """Store whose chunks the questions are drawn from"""
+    vector_store = QuantizedVectorStore(str(tmp_path / "store"), "int8", FakeEmbeddings())
+    vector_store.store_documents([
+        Document(id=f"chunk-{i}", page_content=text, metadata={"source": "a.pdf"})
+        for i, text in enumerate(make_corpus(40, words_per_doc=30, seed=5))
+    ])
+    return vector_store
+
+@pytest.mark.parametrize("profile,graders", [
+    ("fast", set()),
+    ("balanced", {"DocumentRelevanceGrade"}),
+    ("thorough", GRADERS),
+])
+def test_profiles_skip_graders(store, profile, graders):
+    """Each profile only calls its graders and still answers"""
+    llm = FakeChatModel()
+    question = make_corpus(40, words_per_doc=30, seed=5)[0]
+    with patched_chains(llm), patched_search(FakeSearchTool), patched_vector_store(store):
+        state = get_app(profile).invoke({"question": question, "chat_history": []})
+
+    assert state["generation"] == llm.response
+    assert set(llm.calls) & GRADERS == graders
+    assert llm.calls["generate"] == 1
+
+def test_profiles_are_compiled_once():
+    """Every profile has its own cached graph"""
+    apps = [get_app(profile) for profile in PROFILES]
+
+    assert len({id(app) for app in apps}) == len(PROFILES)
+    assert get_app("fast") is apps[0]
+    assert "grade_documents" not in get_app("fast").get_graph().nodes
+
+def test_unknown_profile():
+    """Unknown profiles are rejected"""
+    with pytest.raises(ValueError, match="turbo"):
+        build_workflow("turbo")
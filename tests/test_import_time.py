@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Seconds allowed for `import backend.graph.graph`; override on slow machines
+IMPORT_TIME_BUDGET = float(os.environ.get("IMPORT_TIME_BUDGET", "2.5"))
+
+HEAVY_MODULES = ["streamlit", "chromadb", "langchain_openai", "docx"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import backend.graph.graph
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "elapsed": elapsed,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+def _probe_import() -> dict:
+    """Import the graph module in a fresh interpreter without API keys"""
+    env = {
+        key: value for key, value in os.environ.items()
+        if key not in ("OPENAI_API_KEY", "TAVILY_API_KEY")
+    }
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", PROBE],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+@pytest.fixture(scope="module")
+def import_probes():
+    """Import the graph three times to smooth out cold caches"""
+    return [_probe_import() for _ in range(3)]
+
+def test_graph_import_skips_heavy_modules(import_probes):
+    """UI, vector store, provider and DOCX libraries are loaded on first use"""
+    assert import_probes[0]["loaded"] == []
+
+def test_graph_import_time_budget(import_probes):
+    """Importing the graph stays within the startup budget"""
+    fastest = min(probe["elapsed"] for probe in import_probes)
+    assert fastest < IMPORT_TIME_BUDGET, (
+        f"import took {fastest:.2f}s, budget is {IMPORT_TIME_BUDGET:.2f}s"
+    )
+
+def test_app_compiles_lazily():
+    """The compiled graph is still reachable through the module attribute"""
+    from backend.graph import graph
+
+    assert graph.app is graph.get_app()
+    assert set(graph.get_app().get_graph().nodes) >= {"retrieve", "grade_documents", "generate", "websearch"}
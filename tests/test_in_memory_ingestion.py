@@ -0,0 +1,72 @@
+import io
+import os
+
+import docx
+import pytest
+
+from backend.document_processor import InMemoryFile, get_document_loader
+from benchmarks.harness import write_pdf
+
+PAGES = [f"page {page} of the uploaded handbook" for page in range(3)]
+
+@pytest.fixture(autouse=True)
+def working_directory(tmp_path, monkeypatch):
+    """Keep the default PDF page cache out of the working tree"""
+    monkeypatch.chdir(tmp_path)
+
+@pytest.fixture
+def files(tmp_path):
+    """TXT, DOCX and PDF files on disk"""
+    txt = tmp_path / "notes.txt"
+    txt.write_text("agents keep notes in memory\n", encoding="utf-8")
+    document = docx.Document()
+    document.add_paragraph("Onboarding handbook")
+    docx_path = tmp_path / "handbook.docx"
+    document.save(docx_path)
+    pdf_path = str(tmp_path / "handbook.pdf")
+    write_pdf(pdf_path, PAGES)
+    return [str(txt), str(docx_path), pdf_path]
+
+def load(sources):
+    return get_document_loader(sources).load()
+
+def test_uploads_load_like_files_on_disk(files, monkeypatch):
+    """Bytes are parsed without writing them, into the same documents"""
+    uploads = []
+    for path in files:
+        with open(path, "rb") as f:
+            uploads.append(InMemoryFile(os.path.basename(path), f.read()))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("upload written to disk")
+
+    with monkeypatch.context() as patch:
+        patch.setattr("backend.document_processor.sources.InMemoryFile._spill", fail)
+        from_memory = load(uploads)
+    from_disk = load(files)
+
+    assert [doc.page_content for doc in from_memory] == [doc.page_content for doc in from_disk]
+    assert [doc.metadata["source"] for doc in from_memory] == [
+        os.path.basename(doc.metadata["source"]) for doc in from_disk
+    ]
+
+def test_bytes_buffers_are_not_copied():
+    """Upload buffers are referenced, not copied"""
+    content = b"agents keep notes in memory"
+    buffer = io.BytesIO(content)
+
+    assert InMemoryFile("notes.txt", buffer)._data is buffer.getvalue()
+    assert InMemoryFile("notes.txt", memoryview(content))._data is content
+
+def test_large_uploads_are_spilled(files):
+    """Streams above the threshold go to a temporary file, removed on close"""
+    pdf = files[2]
+    with open(pdf, "rb") as f:
+        upload = InMemoryFile("handbook.pdf", f, spill_threshold=1024)
+
+    with upload:
+        assert upload.path.endswith(".pdf") and upload.size == os.path.getsize(pdf)
+        documents = load([upload])
+        assert [doc.page_content for doc in documents] == PAGES
+        assert {doc.metadata["source"] for doc in documents} == {"handbook.pdf"}
+    assert upload.path is None
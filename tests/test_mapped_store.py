@@ -0,0 +1,66 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from backend.document_processor import MappedVectorStore
+from backend.fakes import FakeEmbeddings
+
+TEXTS = [f"chunk {i} about {topic}" for i, topic in enumerate(["memory", "retrieval", "grading", "search"] * 50)]
+
+@pytest.fixture
+def writer(tmp_path):
+    store = MappedVectorStore(str(tmp_path / "index"), FakeEmbeddings(), refresh_interval=0)
+    store.store_documents([Document(page_content=text, metadata={"source": "notes.txt"}) for text in TEXTS])
+    return store
+
+def test_search_reads_mapped_generation(writer):
+    """Results come from read-only memory maps"""
+    documents = writer.search_by_vector(writer.embed_query(TEXTS[5]), k=3)
+
+    assert documents[0].page_content == TEXTS[5]
+    assert documents[0].metadata == {"source": "notes.txt", "score": pytest.approx(1.0, abs=1e-5)}
+    generation = writer.get_generation()
+    assert isinstance(generation.vectors, np.memmap) and not generation.vectors.flags.writeable
+    assert np.allclose(writer.get_embeddings([documents[0].id])[0], generation.vectors[5])
+
+def test_readers_swap_to_new_generation(writer):
+    """A reader keeps its generation until ingestion publishes a new one"""
+    reader = MappedVectorStore(writer.index_directory, writer.embedding_function, refresh_interval=0)
+    before = reader.get_generation()
+
+    writer.store_documents([Document(page_content="fresh chunk about quantization", metadata={})])
+
+    after = reader.get_generation()
+    assert (before.count, after.count) == (len(TEXTS), len(TEXTS) + 1)
+    assert before.record(0)["page_content"] == TEXTS[0]
+    found = reader.search_by_vector(reader.embed_query("fresh chunk about quantization"), k=1)
+    assert found[0].page_content == "fresh chunk about quantization"
+    assert reader.get_embeddings([found[0].id]).shape == (1, after.dim)
+
+def test_other_processes_map_the_index(writer):
+    """A separate worker process serves the same index"""
+    code = (
+        "import sys\n"
+        "from backend.document_processor import MappedVectorStore\n"
+        "from backend.fakes import FakeEmbeddings\n"
+        "store = MappedVectorStore(sys.argv[1], FakeEmbeddings())\n"
+        "print(store.search_by_vector(store.embed_query(sys.argv[2]), k=1)[0].page_content)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code, writer.index_directory, TEXTS[7]],
+        capture_output=True, text=True, check=True
+    ).stdout
+
+    assert output.strip() == TEXTS[7]
+
+def test_empty_store(tmp_path):
+    """Before the first ingestion nothing is found and unknown ids raise KeyError"""
+    store = MappedVectorStore(str(tmp_path / "empty"), FakeEmbeddings())
+
+    assert store.get_documents(["missing"]) == []
+    assert store.get_embeddings([]).shape[0] == 0
+    with pytest.raises(KeyError, match="missing"):
+        store.get_embeddings(["missing"])
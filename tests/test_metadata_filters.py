@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from backend.document_processor import (
+    ChromaVectorStore,
+    MappedVectorStore,
+    QuantizedVectorStore,
+    RetrieverService,
+    ShardedVectorStore,
+)
+from backend.document_processor.filters import MetadataIndex, matches, matches_nothing, to_chroma_where
+from backend.fakes import FakeEmbeddings
+from benchmarks.harness import make_corpus
+
+DOCUMENTS = [
+    Document(
+        id=f"chunk-{i}",
+        page_content=text,
+        metadata={"source": f"doc-{i % 5}.pdf", "page": i // 5, "tenant": "acme" if i % 2 else "globex"},
+    )
+    for i, text in enumerate(make_corpus(300, words_per_doc=40, seed=7))
+]
+FILTERS = {"source": ["doc-1.pdf", "doc-3.pdf"], "page": {"gte": 10, "lt": 40}, "tenant": "acme"}
+
+STORES = {
+    "chroma": lambda path: ChromaVectorStore("filters", str(path), FakeEmbeddings()),
+    "quantized": lambda path: QuantizedVectorStore(str(path), "int8", FakeEmbeddings()),
+    "mapped": lambda path: MappedVectorStore(str(path), FakeEmbeddings()),
+    "sharded": lambda path: ShardedVectorStore(
+        str(path), lambda shard, embeddings: QuantizedVectorStore(shard, "int8", embeddings),
+        num_shards=3, shard_by="source", embedding_function=FakeEmbeddings()
+    ),
+}
+
+def test_filter_spec():
+    """Values, lists and ranges combine with AND"""
+    assert matches({"source": "doc-1.pdf", "page": 12, "tenant": "acme"}, FILTERS)
+    assert not matches({"source": "doc-1.pdf", "page": 40, "tenant": "acme"}, FILTERS)
+    assert not matches({"source": "doc-2.pdf", "page": 12, "tenant": "acme"}, FILTERS)
+    assert to_chroma_where({"source": "a.pdf"}) == {"source": {"$in": ["a.pdf"]}}
+    with pytest.raises(ValueError, match="between"):
+        matches({}, {"page": {"between": [1, 2]}})
+
+def test_booleans_do_not_match_numbers():
+    """True and 1 are different values, unlike in Python"""
+    metadatas = [{"flag": True}, {"flag": 1}, {"flag": 1.0}, {"flag": False}, {"flag": 0}]
+    index = MetadataIndex()
+    index.add(metadatas)
+
+    for filters, expected in (({"flag": True}, [0]), ({"flag": 1}, [1, 2]), ({"flag": [False]}, [3]), ({"flag": 0}, [4])):
+        assert index.select(filters).tolist() == expected
+        assert [row for row, metadata in enumerate(metadatas) if matches(metadata, filters)] == expected
+    assert matches_nothing({"flag": {"eq": True, "in": [1]}})
+
+def test_index_selects_matching_rows():
+    """The index returns the same rows as checking every chunk"""
+    index = MetadataIndex()
+    index.add([doc.metadata for doc in DOCUMENTS[:100]])
+    index.add([doc.metadata for doc in DOCUMENTS[100:]])
+
+    expected = [row for row, doc in enumerate(DOCUMENTS) if matches(doc.metadata, FILTERS)]
+    assert index.select(FILTERS).tolist() == expected
+    assert index.select({"page": {"gt": 58}, "source": "doc-0.pdf"}).tolist() == [295]
+    assert index.select(None) is None
+
+@pytest.mark.parametrize("kind", sorted(STORES))
+def test_filtered_search(kind, tmp_path):
+    """Stores only return matching chunks, the best of them first"""
+    store = STORES[kind](tmp_path / kind)
+    store.store_documents(DOCUMENTS)
+    query = store.embed_query(DOCUMENTS[0].page_content)
+
+    documents = store.search_by_vector(query, k=5, filters=FILTERS)
+
+    allowed = [doc for doc in DOCUMENTS if matches(doc.metadata, FILTERS)]
+    vectors = np.asarray(FakeEmbeddings().embed_documents([doc.page_content for doc in allowed]))
+    scores = vectors @ query / np.linalg.norm(vectors, axis=1) / np.linalg.norm(query)
+    assert len(documents) == 5 and all(matches(doc.metadata, FILTERS) for doc in documents)
+    assert documents[0].id == allowed[int(np.argmax(scores))].id
+
+@pytest.mark.parametrize("kind", sorted(STORES))
+def test_filter_matching_nothing(kind, tmp_path):
+    """A value outside the allowed list finds nothing instead of failing"""
+    store = STORES[kind](tmp_path / kind)
+    store.store_documents(DOCUMENTS)
+    filters = {"source": {"eq": "doc-1.pdf", "in": ["doc-2.pdf"]}}
+
+    assert matches_nothing(filters) and not matches_nothing(FILTERS)
+    assert store.search_by_vector(store.embed_query("tomato"), k=5, filters=filters) == []
+    with pytest.raises(ValueError, match="matches nothing"):
+        to_chroma_where(filters)
+
+def test_filters_are_pushed_into_the_search(tmp_path, monkeypatch):
+    """Only rows selected by the index are scored"""
+    from backend.document_processor import quantized
+
+    store = STORES["quantized"](tmp_path)
+    store.store_documents(DOCUMENTS)
+    scored = []
+    candidate_scores = quantized.candidate_scores
+    monkeypatch.setattr(quantized, "candidate_scores", lambda query, codes, *args: scored.append(len(codes)) or candidate_scores(query, codes, *args))
+    retriever = RetrieverService(store, search_type="similarity", k=3, score_threshold=None)
+
+    documents, _ = retriever.retrieve_with_scores("tomato", filters={"source": "doc-2.pdf", "page": {"lte": 9}})
+
+    assert scored == [10]
+    assert {doc.metadata["source"] for doc in documents} == {"doc-2.pdf"}
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.fakes import FakeChatModel
+from backend.graph.chains.generation import generation_chain
+from backend.graph.chains.llm import ModelRegistry, create_llm, model_registry
+
+@pytest.fixture
+def echo_models():
+    """Serve every model with a fake answering its own name"""
+    created = []
+
+    def factory(model, temperature):
+        created.append((model, temperature))
+        return FakeChatModel(response=model)
+
+    original_factory = model_registry.factory
+    model_registry.set_factory(factory)
+    yield created
+    model_registry.set_factory(original_factory)
+
+def test_registry_creates_one_client_per_model():
+    """Concurrent lookups share a single client per (model, temperature)"""
+    created = []
+    registry = ModelRegistry(lambda model, temperature: created.append(model) or object())
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        clients = list(executor.map(lambda i: registry.get(f"model-{i % 2}"), range(64)))
+
+    assert sorted(created) == ["model-0", "model-1"]
+    assert len({id(client) for client in clients}) == 2
+    assert registry.get("model-0", 0.5) is not registry.get("model-0")
+
+def test_chain_resolves_model_per_request(echo_models):
+    """Each invocation uses the model of its own config without rebuilding"""
+    inputs = {"question": "q", "context": "", "chat_history": []}
+
+    answers = [
+        generation_chain.invoke(inputs, config={"configurable": {"model": model}})
+        for model in ["gpt-4o", "gpt-4o-mini", "gpt-4o"]
+    ]
+
+    assert answers == ["gpt-4o", "gpt-4o-mini", "gpt-4o"]
+    assert generation_chain.invoke(inputs) == "gpt-4o-mini"
+    assert sorted(set(echo_models)) == [("gpt-4o", 0), ("gpt-4o-mini", 0)]
+    assert len(echo_models) == 2
+
+def test_clients_share_connection_pool(monkeypatch):
+    """Clients for different models reuse the same keep-alive HTTP client"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+
+    first = create_llm("gpt-4o")
+    second = create_llm("gpt-4o-mini")
+
+    assert first.http_client is second.http_client
+    assert first.http_async_client is second.http_async_client
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+from langchain_community.document_loaders import PyPDFLoader
+
+from backend.document_processor import PDFLoader
+from backend.document_processor.pdf import split_tasks
+from benchmarks.harness import write_pdf
+
+PAGES = [f"page {page} of the annual report on agent memory" for page in range(40)]
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = str(tmp_path / "report.pdf")
+    write_pdf(path, PAGES)
+    return path
+
+@pytest.fixture
+def cache(tmp_path):
+    return str(tmp_path / "cache")
+
+def test_pages_match_pypdf_loader(pdf, cache):
+    """Page text, numbers and labels match the LangChain loader"""
+    documents = PDFLoader([pdf], max_workers=1, cache_directory=cache).load()
+    expected = PyPDFLoader(pdf).load()
+
+    assert [doc.page_content for doc in documents] == [doc.page_content for doc in expected]
+    for document, reference in zip(documents, expected):
+        for key in ("source", "total_pages", "page", "page_label"):
+            assert document.metadata[key] == reference.metadata[key]
+
+def test_unchanged_pdf_is_read_from_cache(pdf, cache, monkeypatch):
+    """A second load parses no page, a changed file is parsed again"""
+    first = PDFLoader([pdf], max_workers=1, cache_directory=cache).load()
+
+    def fail(*args):
+        raise AssertionError("page parsed again")
+
+    with monkeypatch.context() as patch:
+        patch.setattr("backend.document_processor.pdf.extract_pages", fail)
+        patch.setattr("backend.document_processor.pdf.read_layout", fail)
+        assert PDFLoader([pdf], max_workers=1, cache_directory=cache).load() == first
+
+    write_pdf(pdf, PAGES[:3])
+    assert len(PDFLoader([pdf], max_workers=1, cache_directory=cache).load()) == 3
+    assert len(os.listdir(cache)) == 2
+
+def test_pages_are_parsed_in_worker_processes(pdf, cache):
+    """Worker processes return every page, streamed as tasks finish"""
+    streamed = list(PDFLoader([pdf], max_workers=2, cache_directory=cache).lazy_load())
+
+    assert sorted(doc.metadata["page"] for doc in streamed) == list(range(len(PAGES)))
+    assert PDFLoader([pdf], max_workers=1, cache_directory=cache).load()[5].page_content == PAGES[5]
+    assert split_tasks(list(range(len(PAGES))), 1) == [list(range(len(PAGES)))]
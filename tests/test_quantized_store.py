@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from backend.document_processor import QuantizedVectorStore
+
+DIM = 64
+
+class ClusteredEmbeddings(Embeddings):
+    """Dense embeddings drawn around a few centers, like real text embeddings"""
+
+    def __init__(self):
+        rng = np.random.default_rng(0)
+        self.centers = rng.normal(size=(20, DIM))
+        self.rng = rng
+
+    def _vector(self, text):
+        center = self.centers[int(text) % len(self.centers)]
+        return (center + self.rng.normal(size=DIM) * 0.5).tolist()
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+@pytest.fixture(params=["int8", "binary"])
+def store(request, tmp_path):
+    store = QuantizedVectorStore(str(tmp_path), request.param, ClusteredEmbeddings())
+    store.store_documents([
+        Document(page_content=str(i), metadata={"source": f"doc-{i}.txt"}) for i in range(2000)
+    ])
+    return store
+
+def test_recall_against_exact_search(store):
+    """Rescoring recovers nearly all of the exact top-k"""
+    assert store.recall_at_k(k=10, sample=50) >= 0.95
+
+def test_scores_are_exact_cosine(store):
+    """Returned scores come from the float vectors, best first"""
+    query = store.embed_query("3")
+
+    documents = store.search_by_vector(query, k=5)
+
+    vectors = store.get_embeddings([doc.id for doc in documents])
+    expected = vectors @ (np.asarray(query) / np.linalg.norm(query))
+    assert [doc.metadata["score"] for doc in documents] == pytest.approx(expected.tolist(), abs=1e-5)
+    assert expected.tolist() == sorted(expected.tolist(), reverse=True)
+    assert all(doc.metadata["source"].startswith("doc-") for doc in documents)
+
+def test_codes_are_compact(store):
+    """Codes take a fraction of the float32 vectors"""
+    assert store.memory_bytes() <= 2000 * (DIM + 4)
+
+def test_index_is_reopened_from_disk(store):
+    """A new store on the same directory serves the same results"""
+    query = store.embed_query("7")
+    reopened = QuantizedVectorStore(store.persist_directory, store.quantization, store.embedding_function)
+
+    assert [doc.id for doc in reopened.search_by_vector(query, k=4)] == \
+        [doc.id for doc in store.search_by_vector(query, k=4)]
+
+def test_binary_scores_without_numpy_2(monkeypatch):
+    """Binary codes are scored by Hamming distance on NumPy 1.26, which lacks bitwise_count"""
+    from backend.document_processor.quantized import candidate_scores
+
+    monkeypatch.delattr(np, "bitwise_count", raising=False)
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(600, DIM)).astype(np.float32)
+    query = rng.normal(size=DIM).astype(np.float32)
+    codes = np.packbits(vectors > 0, axis=1)
+
+    scores = candidate_scores(query, codes, None, "binary")
+
+    hamming = np.unpackbits(codes ^ np.packbits(query > 0), axis=1).sum(axis=1)
+    np.testing.assert_array_equal(-scores, hamming)
+
+def test_interrupted_write_is_dropped(store, monkeypatch):
+    """Rows written after the last committed count are cut before the next append"""
+    from backend.document_processor import quantized
+
+    def crash(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(quantized.os, "replace", crash)
+    with pytest.raises(OSError):
+        store.store_documents([Document(id=f"junk{i}", page_content=str(i)) for i in range(5)])
+    monkeypatch.undo()
+    first, second = store.embed_query("11"), store.embed_query("12")
+    # Once by the store that failed, once by a process opening the files
+    store.store_embeddings([Document(id="first", page_content="first chunk")], [first])
+    with open(f"{store.persist_directory}/codes.bin", "ab") as f:
+        f.write(b"\1" * 100)
+    reopened = QuantizedVectorStore(store.persist_directory, store.quantization, store.embedding_function)
+    reopened.store_embeddings([Document(id="second", page_content="second chunk")], [second])
+    reloaded = QuantizedVectorStore(store.persist_directory, store.quantization, store.embedding_function)
+
+    for chunk_id, embedding in (("first", first), ("second", second)):
+        best = reloaded.search_by_vector(embedding, k=1)[0]
+        assert (best.id, best.page_content) == (chunk_id, f"{chunk_id} chunk")
+        assert best.metadata["score"] == pytest.approx(1.0, abs=1e-5)
+    assert not reloaded.get_documents([f"junk{i}" for i in range(5)])
@@ -0,0 +1,76 @@
+import pytest
+from langchain_core.documents import Document
+
+from backend.document_processor import ChromaVectorStore
+from backend.document_processor.embeddings import CachedEmbeddings
+from backend.document_processor.retriever import RetrieverService
+from backend.document_processor.service import document_service
+from backend.fakes import FakeEmbeddings
+from backend.graph.content_store import CONTENT_STORE_KEY, ContentStore
+from backend.graph.nodes import rerank, retrieve
+
+TEXTS = [
+    "agents store long term memory in a vector database",
+    "vector databases index embeddings for similarity search",
+    "the weather in paris is mild in spring",
+]
+
+class CountingEmbeddings(FakeEmbeddings):
+    """Fake embeddings counting the questions sent to the client"""
+
+    def __init__(self):
+        super().__init__()
+        self.queries = []
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return super().embed_query(text)
+
+@pytest.fixture
+def client():
+    return CountingEmbeddings()
+
+@pytest.fixture
+def retriever(tmp_path, client):
+    """Retriever over a store embedding through `client`"""
+    store = ChromaVectorStore(
+        collection_name="queries",
+        persist_directory=str(tmp_path),
+        embedding_function=client,
+    )
+    store.store_documents([Document(page_content=text, metadata={"source": "notes.txt"}) for text in TEXTS])
+    saved = document_service._retriever
+    document_service._retriever = RetrieverService(store, search_type="mmr", k=1, fetch_k=3, score_threshold=0.0)
+    yield document_service._retriever
+    document_service._retriever = saved
+
+def test_repeated_questions_are_embedded_once(retriever, client):
+    """The cache answers repeated questions without calling the client"""
+    first = retrieve({"question": TEXTS[0]})
+    second = retrieve({"question": TEXTS[0]})
+
+    assert client.queries == [TEXTS[0]]
+    assert second["query_embedding"] == pytest.approx(first["query_embedding"], abs=1e-6)
+    assert retriever.vector_store.embedding_function.hits == 1
+
+def test_request_embeds_its_question_once(retriever, client):
+    """Retrieve and rerank share the embedding kept for the request"""
+    config = {"configurable": {CONTENT_STORE_KEY: ContentStore()}}
+    state = {"question": TEXTS[1]}
+
+    state.update(retrieve(state, config))
+    state.update(rerank(state, config))
+    state.update(retrieve(state, config))
+
+    assert client.queries == [TEXTS[1]]
+    assert retriever.vector_store.embedding_function.hits == 0
+
+def test_least_recently_used_questions_are_evicted(client):
+    """Only the most recent questions are kept"""
+    embeddings = CachedEmbeddings(client, max_size=2)
+
+    for text in [TEXTS[0], TEXTS[1], TEXTS[0], TEXTS[2], TEXTS[1]]:
+        embeddings.embed_query(text)
+
+    assert client.queries == [TEXTS[0], TEXTS[1], TEXTS[2], TEXTS[1]]
+    assert CachedEmbeddings.wrap(embeddings) is embeddings
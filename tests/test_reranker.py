@@ -0,0 +1,41 @@
+import numpy as np
+from langchain_core.documents import Document
+
+from backend.document_processor.reranker import VectorReranker
+
+def _documents(count):
+    return [Document(page_content=f"chunk {i}", metadata={}) for i in range(count)]
+
+def test_cosine_scores_ignore_vector_length():
+    """Scores are cosine similarities, whatever the embedding norms"""
+    reranker = VectorReranker()
+    embeddings = np.array([[2.0, 0.0], [0.0, 3.0], [1.0, 1.0]])
+
+    scores = reranker.cosine_scores([5.0, 0.0], embeddings)
+
+    np.testing.assert_allclose(scores, [1.0, 0.0, np.sqrt(0.5)], atol=1e-6)
+
+def test_mmr_skips_near_duplicates():
+    """A duplicate of the best candidate loses to a distinct relevant one"""
+    reranker = VectorReranker(top_n=2, lambda_mult=0.5)
+    embeddings = np.array([
+        [1.0, 0.0, 0.0],     # best match
+        [0.99, 0.05, 0.0],   # near duplicate of the best match
+        [0.8, 0.0, 0.6],     # slightly less relevant but different
+    ])
+    query = [1.0, 0.0, 0.2]
+
+    assert reranker.select(query, embeddings) == [0, 2]
+    assert VectorReranker(top_n=2, lambda_mult=1.0).select(query, embeddings) == [0, 1]
+
+def test_rerank_caps_candidates_and_drops_low_scores():
+    """Only the top-N candidates above the minimum score reach the grader"""
+    reranker = VectorReranker(top_n=3, lambda_mult=1.0, min_score=0.5)
+    embeddings = np.array([[1.0, 0.0], [0.0, 1.0], [0.9, 0.1], [0.8, 0.3], [0.6, 0.4]])
+    documents = _documents(5)
+
+    reranked = reranker.rerank([1.0, 0.0], documents, embeddings)
+
+    assert [doc.page_content for doc in reranked] == ["chunk 0", "chunk 2", "chunk 3"]
+    assert reranked[0].metadata["rerank_score"] == 1.0
+    assert all(doc.metadata["rerank_score"] >= 0.5 for doc in reranked)
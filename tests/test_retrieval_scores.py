@@ -0,0 +1,67 @@
+import pytest
+from langchain_core.documents import Document
+
+from backend.document_processor import ChromaVectorStore
+from backend.document_processor.retriever import RetrieverService
+from backend.document_processor.service import document_service
+from backend.fakes import FakeChatModel, FakeEmbeddings
+from backend.graph.chains.llm import model_registry
+from backend.graph.consts import RERANK, WEBSEARCH
+from backend.graph.nodes import grade_documents, retrieve
+from backend.graph.utils import decide_after_retrieval
+
+TEXTS = [
+    "agents store long term memory in a vector database",
+    "the weather in paris is mild in spring",
+    "vector databases index embeddings for similarity search",
+]
+
+@pytest.fixture
+def retriever(tmp_path):
+    """Scored retriever over a small store, installed in the document service"""
+    store = ChromaVectorStore(
+        collection_name="scores",
+        persist_directory=str(tmp_path),
+        embedding_function=FakeEmbeddings(),
+    )
+    store.store_documents([Document(page_content=text, metadata={"source": "notes.txt"}) for text in TEXTS])
+    service = RetrieverService(store, search_type="similarity", k=2, score_threshold=0.3, accept_threshold=0.9)
+    saved = document_service._retriever
+    document_service._retriever = service
+    yield service
+    document_service._retriever = saved
+
+@pytest.fixture
+def llm():
+    """Chat model grading every document relevant, counting its calls"""
+    llm = FakeChatModel(verdicts={"DocumentRelevanceGrade": 1.0})
+    original_factory = model_registry.factory
+    model_registry.set_factory(lambda *args, **kwargs: llm)
+    yield llm
+    model_registry.set_factory(original_factory)
+
+def test_documents_carry_cosine_scores(retriever):
+    """Scores are cosine similarities, best first, above the threshold"""
+    documents, _ = retriever.retrieve_with_scores(TEXTS[0])
+
+    assert documents[0].page_content == TEXTS[0]
+    assert documents[0].metadata["score"] == pytest.approx(1.0, abs=1e-3)
+    assert all(doc.metadata["score"] >= 0.3 for doc in documents)
+
+def test_low_scores_go_straight_to_web_search(retriever):
+    """Nothing above the threshold routes to web search without grading"""
+    state = retrieve({"question": "quarterly revenue of a shipping company"})
+
+    assert state["documents"] == []
+    assert decide_after_retrieval(state) == WEBSEARCH
+    assert decide_after_retrieval(retrieve({"question": TEXTS[2]})) == RERANK
+
+def test_confident_documents_skip_grading(retriever, llm):
+    """Only documents below the accept threshold reach the LLM grader"""
+    confident = Document(page_content=TEXTS[0], metadata={"score": 0.95})
+    uncertain = Document(page_content=TEXTS[2], metadata={"score": 0.6})
+
+    state = grade_documents({"question": "agent memory", "documents": [confident, uncertain]})
+
+    assert state["documents"] == [confident, uncertain]
+    assert llm.calls == {"DocumentRelevanceGrade": 1}
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from backend.document_processor import MappedVectorStore, ShardedVectorStore
+from backend.fakes import FakeEmbeddings
+from benchmarks.harness import make_corpus
+
+DOCUMENTS = [
+    Document(id=f"chunk-{i}", page_content=text, metadata={"source": f"doc-{i // 20}.txt"})
+    for i, text in enumerate(make_corpus(400, words_per_doc=60, seed=5))
+]
+
+def exact_shard(path, embeddings):
+    return MappedVectorStore(path, embeddings, quantization=None)
+
+def open_store(directory, shard_by="hash", embeddings=None):
+    return ShardedVectorStore(str(directory), exact_shard, num_shards=4, shard_by=shard_by,
+                              embedding_function=embeddings or FakeEmbeddings())
+
+@pytest.fixture(params=["hash", "source"])
+def store(request, tmp_path):
+    store = open_store(tmp_path / "sharded", request.param)
+    store.store_documents(DOCUMENTS)
+    return store
+
+@pytest.fixture
+def single(tmp_path):
+    store = exact_shard(str(tmp_path / "single"), FakeEmbeddings())
+    store.store_documents(DOCUMENTS)
+    return store
+
+def results(store, query, k=10):
+    documents = store.search_by_vector(store.embed_query(query), k=k)
+    # Fake embeddings give some chunks equal scores, order ties by id
+    return sorted((-round(doc.metadata["score"], 5), doc.id) for doc in documents)
+
+def test_fan_out_matches_single_store(store, single):
+    """Merging the shards' top-k gives the top-k of one store"""
+    for query in (DOCUMENTS[3].page_content, "memory retrieval vector", DOCUMENTS[250].page_content[:80]):
+        assert results(store, query) == results(single, query)
+
+    ids = ["chunk-7", "chunk-300", "missing", "chunk-12"]
+    assert [doc.id for doc in store.get_documents(ids)] == ["chunk-7", "chunk-300", "chunk-12"]
+    assert np.allclose(store.get_embeddings(ids[:2]), single.get_embeddings(ids[:2]))
+    if store.shard_by == "source":
+        # The owners are looked up from the chunks, unknown ids have none
+        assert np.allclose(store.get_embeddings(ids), single.get_embeddings([ids[0], ids[1], ids[3]]))
+
+def test_routing(store):
+    """Chunks spread over every shard, whole files stay together by source"""
+    counts = [sum(len(batch) for batch, _ in shard.iter_records()) for shard in store.shards]
+
+    assert sum(counts) == len(DOCUMENTS) and all(counts)
+    if store.shard_by == "source":
+        for shard in store.shards:
+            for batch, _ in shard.iter_records():
+                assert {store.shard_of(doc) for doc in batch} == {store.shards.index(shard)}
+
+def test_rebuild_one_shard(tmp_path):
+    """A shard is rebuilt from its own embeddings and the store reopens on it"""
+    store = open_store(tmp_path / "sharded")
+    store.store_documents(DOCUMENTS)
+    query = DOCUMENTS[42].page_content
+    before = results(store, query)
+    untouched = store.shards[0]
+
+    class NoEmbeddings(FakeEmbeddings):
+        def embed_documents(self, texts):
+            raise AssertionError("documents embedded")
+
+    store.embedding_function.embeddings = NoEmbeddings()
+    store.rebuild_shard(2)
+
+    assert store.shards[0] is untouched
+    assert results(store, query) == before
+    assert sorted(os.listdir(tmp_path / "sharded")) == ["shard-000.0", "shard-001.0", "shard-002.1", "shard-003.0", "shards.json"]
+    assert results(open_store(tmp_path / "sharded"), query) == before
+    with pytest.raises(ValueError, match="4 shards by hash"):
+        open_store(tmp_path / "sharded", shard_by="source")
+
+def test_writes_during_rebuild_are_kept(tmp_path):
+    """Chunks written to a shard while it is copied land in the new shard"""
+    store = open_store(tmp_path / "sharded")
+    store.store_documents(DOCUMENTS)
+    extra = [
+        Document(id=f"late-{i}", page_content=f"late chunk {i}", metadata={"source": "late.txt"})
+        for i in range(40)
+    ]
+    extra = [doc for doc in extra if store.shard_of(doc) == 2]
+    copying, release = threading.Event(), threading.Event()
+    old_shard = store.shards[2]
+    iter_records = old_shard.iter_records
+
+    def slow_iter_records(batch_size=1024):
+        copying.set()
+        release.wait(5)
+        yield from iter_records(batch_size)
+
+    old_shard.iter_records = slow_iter_records
+    rebuild = threading.Thread(target=store.rebuild_shard, args=(2,))
+    rebuild.start()
+    copying.wait(5)
+    write = threading.Thread(target=store.store_documents, args=(extra,))
+    write.start()
+    time.sleep(0.05)
+    # The write waits for the rebuild instead of going to the old shard
+    assert write.is_alive()
+    release.set()
+    rebuild.join(5)
+    write.join(5)
+
+    assert extra and store.shards[2] is not old_shard
+    assert [doc.id for doc in store.get_documents([doc.id for doc in extra])] == [doc.id for doc in extra]
@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from backend.document_processor import ChromaVectorStore, MappedVectorStore, QuantizedVectorStore
+from backend.document_processor.snapshot import export_snapshot, import_snapshot, read_manifest
+from backend.fakes import FakeEmbeddings
+from benchmarks.harness import make_corpus
+
+class NoEmbeddings(Embeddings):
+    """Embeddings failing when called, restoring must not embed"""
+
+    def embed_documents(self, texts):
+        raise AssertionError("documents embedded")
+
+    def embed_query(self, text):
+        return FakeEmbeddings().embed_query(text)
+
+DOCUMENTS = [
+    Document(id=f"chunk-{i}", page_content=text, metadata={"source": f"doc-{i % 3}.txt"})
+    for i, text in enumerate(make_corpus(300, words_per_doc=40, seed=6))
+] + [Document(id="bare", page_content="chunk without metadata", metadata={})]
+
+STORES = {
+    "chroma": lambda path, embeddings: ChromaVectorStore("snapshot", str(path), embeddings),
+    "quantized": lambda path, embeddings: QuantizedVectorStore(str(path), "int8", embeddings),
+    "mapped": lambda path, embeddings: MappedVectorStore(str(path), embeddings),
+}
+
+@pytest.fixture(scope="module")
+def snapshot(tmp_path_factory):
+    """Snapshot of a Chroma collection"""
+    source = STORES["chroma"](tmp_path_factory.mktemp("source"), FakeEmbeddings())
+    source.store_documents(DOCUMENTS)
+    directory = str(tmp_path_factory.mktemp("snapshot") / "rag")
+    manifest = export_snapshot(source, directory, batch_size=64)
+    return directory, manifest, source
+
+@pytest.mark.parametrize("kind", sorted(STORES))
+def test_restore_without_embedding(snapshot, kind, tmp_path):
+    """Every store restores the chunks and serves the same nearest neighbours"""
+    directory, manifest, source = snapshot
+    store = STORES[kind](tmp_path / kind, NoEmbeddings())
+
+    assert manifest["count"] == len(DOCUMENTS)
+    assert import_snapshot(store, directory) == len(DOCUMENTS)
+
+    ids = [doc.id for doc in DOCUMENTS]
+    assert store.get_documents(ids) == [Document(id=doc.id, page_content=doc.page_content, metadata=doc.metadata) for doc in DOCUMENTS]
+    query = store.embed_query(DOCUMENTS[7].page_content)
+    [best] = store.search_by_vector(query, k=1)
+    assert best.id == "chunk-7" and best.metadata["score"] == pytest.approx(1.0, abs=1e-3)
+
+def test_snapshot_round_trip_keeps_embeddings(snapshot, tmp_path):
+    """Exporting a restored store gives the same embeddings"""
+    directory, _, source = snapshot
+    store = STORES["quantized"](tmp_path / "store", NoEmbeddings())
+    import_snapshot(store, directory)
+
+    manifest = export_snapshot(store, str(tmp_path / "again"))
+    exported = np.fromfile(str(tmp_path / "again" / "embeddings.f32"), dtype=np.float32).reshape(-1, manifest["dim"])
+    expected = source.get_embeddings([doc.id for doc in DOCUMENTS])
+
+    assert np.allclose(exported, expected / np.linalg.norm(expected, axis=1, keepdims=True), atol=1e-6)
+
+def test_corrupt_snapshot_is_rejected(snapshot, tmp_path):
+    """A file not matching its checksum stops the import"""
+    directory, _, _ = snapshot
+    corrupt = tmp_path / "corrupt"
+    os.makedirs(corrupt)
+    for name in os.listdir(directory):
+        data = open(os.path.join(directory, name), "rb").read()
+        if name == "records.bin":
+            data = data.replace(b"chunk without", b"chunk with")
+        (corrupt / name).write_bytes(data)
+
+    with pytest.raises(ValueError, match="records.bin"):
+        read_manifest(str(corrupt))
+    with pytest.raises(ValueError, match="No snapshot"):
+        import_snapshot(STORES["quantized"](tmp_path / "store", NoEmbeddings()), str(tmp_path / "missing"))
@@ -0,0 +1,68 @@
+import pytest
+from langchain_core.documents import Document
+
+from backend.document_processor import TikTokenTextSplitter
+from backend.fakes import fake_encoding
+
+TEXT = (
+    "Agents keep long term memory in a vector store. "
+    "Each memory is embedded once and searched by similarity.\n\n"
+    "Grading checks that retrieved memories answer the question. "
+    "Unicode such as café, naïve and 日本語 must survive splitting."
+)
+
+@pytest.fixture(scope="module")
+def encoding():
+    return fake_encoding([TEXT])
+
+def test_chunks_respect_token_limit(encoding):
+    """No chunk is longer than chunk_size tokens and no text is lost"""
+    splitter = TikTokenTextSplitter(chunk_size=12, chunk_overlap=0, encoding=encoding)
+
+    chunks = splitter.split_text(TEXT)
+
+    assert all(len(encoding.encode_ordinary(chunk)) <= 12 for chunk in chunks)
+    assert "".join(chunks).replace(" ", "").replace("\n", "") == \
+        TEXT.replace(" ", "").replace("\n", "")
+
+def test_chunks_end_on_separators(encoding):
+    """Chunks prefer to end at a paragraph or sentence boundary"""
+    splitter = TikTokenTextSplitter(chunk_size=30, chunk_overlap=0, encoding=encoding)
+
+    chunks = splitter.split_text(TEXT)
+
+    assert chunks[0] == "Agents keep long term memory in a vector store. " \
+        "Each memory is embedded once and searched by similarity."
+    assert all(chunk.endswith(".") for chunk in chunks)
+
+def test_split_documents_keeps_metadata_and_overlap(encoding):
+    """Every chunk keeps its document's metadata and overlaps the previous one"""
+    splitter = TikTokenTextSplitter(chunk_size=20, chunk_overlap=5, encoding=encoding)
+    documents = [Document(page_content=TEXT, metadata={"source": f"doc-{i}"}) for i in range(3)]
+
+    chunks = splitter.split_documents(documents)
+
+    assert [chunk.metadata["source"] for chunk in chunks] == sorted(chunk.metadata["source"] for chunk in chunks)
+    first = [chunk.page_content for chunk in chunks if chunk.metadata["source"] == "doc-0"]
+    assert len(first) > 1
+    assert first[1].split()[0] in first[0]
+
+def test_overlap_must_be_smaller_than_chunk():
+    with pytest.raises(ValueError):
+        TikTokenTextSplitter(chunk_size=10, chunk_overlap=10)
+
+def test_service_falls_back_to_characters_offline(monkeypatch):
+    """Without the encoding the service splits by characters of about the same size"""
+    import tiktoken
+
+    from backend.document_processor import RecursiveTextSplitter
+    from backend.document_processor.service import DocumentService
+
+    def offline(name):
+        raise ConnectionError("no network")
+
+    monkeypatch.setattr(tiktoken, "get_encoding", offline)
+    splitter = DocumentService(chunk_size=250, chunk_overlap=25)._create_text_splitter()
+
+    assert isinstance(splitter, RecursiveTextSplitter)
+    assert splitter.splitter._chunk_size == 1000
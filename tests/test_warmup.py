@@ -0,0 +1,74 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+
+from backend.api import create_app
+from backend.api import server
+from backend.document_processor import QuantizedVectorStore
+from backend.fakes import FakeEmbeddings
+from backend.graph.chains.llm import model_registry
+from backend.warmup import WARMUP_MODEL, Warmup
+from benchmarks.harness import make_corpus, patched_vector_store
+
+NODES = ["retrieve", "rerank", "grade_documents", "generate", "web_search"]
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Small store served by the shared document service"""
+    monkeypatch.chdir(tmp_path)
+    vector_store = QuantizedVectorStore(str(tmp_path / "store"), "int8", FakeEmbeddings())
+    vector_store.store_documents([
+        Document(id=f"chunk-{i}", page_content=text, metadata={"source": "a.pdf"})
+        for i, text in enumerate(make_corpus(20, words_per_doc=30, seed=3))
+    ])
+    with patched_vector_store(vector_store):
+        yield vector_store
+
+def test_synthetic_question_runs_every_node_offline(store):
+    """Every node runs on stubs without touching the model or search providers"""
+    warmup = Warmup(connect=False)
+    factory = mock.Mock(side_effect=AssertionError("the real model factory was used"))
+    original_factory = model_registry.factory
+    model_registry.set_factory(factory)
+    try:
+        with mock.patch("backend.graph.nodes.web_search.TavilySearchResults") as tavily:
+            embedding = warmup.step("index", warmup._touch_index)
+            warmup._run_nodes(embedding)
+    finally:
+        model_registry.set_factory(original_factory)
+
+    assert embedding is not None
+    assert not warmup.errors
+    assert [name for name in warmup.timings if name.startswith("node.")] == [f"node.{name}" for name in NODES]
+    factory.assert_not_called()
+    tavily.assert_not_called()
+    # The stub model is no longer served
+    assert WARMUP_MODEL not in model_registry._overrides
+
+def test_ready_waits_for_warmup():
+    """Readiness fails while the worker warms up and succeeds once it is done"""
+    release = threading.Event()
+    report = {"ready": True, "total": 0.0, "timings": {"imports": 0.0}, "errors": {}}
+
+    def warm_up():
+        release.wait(5)
+        return report
+
+    with mock.patch.object(server, "run_warmup", warm_up), \
+            mock.patch.object(server, "open_async_connections", mock.AsyncMock()):
+        with TestClient(create_app(warmup=True)) as client:
+            assert client.get("/health").status_code == 200
+            assert client.get("/ready").status_code == 503
+            release.set()
+            for _ in range(200):
+                response = client.get("/ready")
+                if response.status_code == 200:
+                    break
+                time.sleep(0.01)
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready", "warmup": report}
@@ -0,0 +1,108 @@
+import pytest
+from langchain_core.documents import Document
+
+from backend.document_processor import ChromaVectorStore
+from backend.document_processor.retriever import RetrieverService
+from backend.document_processor.service import document_service
+from backend.fakes import FakeChatModel, FakeEmbeddings, FakeSearchTool
+from backend.graph.chains.llm import model_registry
+from backend.graph.checkpointer import create_checkpointer
+from backend.graph.graph import build_workflow
+from backend.graph.state import new_turn
+from benchmarks.harness import patched_search
+
+TEXTS = [
+    "agents store long term memory in a vector database",
+    "vector databases index embeddings for similarity search",
+    "the weather in paris is mild in spring",
+    "tides are driven by the gravity of the moon",
+]
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Vector store counting its searches"""
+    store = ChromaVectorStore(
+        collection_name="working-set",
+        persist_directory=str(tmp_path / "chroma"),
+        embedding_function=FakeEmbeddings(),
+    )
+    store.store_documents([Document(page_content=text, metadata={"source": "notes.txt"}) for text in TEXTS])
+    store.searches = 0
+    search_by_vector = store.search_by_vector
+
+    def counting_search(*args, **kwargs):
+        store.searches += 1
+        return search_by_vector(*args, **kwargs)
+
+    monkeypatch.setattr(store, "search_by_vector", counting_search)
+    return store
+
+@pytest.fixture
+def retriever(store):
+    """Retriever installed in the document service"""
+    saved = document_service._retriever
+    document_service._retriever = RetrieverService(store, search_type="similarity", k=2, score_threshold=0.3)
+    yield document_service._retriever
+    document_service._retriever = saved
+
+@pytest.fixture
+def llm():
+    """Chat model searching and accepting every document and answer"""
+    llm = FakeChatModel()
+    original_factory = model_registry.factory
+    model_registry.set_factory(lambda *args, **kwargs: llm)
+    yield llm
+    model_registry.set_factory(original_factory)
+
+def _config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+def test_follow_up_reuses_working_set(store, retriever, llm, tmp_path):
+    """A follow-up covered by earlier chunks skips the store search"""
+    app = build_workflow().compile(checkpointer=create_checkpointer(str(tmp_path / "checkpoints.sqlite")))
+
+    first = app.invoke(new_turn(TEXTS[0]), _config("t1"))
+    assert store.searches == 1
+    assert first["working_set"] == [doc.id for doc in first["documents"]]
+
+    follow_up = app.invoke(new_turn(TEXTS[0]), _config("t1"))
+    assert store.searches == 1
+    assert follow_up["documents"][0].page_content == TEXTS[0]
+
+    app.invoke(new_turn(TEXTS[3]), _config("t1"))
+    assert store.searches == 2
+
+def test_thread_resumes_after_its_chunks_are_deleted(store, retriever, llm, tmp_path):
+    """A working set whose chunks are all gone is dropped and the store searched"""
+    app = build_workflow().compile(checkpointer=create_checkpointer(str(tmp_path / "checkpoints.sqlite")))
+    first = app.invoke(new_turn(TEXTS[0]), _config("t1"))
+    store._get_vectorstore()._collection.delete(ids=first["working_set"])
+    # A new worker rebuilds the working set from the checkpointed ids
+    retriever.working_sets.clear()
+
+    with patched_search(FakeSearchTool):
+        follow_up = app.invoke(new_turn(TEXTS[0]), _config("t1"))
+
+    assert store.searches == 2
+    assert TEXTS[0] not in [doc.page_content for doc in follow_up["documents"]]
+    assert retriever.get_working_set("t1", first["working_set"]) is None
+
+def test_working_set_is_rebuilt_from_ids(store, retriever):
+    """Another process rebuilds the working set from the ids in the state"""
+    documents, _ = retriever.retrieve_with_scores(TEXTS[1])
+    ids = retriever.extend_working_set(None, documents)
+
+    other_worker = RetrieverService(store, search_type="similarity", k=2, score_threshold=0.3)
+    working_set = other_worker.get_working_set("t1", ids)
+
+    assert working_set.ids == ids
+    assert working_set.search(store.embed_query(TEXTS[1]), k=1)[0].metadata["score"] == pytest.approx(1.0, abs=1e-5)
+    assert other_worker.get_working_set(None, ids) is None
+
+def test_working_set_keeps_most_recent_chunks(retriever):
+    """Chunks graded again move to the end, the oldest are dropped"""
+    retriever.working_set_size = 3
+    chunks = [Document(id=str(i), page_content=str(i)) for i in range(4)]
+
+    assert retriever.extend_working_set(["0", "1", "2"], chunks[1:2]) == ["0", "2", "1"]
+    assert retriever.extend_working_set(["0", "2", "1"], chunks[3:]) == ["2", "1", "3"]